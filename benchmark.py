@@ -0,0 +1,166 @@
+import argparse
+import concurrent.futures
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import cohort
+import figures
+import pipeline
+import snapshot
+import synthetic
+
+logger = logging.getLogger(__name__)
+
+# Widget values a user is likely to flip through; the first set per figure matches the page defaults.
+def widget_cases(pipe):
+    categories = list(pipe["low_score_review_rows"]['product_category_name_english'])
+    states = list(pipe["lateness_cube_rows"]['customer_state'])
+    category = categories[0] if categories else 'Semua Kategori'
+    state = states[0] if states else 'Semua State'
+    metrics = ["Customer Lateness Rate", "Seller Late Dispatch Rate"]
+    # The cohort selectors list what the cohort matrix holds, as on the page.
+    cohort_rows = pipe["cohort_matrix_rows"]
+    cohort_state = next(iter(cohort_rows['customer_state']), cohort.ALL_STATES)
+    cohort_category = next((c for c in cohort_rows['product_category_name_english'] if c != cohort.ALL_CATEGORIES), cohort.ALL_CATEGORIES)
+    return {
+        "fig_top": [{"min_reviews": 50}, {"min_reviews": 10}, {"min_reviews": 200}],
+        "fig_bottom": [{"min_reviews": 50}, {"min_reviews": 10}, {"min_reviews": 200}],
+        "fig_complaints": [{"category": 'Semua Kategori'}, {"category": category}],
+        "fig_regional_map": [{"metric": m, "category": c} for m in metrics for c in ('Semua Kategori', category)],
+        "fig_dist": [{"metric": m, "category": c, "state": s} for m in metrics for c in ('Semua Kategori', category) for s in ('Semua State', state)],
+        "fig_avg": [{"state": 'Semua State'}, {"state": state}],
+        "fig_cohort": [{"measure": m, "state": s, "category": c} for m in cohort.MEASURES
+                       for c, s in ((cohort.ALL_CATEGORIES, cohort.ALL_STATES), (cohort.ALL_CATEGORIES, cohort_state), (cohort_category, cohort.ALL_STATES))],
+    }
+
+
+class Recorder:
+    def __init__(self, n_orders, trace_memory=True):
+        self.n_orders = n_orders
+        self.trace_memory = trace_memory
+        self.results = []
+
+    def measure(self, stage, fn, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        peak = None
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.results.append({
+            "orders": self.n_orders,
+            "stage": stage,
+            "seconds": seconds,
+            "peak_bytes": peak,
+            "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        })
+        logger.info("%9d orders  %-40s %8.3fs", self.n_orders, stage, seconds)
+        return value
+
+
+def run_scale(n_orders, seed=0, trace_memory=True, budget=1.0, data_dir=None):
+    recorder = Recorder(n_orders, trace_memory)
+    with tempfile.TemporaryDirectory() as work_dir:
+        if data_dir is None:
+            tables = recorder.measure("generate", synthetic.generate, n_orders, seed, synthetic.read_categories())
+            data_dir = recorder.measure("write_csv", synthetic.write_tables, tables, os.path.join(work_dir, "data"))
+            del tables
+        snapshot_dir = os.path.join(work_dir, "snapshot")
+        os.makedirs(snapshot_dir)
+        key = recorder.measure("ingest", snapshot.build_snapshot, data_dir, snapshot_dir)
+        load_timings = {}
+        tables = recorder.measure("load", snapshot.read_tables, key, snapshot_dir, timings=load_timings)
+
+        for name in snapshot.TABLES:
+            recorder.results.append({"orders": n_orders, "stage": f"load:{name}", "seconds": load_timings[name]})
+        pipe = pipeline.Pipeline(tables, key)
+        # Registration order is a valid build order, so each node is timed on its own.
+        for name in pipeline.NODES:
+            recorder.measure(f"node:{name}", pipe.get, name)
+
+        cases = widget_cases(pipe)
+        interaction = []
+        for name, builder in figures.FIGURES.items():
+            widgets = cases.get(name, [{}])
+            recorder.measure(f"section:{name}", builder, pipe, **widgets[0])
+            for values in widgets[1:]:
+                # A widget change on a warm pipeline: what one rerun of the section allocates.
+                if trace_memory:
+                    tracemalloc.start()
+                start = time.perf_counter()
+                builder(pipe, **values)
+                seconds = time.perf_counter() - start
+                peak = None
+                if trace_memory:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                interaction.append((name, seconds, peak))
+
+    for name in dict.fromkeys(n for n, _, _ in interaction):
+        runs = [(s, p) for n, s, p in interaction if n == name]
+        recorder.results.append({
+            "orders": n_orders,
+            "stage": f"interaction:{name}",
+            "seconds": statistics.median(s for s, _ in runs),
+            "max_seconds": max(s for s, _ in runs),
+            "peak_bytes": max(p for _, p in runs) if trace_memory else None,
+            "runs": len(runs),
+        })
+    slowest = max((s for _, s, _ in interaction), default=0.0)
+    recorder.results.append({
+        "orders": n_orders,
+        "stage": "summary",
+        "seconds": sum(r["seconds"] for r in recorder.results if r["stage"] in ("ingest", "load") or r["stage"].startswith("node:")),
+        "max_interaction_seconds": slowest,
+        "over_budget": slowest > budget,
+    })
+    return recorder.results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory-profile every dashboard stage on synthetic data.")
+    parser.add_argument("orders", type=int, nargs="*", default=[100_000], help="scales to run, in orders (e.g. 100000 1000000 10000000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="benchmark an existing CSV directory instead of generating one (single scale)")
+    parser.add_argument("--budget", type=float, default=1.0, help="interaction latency budget in seconds")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc, which slows Python-heavy stages")
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    results = []
+    for n_orders in args.orders:
+        # A fresh process per scale keeps max RSS and module-level caches from leaking between scales.
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            results.extend(executor.submit(run_scale, n_orders, args.seed, not args.no_memory, args.budget, args.data_dir).result())
+    report = {"environment": environment(), "budget_seconds": args.budget, "results": results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
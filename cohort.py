@@ -0,0 +1,74 @@
+import pandas as pd
+
+import views
+
+ALL_CATEGORIES = 'Semua Kategori'
+ALL_STATES = 'Semua State'
+COHORT_KEYS = ['product_category_name_english', 'customer_state', 'cohort', 'period']
+# measure -> heatmap label
+MEASURES = {
+    "retention": "Retensi Pelanggan (%)",
+    "customers": "Pelanggan Aktif",
+    "orders": "Jumlah Pesanan",
+    "revenue": "Pendapatan (R$)",
+}
+# Orders that never went through are not purchases.
+EXCLUDED_STATUSES = ['canceled', 'unavailable']
+
+
+def month_number(timestamps):
+    return timestamps.dt.year * 12 + timestamps.dt.month - 1
+
+
+def _cells(activity, keys):
+    return activity.groupby(keys, observed=True, dropna=False).agg(
+        customers=('customer_unique_id', 'size'),
+        orders=('orders', 'sum'),
+        revenue=('revenue', 'sum'),
+    ).reset_index()
+
+
+# Each customer_unique_id belongs to the month of its first order (its cohort) and to that order's
+# customer state and product categories; every order then lands `period` months after the cohort.
+# Only non-empty cells are kept, one row per (category, state, cohort, period), with the customers
+# active in the cell, their orders and their revenue. Category ALL_CATEGORIES rows hold every
+# customer once, since a first order with two categories puts its customer in both category rows.
+def build_cohort_matrix(fact_orders, order_categories):
+    orders = fact_orders[~fact_orders['order_status'].isin(EXCLUDED_STATUSES) & (fact_orders['customer_unique_id'] >= 0)]
+    orders = orders[['order_id', 'customer_unique_id', 'customer_state', 'order_purchase_timestamp', 'payment_value']].dropna(subset=['order_purchase_timestamp'])
+    orders = orders.sort_values(['order_purchase_timestamp', 'order_id'], kind='stable')
+    first_purchase = orders.groupby('customer_unique_id')['order_purchase_timestamp'].transform('min')
+    orders = orders.assign(
+        cohort=first_purchase.dt.to_period('M').dt.to_timestamp(),
+        period=month_number(orders['order_purchase_timestamp']) - month_number(first_purchase),
+    )
+
+    # One row per customer and active month; everything below aggregates these, never the orders.
+    activity = orders.groupby(['customer_unique_id', 'cohort', 'period']).agg(orders=('order_id', 'size'), revenue=('payment_value', 'sum')).reset_index()
+    first_orders = orders.drop_duplicates('customer_unique_id')
+    activity = activity.merge(first_orders[['customer_unique_id', 'customer_state']], on='customer_unique_id')
+    segments = first_orders[['order_id', 'customer_unique_id']].merge(order_categories, on='order_id')[['customer_unique_id', 'product_category_name_english']]
+
+    overall = _cells(activity, COHORT_KEYS[1:]).assign(product_category_name_english=ALL_CATEGORIES)
+    per_category = _cells(activity.merge(segments, on='customer_unique_id'), COHORT_KEYS)
+    return pd.concat([overall, per_category], ignore_index=True).set_index(COHORT_KEYS).sort_index()
+
+
+def slice_cohorts(matrix, row_index, state=ALL_STATES, category=ALL_CATEGORIES):
+    cells = views.select(matrix, row_index, product_category_name_english=category, customer_state=None if state == ALL_STATES else state)
+    # Every customer has one state, so summing the state cells of a cohort never counts anyone twice.
+    return cells.groupby(level=['cohort', 'period']).sum()
+
+
+def cohort_grid(cells, measure):
+    # Dense cohort x months-since-first-purchase grid for one slice; empty cells are NaN.
+    if cells.empty:
+        return pd.DataFrame()
+    if measure == "retention":
+        customers = cells['customers'].unstack('period')
+        return customers.div(customers[0], axis=0) * 100
+    return cells[measure].unstack('period')
+
+
+def cohort_sizes(cells):
+    return cells['customers'].xs(0, level='period')
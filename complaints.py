@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+complaint_keywords = {
+    "Late Delivery": ["atras", "demor", "prazo", "lento", "extravia", "pass"],
+    "Missing Items / Partial Delivery": ["falt", "incompleto", "apenas", "só", " so ", "parte", "unidade", "kit", "parcial", "quantitade", "somen"],
+    "Product Not Received": ["nao chegou", "não chegou", "não rece", "nao rece", "não entreg", "nao entreg", "nunca chegou", "consta entregue", "caixa vazia", "aguard", "nada", "nao foi entreg", "não foi entreg"],
+    "Bad Product Quality / Defective": ["peq", "quebra", "defeit", "qualidade ruim", "funciona", "estraga", "avaria", "falso", "caixa", "rasga", "mancha", "costura", "acabamento", "arranha", "amassad", "solto", "velh", "fraco", "materi", "fals"],
+    "Wrong Item Sent": ["diferente", "erra", "outro", "modelo", "cor ", "trocado", "marca", "tamanho", "correspondem", "nao foi o mesm", "não foi o mesm"],
+    "Bad Packaging": ["caixa", "embala", "rasgad", "abert", "violad", "frágil", "fragil", "danificad", "pacote"],
+    "Bad Service / Seller Issues": ["atendimen", "sem resp", "ninguem resp", "nao resol", "não resolve", "pós venda", "vendedor", "dialo", "diálo", "serviç", "servic", "respe", "loj"],
+    "Misleading Product / Advertisement": ["propagan", "anunc", "fot", "descri", "expect", "ilus", "nao e como", "não é como", "origin"],
+    # "Return & Refund Issues": ["devolv", "troca", "dinheiro", "volta", "cancel", "reembolso", "estorno"],
+    "Return / Refund / Cancellation Issues": ["cancel", "devol", "troca"]
+}
+
+
+UNCLASSIFIED = "Unclassified"
+CATEGORIES = np.array(list(complaint_keywords), dtype=object)
+KEYWORDS = list(dict.fromkeys(keyword for keywords in complaint_keywords.values() for keyword in keywords))
+# How often each distinct keyword counts towards each category: a keyword listed twice scores twice.
+KEYWORD_WEIGHTS = np.array([[keywords.count(keyword) for keywords in complaint_keywords.values()] for keyword in KEYWORDS], dtype=np.int32)
+
+# Comment text -> category, least recently used first. Review ids are snapshot-local codes, so the text
+# they carry is the stable cache key; every pipeline and window of the process shares the entries.
+CACHE_SIZE = int(os.environ.get("ECOMMERCE_COMPLAINT_CACHE_SIZE", "50000"))
+_category_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def build_automaton(keywords):
+    # Aho-Corasick over UTF-8 bytes, flattened into a dense transition table so scans vectorize across texts.
+    goto, outputs = [{}], [set()]
+    for index, keyword in enumerate(keywords):
+        state = 0
+        for byte in keyword.encode("utf-8"):
+            if byte not in goto[state]:
+                goto[state][byte] = len(goto)
+                goto.append({})
+                outputs.append(set())
+            state = goto[state][byte]
+        outputs[state].add(index)
+
+    transitions = np.zeros((len(goto), 256), dtype=np.int64)
+    fail = [0] * len(goto)
+    queue = list(goto[0].values())
+    for byte, child in goto[0].items():
+        transitions[0, byte] = child
+    while queue:
+        state = queue.pop(0)
+        outputs[state] |= outputs[fail[state]]
+        transitions[state] = transitions[fail[state]]
+        for byte, child in goto[state].items():
+            fail[child] = transitions[fail[state], byte]
+            transitions[state, byte] = child
+            queue.append(child)
+
+    words = (len(keywords) + 63) // 64
+    masks = np.zeros((len(goto), words), dtype=np.uint64)
+    for state, matched in enumerate(outputs):
+        for index in matched:
+            masks[state, index // 64] |= np.uint64(1) << np.uint64(index % 64)
+    # Flattened so the next state is transitions[state * 256 + byte].
+    return transitions.ravel(), masks
+
+
+TRANSITIONS, OUTPUT_MASKS = build_automaton(KEYWORDS)
+
+
+def score_complaints(comments_lower):
+    encoded = [text.encode("utf-8") for text in comments_lower]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    order = np.argsort(-lengths, kind="stable")
+    buffer = np.frombuffer(b"".join(encoded[i] for i in order), dtype=np.uint8)
+    sorted_lengths = lengths[order]
+    offsets = np.concatenate(([0], np.cumsum(sorted_lengths)[:-1]))
+
+    # Texts are sorted longest first, so at each byte position the still-active texts form a prefix.
+    states = np.zeros(len(encoded), dtype=np.int64)
+    hits = np.zeros((len(encoded), OUTPUT_MASKS.shape[1]), dtype=np.uint64)
+    active = len(encoded)
+    for position in range(int(sorted_lengths[0]) if len(encoded) else 0):
+        while active and sorted_lengths[active - 1] <= position:
+            active -= 1
+        current = states[:active]
+        current *= 256
+        current += buffer[offsets[:active] + position]
+        np.take(TRANSITIONS, current, out=current)
+        hits[:active] |= OUTPUT_MASKS[current]
+
+    matched = np.unpackbits(hits.view(np.uint8), axis=1, bitorder="little")[:, :len(KEYWORDS)]
+    scores = np.empty((len(encoded), len(complaint_keywords)), dtype=np.int32)
+    scores[order] = matched.astype(np.int32) @ KEYWORD_WEIGHTS
+    return scores
+
+
+def classify_complaints(comments):
+    comments = pd.Series(comments, dtype=object)
+    codes, uniques = pd.factorize(comments)
+    texts = [text for text in uniques if isinstance(text, str)]
+    with _cache_lock:
+        known = {text: _category_cache[text] for text in texts if text in _category_cache}
+        for text in known:
+            _category_cache.move_to_end(text)
+    new_texts = [text for text in texts if text not in known]
+    if new_texts:
+        scores = score_complaints([text.lower() for text in new_texts])
+        # argmax returns the first maximum, so ties go to the category listed first in complaint_keywords.
+        labels = np.where(scores.max(axis=1) > 0, CATEGORIES[scores.argmax(axis=1)], UNCLASSIFIED)
+        known.update(zip(new_texts, labels))
+        with _cache_lock:
+            _category_cache.update(zip(new_texts, labels))
+            while len(_category_cache) > CACHE_SIZE:
+                _category_cache.popitem(last=False)
+    # The trailing entry serves factorize's -1 code for missing comments.
+    labels = np.array([known.get(text, UNCLASSIFIED) if isinstance(text, str) else UNCLASSIFIED for text in uniques] + [UNCLASSIFIED], dtype=object)
+    return pd.Series(labels[codes], index=comments.index)
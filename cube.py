@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+CUBE_KEYS = ['customer_state', 'product_category_name_english', 'month']
+LATENESS_BINS = list(np.arange(0, 16, 3)) + [np.inf]
+LATENESS_LABELS = [f"{i}-{i+3}" for i in np.arange(0, 15, 3)] + ["15+"]
+
+# measure prefix -> (late flag, days late column)
+LATENESS_MEASURES = {
+    "customer": ('is_on_time', 'days_late'),
+    "seller": ('seller_dispatched_on_time', 'seller_dispatch_days_late'),
+}
+
+
+def build_lateness_cube(df_analysis):
+    cells = df_analysis[CUBE_KEYS].copy()
+    for prefix, (on_time_column, days_late_column) in LATENESS_MEASURES.items():
+        late = ~df_analysis[on_time_column]
+        cells[f'{prefix}_late'] = late.astype(np.int32)
+        cells[f'{prefix}_on_time'] = (~late).astype(np.int32)
+        lateness_bin = pd.cut(df_analysis[days_late_column].where(late), bins=LATENESS_BINS, labels=False, right=False)
+        for i, label in enumerate(LATENESS_LABELS):
+            cells[f'{prefix}_late_{label}'] = (lateness_bin == i).astype(np.int32)
+    # dropna=False keeps rows without a state so the "Semua" roll-ups still add up to the full table.
+    return cells.groupby(CUBE_KEYS, observed=True, dropna=False).sum()
+
+
+def late_rate_by(cube, level, prefix):
+    totals = cube.groupby(level=level, observed=True)[[f'{prefix}_late', f'{prefix}_on_time']].sum()
+    return totals[f'{prefix}_late'] / (totals[f'{prefix}_late'] + totals[f'{prefix}_on_time']) * 100
+
+
+def lateness_histogram(cube, prefix):
+    counts = cube[[f'{prefix}_late_{label}' for label in LATENESS_LABELS]].sum()
+    return pd.DataFrame({'lateness_bin': LATENESS_LABELS, 'count': counts.to_numpy()})
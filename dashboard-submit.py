@@ -1,602 +1,546 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import numpy as np
-import plotly.graph_objects as go
+import os
+import logging
+
+import cohort
+import encoding
+import figure_cache
+import figures
+import incremental
+import leaderboard
+import profiling
+import search
+import sketches
+import snapshot
+import sql_pipeline
+import streaming
+import timeline
+import views
 
 st.set_page_config(
     page_title="Analisis Kinerja E-commerce",
     layout="wide"
 )
 
-THEME_COLOR = "royalblue"
-PLOTLY_TEMPLATE = "plotly_white"
-
-@st.cache_data
-def load_data():
-    path = "E-commerce/"
+DATA_SOURCE = os.environ.get("ECOMMERCE_DATA_SOURCE", "snapshot")
+DEBUG = bool(os.environ.get("ECOMMERCE_DEBUG"))
+PROFILE_LOG = os.environ.get("ECOMMERCE_PROFILE_LOG")
+# "pandas" or "duckdb"; both backends produce the same nodes, so every figure works on either.
+BACKEND = os.environ.get("ECOMMERCE_BACKEND", "pandas")
+# Distinct counts and medians from mergeable sketches (error bounds: ECOMMERCE_HLL_ERROR / ECOMMERCE_QUANTILE_ERROR).
+APPROX = bool(os.environ.get("ECOMMERCE_APPROX"))
+APPROX_MARK = "≈ " if APPROX else ""
+# Monthly and category aggregates maintained outside the app: "incremental" (the incremental.py state,
+# refreshed by batches) or "streaming" (folded from the CSVs in bounded memory). Unset: built from the tables.
+AGGREGATES_SOURCE = os.environ.get("ECOMMERCE_AGGREGATES")
+
+logging.basicConfig(level=os.environ.get("ECOMMERCE_LOG_LEVEL", "INFO"))
+
+def show_missing_file(e, path):
+    missing_file = str(e).split("'")[1] if "'" in str(e) else str(e)
+    st.error(f"Error: File dataset '{missing_file}' tidak ditemukan di '{path}'. Pastikan semua file ada.")
+    st.stop()
+
+def data_snapshot_id():
+    if DATA_SOURCE != "snapshot":
+        return "remote"
     try:
-        payments = pd.read_csv("https://drive.google.com/uc?id=113dmpJdb8hA8urg45nYkYXDWhdFvCBYL")
-        customers = pd.read_csv("https://drive.google.com/uc?id=1F2-guLBn-XsTf9TKg6lMrFYHZR_CZbpl")
-        orders = pd.read_csv("https://drive.google.com/uc?id=11CtVRGgAEmKYPFYmcDwbVLgpZg_smDfo", parse_dates=['order_purchase_timestamp', 'order_delivered_customer_date', 'order_estimated_delivery_date', 'order_approved_at', 'order_delivered_carrier_date'])
-        sellers = pd.read_csv("https://drive.google.com/uc?id=1hWy1kOf2X6dr2gaP5DuanPqyjNdYuxui")
-        products = pd.read_csv("https://drive.google.com/uc?id=14BWKVgA4HuRRat8BJxkYIJA6A0pcw0Kr")
-        order_items = pd.read_csv("https://drive.google.com/uc?id=1dtiJfdrUDZoduKu-y29j_BSoi4uwwcAE", parse_dates=["shipping_limit_date"])
-        deals = pd.read_csv("https://drive.google.com/uc?id=1Y-nwkv9D91luGetDrVanJQpPrPLyQnY9", parse_dates=["won_date"])
-        cat_trans = pd.read_csv("https://drive.google.com/uc?id=1gLiDRqex2oFmE62t2hMXlRJUxv6kjLZ5")
-        reviews = pd.read_csv("https://drive.google.com/uc?id=1JAge-xr3SkoTI-_wPpW7gHQaanZ-DWMF")
-        leads = pd.read_csv("https://drive.google.com/uc?id=1Ec2sgXZG4JMWlcHzg5NbDUrXw6okdSBa", parse_dates=["first_contact_date"])
-
+        return snapshot.ensure_snapshot(snapshot.DATA_DIR, snapshot.SNAPSHOT_DIR)
     except FileNotFoundError as e:
-        missing_file = str(e).split("'")[1] if "'" in str(e) else str(e)
-        st.error(f"Error: File dataset '{missing_file}' tidak ditemukan di '{path}'. Pastikan semua file ada.")
-        st.stop()
-    return payments, customers, orders, sellers, products, order_items, reviews, cat_trans, deals, leads
-
-def format_snake_case(s):
-    if isinstance(s, str): return s.replace('_', ' ').title()
-    return s
-
-payments, customers, orders, sellers, products, order_items, reviews, cat_trans, deals, leads = load_data()
-
-items = order_items.merge(products, on="product_id", how="left")
-items = items.merge(cat_trans, on="product_category_name", how="left")
-items['product_category_name_english'] = items['product_category_name_english'].apply(format_snake_case)
-df_master = orders.merge(reviews, on="order_id", how="left")
-df_master = df_master.merge(items, on="order_id", how="left")
-df_master = df_master.merge(customers, on='customer_id', how='left')
-df_master['product_category_name_english'] = df_master['product_category_name_english'].dropna().apply(format_snake_case)
-
-st.title("Scalability Through Continuity")
-st.markdown("Team: Astutea - SSDC2025006")
-st.markdown(" E-Commerce telah mencapai skala yang besar dalam waktu yang pesat, dengan hampir 100.000 pesanan dan 96.000 pelanggan dalam 2 tahun. Namun, pertumbuhan pendapatan menunjukkan **tanda-tanda stagnasi** dan perusahaan masih memiliki banyak **permasalahan dalam segi kualitas pengiriman, relevansi produk, serta kerataan penjual**. *Dashboard* ini mengungkap area strategis yang harus diperbaiki untuk mendorong pertumbuhan berkelanjutan. Fokus pembahasan diarahkan pada **memahami preferensi pelanggan dan inventori, optimasi logistik, dan pertumbuhan pasar yang akurat**. Diharapkan agar strategi yang diusulkan pada *dashboard* ini dapat menjadi perintis dalam memutarkan kembali roda pertumbuhan perusahaan.")
-st.markdown("---")
-
-st.header("Perusahaan Sudah Berkembang Pesat, Akankah Terus Seperti Ini?")
-col1, col2 = st.columns([1, 2])
-with col1:
-    st.subheader("Statistik Terlihat Bagus, Namun...")
-    total_revenue = payments['payment_value'].sum()
-    total_customers = customers['customer_unique_id'].nunique()
-    total_orders = orders['order_id'].nunique()
-    total_sellers = sellers['seller_id'].nunique()
-    total_products = products['product_id'].nunique()
-    st.metric(label="Total Pendapatan (R$)", value=f"R$ {total_revenue/1_000_000:,.2f} Jt".replace(",", "X").replace(".", ",").replace("X", "."))
-    st.metric(label="Total Pelanggan", value=f"{total_customers:,}".replace(",", "."))
-    st.metric(label="Total Pesanan", value=f"{total_orders:,}".replace(",", "."))
-    st.metric(label="Total Penjual (Seller)", value=f"{total_sellers:,}".replace(",", "."))
-    st.metric(label="Total Produk", value=f"{total_products:,}".replace(",", "."))
-with col2:
-    st.subheader("Pendapatan Sudah Mulai Stagnan")
-    revenue_over_time = orders.merge(payments, on='order_id')
-    revenue_over_time['month'] = revenue_over_time['order_purchase_timestamp'].dt.to_period('M').dt.to_timestamp()
-    monthly_revenue = revenue_over_time.groupby('month')['payment_value'].sum().reset_index()
-    fig = px.area(monthly_revenue, x='month', y='payment_value', title="Sudah 9 Bulan Tanpa Rekor Baru Pendapatan (Terakhir Nov 2017)", labels={'month': 'Bulan', 'payment_value': 'Total Pendapatan (R$)'}, color_discrete_sequence=[THEME_COLOR], template=PLOTLY_TEMPLATE)
-    fig.update_layout(height=450)
-    st.plotly_chart(fig, use_container_width=True)
-st.markdown("Hampir 100.000 pesanan dan 96.000 pelanggan mencerminkan bahwa perusahaan ini memiliki skala operasional yang luas. **Namun**, kondisi ini belum sepenuhnya mencerminkan kualitas pertumbuhan. Tanpa **perbaikan** dalam segi **pengalaman pengguna**, **efisiensi**, dan **konversi penjual**, skala besar justru berisiko menjadi **beban perusahaan** dan menurunkan **profitabilitas jangka panjang perusahaan**.")
+        show_missing_file(e, snapshot.DATA_DIR)
 
-st.markdown("---")
+def load_data(snapshot_id, timings=None):
+    # Tables load concurrently on a bounded pool; `timings` receives the per-table seconds.
+    if DATA_SOURCE == "snapshot":
+        return snapshot.read_tables(snapshot_id, snapshot.SNAPSHOT_DIR, timings=timings)
+    try:
+        tables = snapshot.read_sources({name: spec["url"] for name, spec in snapshot.TABLES.items()}, timings=timings)
+    except FileNotFoundError as e:
+        show_missing_file(e, snapshot.DATA_DIR)
+    tables, _, _ = encoding.encode_tables(tables)
+    # Same purchase order as a snapshot, so date windows are contiguous slices here too.
+    return timeline.sort_tables(tables)
+
+def aggregates_version(snapshot_id):
+    # Changes with every applied batch, so a refresh gets a freshly seeded pipeline. Nodes not seeded are
+    # built from the snapshot tables, so seeding needs aggregates of that same snapshot; otherwise
+    # everything is built from the tables.
+    if AGGREGATES_SOURCE is None:
+        return None
+    if AGGREGATES_SOURCE == "incremental":
+        state = incremental.read_state()
+        if state and state.get("sources") == snapshot_id:
+            return f"incremental-{len(state['batches'])}"
+    elif DATA_SOURCE == "snapshot":
+        return AGGREGATES_SOURCE
+    st.sidebar.caption(f"Agregat '{AGGREGATES_SOURCE}' tidak berasal dari data yang sama, semua angka dihitung dari tabel.")
+    return None
+
+def load_aggregates():
+    aggregates = incremental.load_aggregates() if AGGREGATES_SOURCE == "incremental" else streaming.aggregate(snapshot.DATA_DIR)
+    return {name: aggregates[name] for name in streaming.AGGREGATES}
+
+# One pipeline per data snapshot and backend, shared by every rerun and session; nodes are built lazily
+# on first use. Two entries leave room for the second backend when the debug comparison is on.
+@st.cache_resource(max_entries=2)
+def get_pipeline(snapshot_id, backend=BACKEND, aggregates_version=None):
+    timings = {}
+    pipe = sql_pipeline.BACKENDS[backend](load_data(snapshot_id, timings), snapshot_id)
+    pipe.load_timings = timings
+    if aggregates_version is not None:
+        pipe.seed(load_aggregates(), aggregates_version)
+    return pipe
+
+# Persisted beside the snapshot; the reviews table is passed unhashed because the snapshot id already keys it.
+@st.cache_resource(max_entries=1)
+def get_review_index(snapshot_id, _reviews):
+    if DATA_SOURCE == "snapshot":
+        return search.ensure_index(_reviews, snapshot.SNAPSHOT_DIR)
+    return search.build_index(_reviews)
+
+@st.cache_resource(max_entries=1)
+def get_seller_vocabulary(snapshot_id):
+    if DATA_SOURCE != "snapshot":
+        return None
+    return snapshot.read_vocabulary(snapshot_id, "seller", snapshot.SNAPSHOT_DIR)
+
+# Windows slice the shared pipeline's tables, so each one only holds the nodes built for its range.
+@st.cache_resource(max_entries=8)
+def get_window(snapshot_id, backend, seed_version, start, end, _pipe):
+    return _pipe.window(start, end)
+
+def windowed(pipe, period):
+    return pipe if period is None else get_window(pipe.snapshot_id, pipe.backend, pipe.seed_version, *period, _pipe=pipe)
+
+def date_window(pipe):
+    first, last = timeline.date_bounds(pipe["time_index"])
+    selected = st.sidebar.date_input("Rentang Tanggal Pembelian:", value=(first.date(), last.date()), min_value=first.date(), max_value=last.date(), key="date_range")
+    # The picker holds a single date while the end of the range is still being chosen.
+    start, end = (*selected, last.date())[:2]
+    start, end = pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1)
+    if st.sidebar.toggle("Bulatkan ke bulan penuh", key="date_range_months", help="Rentang per bulan penuh memakai ulang agregat bulanan yang sudah dihitung."):
+        start, end = start.to_period('M').to_timestamp(), (end - pd.Timedelta(days=1)).to_period('M').to_timestamp() + pd.offsets.MonthBegin()
+    if start <= first and end > last:
+        return pipe
+    pipe = windowed(pipe, (start, end))
+    orders = pipe.bounds["orders"]
+    st.sidebar.caption(f"{orders.stop - orders.start:,} pesanan dibeli {start:%d-%m-%Y} s.d. {end - pd.Timedelta(days=1):%d-%m-%Y}.".replace(",", "."))
+    return pipe
+
+@st.cache_resource
+def get_figure_cache():
+    return figure_cache.FigureCache()
+
+def record_profile(record):
+    if PROFILE_LOG:
+        profiling.append_log([record], PROFILE_LOG)
+    if DEBUG:
+        # Keep the last 50 reruns of this session for export; fragment reruns land here too.
+        history = st.session_state.get("profile_history", []) + [record]
+        st.session_state["profile_history"] = [r for r in history if r["run"] > record["run"] - 50]
+
+st.session_state["run"] = st.session_state.get("run", 0) + 1
+# Per-section memory peaks only in DEBUG (one local session); the shared log gets process RSS instead.
+profiler = profiling.Profiler(st.session_state["run"], enabled=DEBUG or bool(PROFILE_LOG), trace_memory=DEBUG, on_record=record_profile)
+
+profiler.begin("Data")
+snapshot_id = data_snapshot_id()
+pipe = date_window(get_pipeline(snapshot_id, aggregates_version=aggregates_version(snapshot_id)))
+figure_store = get_figure_cache()
+
+def show_figure(name, **widgets):
+    fig, nbytes = figure_store.get_sized(pipe, name, **widgets)
+    if DEBUG:
+        st.session_state.setdefault("shown_figures", {})[name] = widgets
+    if fig is not None:
+        st.plotly_chart(fig, use_container_width=True)
+        profiler.add_figure(fig, nbytes)
+    return fig
+
+# Each section is a function of its explicit inputs. Sections that own widgets are fragments, so a
+# widget change reruns only its own section instead of the whole page.
+@profiler.section("Statistik")
+def statistics_section(pipe):
+    st.header("Perusahaan Sudah Berkembang Pesat, Akankah Terus Seperti Ini?")
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.subheader("Statistik Terlihat Bagus, Namun...")
+        stats = pipe["approx_headline_stats" if APPROX else "headline_stats"]
+        total_revenue = stats["total_revenue"]
+        total_customers = stats["total_customers"]
+        total_orders = stats["total_orders"]
+        total_sellers = stats["total_sellers"]
+        total_products = stats["total_products"]
+        st.metric(label="Total Pendapatan (R$)", value=f"R$ {total_revenue/1_000_000:,.2f} Jt".replace(",", "X").replace(".", ",").replace("X", "."))
+        st.metric(label="Total Pelanggan", value=APPROX_MARK + f"{total_customers:,}".replace(",", "."))
+        st.metric(label="Total Pesanan", value=APPROX_MARK + f"{total_orders:,}".replace(",", "."))
+        st.metric(label="Total Penjual (Seller)", value=f"{total_sellers:,}".replace(",", "."))
+        st.metric(label="Total Produk", value=f"{total_products:,}".replace(",", "."))
+        if APPROX:
+            st.caption(f"≈ Nilai perkiraan dari sketch HyperLogLog (galat standar ±{sketches.HyperLogLog().error:.1%}).")
+    with col2:
+        st.subheader("Pendapatan Sudah Mulai Stagnan")
+        show_figure("fig_revenue")
+    st.markdown("Hampir 100.000 pesanan dan 96.000 pelanggan mencerminkan bahwa perusahaan ini memiliki skala operasional yang luas. **Namun**, kondisi ini belum sepenuhnya mencerminkan kualitas pertumbuhan. Tanpa **perbaikan** dalam segi **pengalaman pengguna**, **efisiensi**, dan **konversi penjual**, skala besar justru berisiko menjadi **beban perusahaan** dan menurunkan **profitabilitas jangka panjang perusahaan**.")
+
+@st.fragment
+@profiler.section("Rating Kategori")
+def ratings_section(pipe):
+    st.header("Apa yang Pelanggan Katakan Tentang Produk Kita?")
+    st.markdown("*Rating* yang diberikan oleh pelanggan dapat dipengaruhi oleh berbagai **faktor negatif**, seperti **keterlambatan**, **barang yang tidak sampai**, ataupun **cacat produk**. Faktor ini dapat **menurunkan kepercayaan pelanggan** terhadap platform secara keseluruhan dan **mengurangi repeat order** pada kategori yang sama.")
+    st.subheader("Apa Kategori Produk yang Paling Disukai/Tidak Disukai Pelanggan?")
+    min_reviews = st.slider("Jumlah minimum ulasan untuk ditampilkan:", min_value=10, max_value=200, value=50)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("##### Kategori dengan Peringkat Tertinggi (Skala 1-5)")
+        show_figure("fig_top", min_reviews=min_reviews)
+    with col2:
+        st.markdown("##### Kategori dengan Peringkat Terendah (Skala 1-5)")
+        show_figure("fig_bottom", min_reviews=min_reviews)
+
+    st.markdown("Terlihat kategori-kategori yang memiliki nilai ulasan tertinggi dan terendah. **Lantas mengapa** kategori tersebut memiliki nilai ulasan yang rendah?")
+
+@st.fragment
+def complaint_samples(pipe, category):
+    rows = pipe["low_score_review_rows"]
+    category_rows = views.selected_rows(rows, product_category_name_english=category if category != 'Semua Kategori' else None)
+    complaint_category_list = views.values_in(pipe["low_score_reviews"], rows, 'complaint_category', category_rows)
+    if complaint_category_list:
+        selected_complaint = st.selectbox("Pilih kategori keluhan untuk melihat contoh:", options=complaint_category_list)
 
-st.header("Bagaimana Kondisi Perusahaan Saat Ini?")
-st.markdown("Agar mengetahui langkah yang dapat diambil agar perusahaan tetap tumbuh, perlu diketahui terlebih dahulu kondisi *e-commerce* saat ini, seperti **analisis pengalaman pengguna** serta **efisiensi operasional perusahaan**.")
+        # Only the 50 rows shown, of the two columns shown, are gathered from the shared frame.
+        sample_comments = figures.low_score_reviews_for(pipe, category, ['review_score', 'review_comment_message_en'], selected_complaint, limit=50)
+        st.dataframe(sample_comments)
+    else:
+        st.info("Tidak ada komentar untuk ditampilkan.")
 
-st.markdown("---")
+@st.fragment
+@profiler.section("Keluhan")
+def complaints_section(pipe):
+    st.subheader("Rendahnya Kualitas Pengiriman Menurunkan Kepercayaan Pelanggan")
 
-st.header("Apa yang Pelanggan Katakan Tentang Produk Kita?")
-st.markdown("*Rating* yang diberikan oleh pelanggan dapat dipengaruhi oleh berbagai **faktor negatif**, seperti **keterlambatan**, **barang yang tidak sampai**, ataupun **cacat produk**. Faktor ini dapat **menurunkan kepercayaan pelanggan** terhadap platform secara keseluruhan dan **mengurangi repeat order** pada kategori yang sama.")
-st.subheader("Apa Kategori Produk yang Paling Disukai/Tidak Disukai Pelanggan?")
-min_reviews = st.slider("Jumlah minimum ulasan untuk ditampilkan:", min_value=10, max_value=200, value=50)
-category_quality = df_master.groupby('product_category_name_english').agg(average_score=('review_score', 'mean'), review_count=('review_score', 'count')).reset_index()
-category_quality_filtered = category_quality[category_quality['review_count'] >= min_reviews]
-col1, col2 = st.columns(2)
-with col1:
-    st.markdown("##### Kategori dengan Peringkat Tertinggi (Skala 1-5)")
-    top_categories = category_quality_filtered.nlargest(5, 'average_score')
-    fig_top = px.bar(top_categories, x='average_score', y='product_category_name_english', orientation='h', text=top_categories['average_score'].apply(lambda x: f'{x:.2f}'), color_discrete_sequence=['#2ca02c'], template=PLOTLY_TEMPLATE)
-    fig_top.update_layout(yaxis={'categoryorder':'total ascending'}, xaxis_title="Skor Rata-rata", yaxis_title=None, xaxis=dict(range=[1,5]))
-    st.plotly_chart(fig_top, use_container_width=True)
-with col2:
-    st.markdown("##### Kategori dengan Peringkat Terendah (Skala 1-5)")
-    bottom_categories = category_quality_filtered.nsmallest(5, 'average_score')
-    fig_bottom = px.bar(bottom_categories, x='average_score', y='product_category_name_english', orientation='h', text=bottom_categories['average_score'].apply(lambda x: f'{x:.2f}'), color_discrete_sequence=['#d62728'], template=PLOTLY_TEMPLATE)
-    fig_bottom.update_layout(yaxis={'categoryorder':'total descending'}, xaxis_title="Skor Rata-rata", yaxis_title=None, xaxis=dict(range=[1,5]))
-    st.plotly_chart(fig_bottom, use_container_width=True)
-
-st.markdown("Terlihat kategori-kategori yang memiliki nilai ulasan tertinggi dan terendah. **Lantas mengapa** kategori tersebut memiliki nilai ulasan yang rendah?")
-
-st.subheader("Rendahnya Kualitas Pengiriman Menurunkan Kepercayaan Pelanggan")
-
-complaint_keywords = {
-    "Late Delivery": ["atras", "demor", "prazo", "lento", "extravia", "pass"],
-    "Missing Items / Partial Delivery": ["falt", "incompleto", "apenas", "só", " so ", "parte", "unidade", "kit", "parcial", "quantitade", "somen"],
-    "Product Not Received": ["nao chegou", "não chegou", "não rece", "nao rece", "não entreg", "nao entreg", "nunca chegou", "consta entregue", "caixa vazia", "aguard", "nada", "nao foi entreg", "não foi entreg"],
-    "Bad Product Quality / Defective": ["peq", "quebra", "defeit", "qualidade ruim", "funciona", "estraga", "avaria", "falso", "caixa", "rasga", "mancha", "costura", "acabamento", "arranha", "amassad", "solto", "velh", "fraco", "materi", "fals"],
-    "Wrong Item Sent": ["diferente", "erra", "outro", "modelo", "cor ", "trocado", "marca", "tamanho", "correspondem", "nao foi o mesm", "não foi o mesm"],
-    "Bad Packaging": ["caixa", "embala", "rasgad", "abert", "violad", "frágil", "fragil", "danificad", "pacote"],
-    "Bad Service / Seller Issues": ["atendimen", "sem resp", "ninguem resp", "nao resol", "não resolve", "pós venda", "vendedor", "dialo", "diálo", "serviç", "servic", "respe", "loj"],
-    "Misleading Product / Advertisement": ["propagan", "anunc", "fot", "descri", "expect", "ilus", "nao e como", "não é como", "origin"],
-    # "Return & Refund Issues": ["devolv", "troca", "dinheiro", "volta", "cancel", "reembolso", "estorno"],
-    "Return / Refund / Cancellation Issues": ["cancel", "devol", "troca"]
-}
-
-def categorize_complaint(comment):
-    if not isinstance(comment, str): return "Unclassified"
-    comment_lower = comment.lower()
-    scores = {category: sum(1 for keyword in keywords if keyword in comment_lower) for category, keywords in complaint_keywords.items()}
-    max_score = max(scores.values())
-    if max_score == 0: return "Unclassified"
-    best_category = [category for category, score in scores.items() if score == max_score][0]
-    return best_category
-
-df_neg_reviews = df_master.dropna(subset=['review_comment_message', 'review_comment_message_en', 'review_id'])
-df_neg_reviews = df_neg_reviews.drop_duplicates(subset=['review_id'])
-low_score_reviews_all = df_neg_reviews[df_neg_reviews['review_score'] <= 2].copy()
-low_score_reviews_all['complaint_category'] = low_score_reviews_all['review_comment_message'].apply(categorize_complaint)
-
-category_filter_list = ['Semua Kategori'] + sorted(df_neg_reviews['product_category_name_english'].dropna().unique().tolist())
-selected_prod_category = st.selectbox(
-    "Pilih Kategori Produk untuk dianalisis:",
-    options=category_filter_list
-)
+    category_filter_list = ['Semua Kategori'] + views.values_in(pipe["low_score_reviews"], pipe["low_score_review_rows"], 'product_category_name_english')
+    selected_prod_category = st.selectbox(
+        "Pilih Kategori Produk untuk dianalisis:",
+        options=category_filter_list
+    )
 
-if selected_prod_category != 'Semua Kategori':
-    low_score_reviews = low_score_reviews_all[low_score_reviews_all['product_category_name_english'] == selected_prod_category]
-else:
-    low_score_reviews = low_score_reviews_all
-
-col1, col2 = st.columns(2)
-with col1:
-    st.markdown("##### Keluhan Paling Umum dari Ulasan Negatif (<= 2 Bintang)")
-    if not low_score_reviews.empty:
-        category_counts = low_score_reviews['complaint_category'].value_counts().reset_index()
-        
-        total_negative_reviews = category_counts['count'].sum()
-        category_counts['percentage'] = (category_counts['count'] / total_negative_reviews) * 100
-        category_counts['text_label'] = category_counts.apply(
-            lambda row: f"{row['count']:,} ({row['percentage']:.1f}%)".replace(",", "."), axis=1
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("##### Keluhan Paling Umum dari Ulasan Negatif (<= 2 Bintang)")
+        if show_figure("fig_complaints", category=selected_prod_category) is None:
+            st.info("Tidak ada ulasan negatif untuk kategori yang dipilih.")
+    with col2:
+        st.markdown("##### Contoh Komentar Ulasan (Ditranslasi ke Bahasa Inggris)")
+        complaint_samples(pipe, selected_prod_category)
+    st.caption("**Disclaimer**: Ulasan ini dikategorikan secara otomatis dengan mencari kata kunci tertentu dalam komentar. Kesalahan klasifikasi mungkin terjadi.")
+    st.caption("Setiap ulasan dihitung satu kali. Saat kategori produk dipilih, ulasan dari pesanan yang berisi beberapa kategori ikut dihitung di setiap kategori tersebut.")
+
+    st.markdown("Ketidakpastian atas pengiriman produk, seperti **pengiriman yang tidak tepat waktu**, **barang tidak lengkap**, bahkan **barang yang sama sekali tidak sampai pengirim** merupakan faktor utama penyebab ulasan rendah. Hal yang sama berlaku untuk beberapa kategori produk dengan ulasan rendah (Office Furniture, Fixed Telephony).")
+    st.markdown("Kategori produk lain memiliki keluhan yang lebih **spesifik terhadap kategorinya**, misalnya Fashion Male Clothing yang memiliki banyak masalah tentang **salah pengiriman** dan **refund** (contohnya masalah ukuran yang tidak cocok).")
+
+    st.markdown("""
+    Berdasarkan keluhan yang paling sering dialami, rekomendasi yang kami dapat berikan adalah penerapan **Service Level Agreement (SLA)**. SLA adalah kontrak antara penyedia dan pelanggan untuk mendefinisikan standar pelayanan yang dapat diekspektasikan pelanggan kepada penyedia. SLA berfungsi untuk memberikan jaminan bahwa tidak ada produk yang **telat diantar/tidak diterima**. Ini dilakukan dengan mendefinisikan **deadline** yang jelas untuk pengiriman, memberi **sanksi** kepada penyedia jika gagal memenuhi kontrak, serta memberikan **reimbursement** kepada pelanggan.
+    """)
+
+@st.fragment
+@profiler.section("Pencarian Ulasan")
+def review_search_section(pipe):
+    st.subheader("Cari Sendiri di Ulasan Pelanggan")
+    query = st.text_input("Kata yang dicari (semua kata harus muncul, akhiri dengan * untuk awalan, mis. `entreg*`):", key="review_query")
+    if not query:
+        return
+    # The index covers the whole snapshot; a date window keeps the hits inside its slice of reviews.
+    docs = get_review_index(pipe.snapshot_id, (pipe.parent or pipe)["reviews"]).search(query)
+    if docs is not None and pipe.bounds is not None:
+        docs = timeline.shift_positions(docs, pipe.bounds["reviews"])
+    if docs is None or not len(docs):
+        st.info("Tidak ada ulasan yang cocok dengan pencarian.")
+        return
+
+    counts = search.facet_counts(pipe, docs)
+    st.metric("Ulasan yang Cocok", f"{len(docs):,}".replace(",", "."))
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown("##### Per Kategori Produk")
+        st.dataframe(counts["product_category_name_english"].rename("Jumlah"))
+    with col2:
+        st.markdown("##### Per Provinsi")
+        st.dataframe(counts["customer_state"].rename("Jumlah"))
+    with col3:
+        st.markdown("##### Per Skor Ulasan")
+        st.dataframe(counts["review_score"].rename("Jumlah"))
+    st.dataframe(search.matching_reviews(pipe, docs), hide_index=True)
+
+@profiler.section("Keterlambatan")
+def delivery_section(pipe):
+    st.header("Masih Banyak yang Perlu Diperbaiki dari Sistem Pengiriman Kita")
+
+    summary = pipe["delivery_summary"]
+    late_rate = summary["late_rate"]
+    seller_late_rate = summary["seller_late_rate"]
+    avg_days_late = summary["avg_days_late"]
+    late_orders_count = summary["late_orders_count"]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Angka Keterlambatan Masih Tinggi...")
+        st.metric("Late Delivery Rate", f"{late_rate:.1f}%", help="Persentase pesanan yang diterima pelanggan setelah estimasi tanggal pengiriman.")
+        st.metric("Late Seller Dispatch", f"{seller_late_rate:.1f}%", help="Persentase item yang dikirim seller setelah batas waktu.")
+        st.metric("Rata-rata Hari Keterlambatan", f"{avg_days_late:.1f} hari", help="Rata-rata keterlambatan pengiriman yang tidak on-time.")
+        st.metric("Jumlah Pengiriman Terlambat", f"{late_orders_count:,}".replace(",", "."), help="Total pesanan yang terlambat dari seluruh pengiriman.")
+
+    with col2:
+        st.subheader("Dan Semakin Tidak Stabil Seiring Waktu")
+
+        show_figure("fig_performance_trend")
+
+    # The counts below describe the full two years, not a selected date range.
+    if pipe.period is None:
+        st.markdown("Terdapat **8.568 pengiriman terlambat** dalam rentang waktu **dua tahun**. Artinya terdapat **3657 pengiriman yang terlambat setiap bulan**.")
+
+@st.fragment
+@profiler.section("Retensi Pelanggan")
+def cohort_section(pipe):
+    st.header("Berapa Banyak Pelanggan yang Kembali Berbelanja?")
+    st.markdown("Setiap pelanggan masuk ke kohort bulan pembelian pertamanya. Provinsi dan kategori produk mengikuti pesanan pertama tersebut.")
+
+    cohort_rows = pipe["cohort_matrix_rows"]
+    control_col1, control_col2, control_col3 = st.columns(3)
+    with control_col1:
+        measure_label = st.radio("Metrik:", list(cohort.MEASURES.values()), horizontal=True, key="cohort_measure_selector")
+    measure = next(key for key, label in cohort.MEASURES.items() if label == measure_label)
+    with control_col2:
+        state = st.selectbox("Pilih Provinsi:", [cohort.ALL_STATES] + list(cohort_rows['customer_state']), key="cohort_state_selector")
+    with control_col3:
+        category = st.selectbox("Pilih Kategori Produk:", [cohort.ALL_CATEGORIES] + [c for c in cohort_rows['product_category_name_english'] if c != cohort.ALL_CATEGORIES], key="cohort_category_selector")
+
+    if show_figure("fig_cohort", measure=measure, state=state, category=category) is None:
+        st.info("Belum ada pembelian ulang pada kriteria ini.")
+    st.caption("Bulan ke-0 (bulan pembelian pertama) tidak ditampilkan; jumlah pelanggan tiap kohort tertulis di label baris.")
+    if pipe.period is not None:
+        st.caption("Rentang tanggal aktif: kohort dibentuk dari pembelian pertama di dalam rentang tersebut, sehingga pelanggan lama yang kembali di dalam rentang dihitung sebagai pelanggan baru.")
+
+@st.fragment
+@profiler.section("Keterlambatan Regional")
+def regional_section(pipe):
+    st.header("Masalah Keterlambatan Terdiri dari Beberapa Aspek")
+    st.markdown("Terdapat ketidakmerataan angka keterlambatan di beberapa provinsi. Selain itu, distribusi lama keterlambatan juga memberikan pola unik.")
+
+    lateness_cube = pipe["lateness_cube"]
+    cube_rows = pipe["lateness_cube_rows"]
+
+    control_col1, control_col2, control_col3 = st.columns(3)
+
+    with control_col1:
+        map_metric_selection = st.radio(
+            "Pilih Metrik Peta:",
+            options=["Customer Lateness Rate", "Seller Late Dispatch Rate"],
+            horizontal=True,
+            key="map_metric_selector"
         )
 
-        fig_complaints = px.bar(
-            category_counts, 
-            x='count', 
-            y='complaint_category', 
-            orientation='h',
-            text='text_label',
-            color_discrete_sequence=[THEME_COLOR], 
-            template=PLOTLY_TEMPLATE
-        )
-        fig_complaints.update_layout(
-            yaxis={'categoryorder':'total ascending'}, 
-            xaxis_title="Jumlah Ulasan Negatif", 
-            yaxis_title="Kategori Keluhan"
+    with control_col3:
+        category_list = ['Semua Kategori'] + views.values_in(lateness_cube, cube_rows, 'product_category_name_english')
+        selected_category_regional = st.selectbox(
+            "Pilih Kategori Produk:",
+            options=category_list,
+            key="category_selector"
         )
-        st.plotly_chart(fig_complaints, use_container_width=True)
-    else:
-        st.info("Tidak ada ulasan negatif untuk kategori yang dipilih.")
-with col2:
-    st.markdown("##### Contoh Komentar Ulasan (Ditranslasi ke Bahasa Inggris)")
-    if not low_score_reviews.empty:
-        complaint_category_list = low_score_reviews['complaint_category'].unique().tolist()
-        selected_complaint = st.selectbox("Pilih kategori keluhan untuk melihat contoh:", options=complaint_category_list)
-        
-        sample_comments = low_score_reviews[low_score_reviews['complaint_category'] == selected_complaint]
-        st.dataframe(sample_comments[['review_score', 'review_comment_message_en']].head(50))
-    else:
-        st.info("Tidak ada komentar untuk ditampilkan.")
-st.caption("**Disclaimer**: Ulasan ini dikategorikan secara otomatis dengan mencari kata kunci tertentu dalam komentar. Kesalahan klasifikasi mungkin terjadi.")
 
-st.markdown("Ketidakpastian atas pengiriman produk, seperti **pengiriman yang tidak tepat waktu**, **barang tidak lengkap**, bahkan **barang yang sama sekali tidak sampai pengirim** merupakan faktor utama penyebab ulasan rendah. Hal yang sama berlaku untuk beberapa kategori produk dengan ulasan rendah (Office Furniture, Fixed Telephony).")
-st.markdown("Kategori produk lain memiliki keluhan yang lebih **spesifik terhadap kategorinya**, misalnya Fashion Male Clothing yang memiliki banyak masalah tentang **salah pengiriman** dan **refund** (contohnya masalah ukuran yang tidak cocok).")
+    category_rows = views.selected_rows(cube_rows, product_category_name_english=selected_category_regional if selected_category_regional != 'Semua Kategori' else None)
 
-st.markdown("""
-Berdasarkan keluhan yang paling sering dialami, rekomendasi yang kami dapat berikan adalah penerapan **Service Level Agreement (SLA)**. SLA adalah kontrak antara penyedia dan pelanggan untuk mendefinisikan standar pelayanan yang dapat diekspektasikan pelanggan kepada penyedia. SLA berfungsi untuk memberikan jaminan bahwa tidak ada produk yang **telat diantar/tidak diterima**. Ini dilakukan dengan mendefinisikan **deadline** yang jelas untuk pengiriman, memberi **sanksi** kepada penyedia jika gagal memenuhi kontrak, serta memberikan **reimbursement** kepada pelanggan.
-""")
+    with control_col2:
+        state_list = ['Semua State'] + views.values_in(lateness_cube, cube_rows, 'customer_state', category_rows)
+        selected_state = st.selectbox(
+            "Pilih Provinsi:",
+            options=state_list,
+            key="state_selector"
+        )
 
-st.markdown("---")
+    main_col1, main_col2 = st.columns([1, 2])
 
-def load_data():
-    path = "E-commerce/"
-    orders = pd.read_csv(
-        path + "orders_dataset.csv", 
-        parse_dates=[
-            "order_purchase_timestamp", "order_approved_at",
-            "order_delivered_carrier_date", "order_delivered_customer_date",
-            "order_estimated_delivery_date"
-        ]
-    )
-    order_items = pd.read_csv(path + "order_items_dataset.csv", parse_dates=["shipping_limit_date"])
-    products = pd.read_csv(path + "products_dataset.csv")
-    cat_trans = pd.read_csv(path + "product_category_name_translation.csv")
-    customers = pd.read_csv(path + "customers_dataset.csv")
+    with main_col1:
+        map_title_prefix = "Customer Lateness Rate" if map_metric_selection == "Customer Lateness Rate" else "Seller Late Dispatch Rate"
+        st.subheader(f"{map_title_prefix} (%) per Provinsi")
     
-    return orders, order_items, products, cat_trans, customers
-
-
-# orders, order_items, products, cat_trans, customers = load_data()
-
-items = order_items.merge(products[["product_id", "product_category_name"]], on="product_id", how="left")
-items = items.merge(cat_trans, on="product_category_name", how="left")
-
-items['product_category_name_english'] = items['product_category_name_english'].dropna().apply(format_snake_case)
+        show_figure("fig_regional_map", metric=map_metric_selection, category=selected_category_regional)
 
-df_analysis = orders.merge(items, on="order_id", how="left")
-df_analysis = df_analysis[df_analysis['order_status'] == 'delivered'].dropna(
-    subset=[
-        'order_purchase_timestamp',
-        'order_approved_at',
-        'order_delivered_carrier_date',
-        'order_delivered_customer_date',
-        'order_estimated_delivery_date',
-        'shipping_limit_date',
-        'product_category_name_english'
-    ]
-)
-df_analysis['days_late'] = (
-    df_analysis['order_delivered_customer_date'] - df_analysis['order_estimated_delivery_date']
-).dt.total_seconds() / (24 * 3600)
-df_analysis['is_on_time'] = df_analysis['days_late'] <= 0
-df_analysis['seller_dispatched_on_time'] = (
-    df_analysis['order_delivered_carrier_date'] <= df_analysis['shipping_limit_date']
-)
-df_analysis['seller_dispatch_days_late'] = (
-    df_analysis['order_delivered_carrier_date'] - df_analysis['shipping_limit_date']
-).dt.total_seconds() / (24 * 3600)
-df_analysis = df_analysis.merge(customers[['customer_id', 'customer_state']], on='customer_id', how='left')
-
-st.header("Masih Banyak yang Perlu Diperbaiki dari Sistem Pengiriman Kita")
-
-late_rate = (~df_analysis['is_on_time']).mean() * 100
-seller_late_rate = (~df_analysis['seller_dispatched_on_time']).mean() * 100
-avg_days_late = df_analysis.loc[~df_analysis['is_on_time'], 'days_late'].mean()
-late_orders_count = (~df_analysis['is_on_time']).sum()
-
-df_analysis['month'] = df_analysis['order_purchase_timestamp'].dt.to_period('M').dt.to_timestamp()
-monthly_performance = df_analysis.groupby('month').agg(
-    customer_late_rate=('is_on_time', lambda x: (~x).mean() * 100),
-    seller_late_rate=('seller_dispatched_on_time', lambda x: (~x).mean() * 100)
-).reset_index()
-
-late_orders = df_analysis[df_analysis['days_late'] > 0].copy()
-late_orders['month'] = late_orders['order_purchase_timestamp'].dt.to_period('M').dt.to_timestamp()
-
-monthly_days_late = late_orders.groupby('month')['days_late'].mean().reset_index()
-
-col1, col2 = st.columns(2)
-with col1:
-    st.subheader("Angka Keterlambatan Masih Tinggi...")
-    st.metric("Late Delivery Rate", f"{late_rate:.1f}%", help="Persentase pesanan yang diterima pelanggan setelah estimasi tanggal pengiriman.")
-    st.metric("Late Seller Dispatch", f"{seller_late_rate:.1f}%", help="Persentase item yang dikirim seller setelah batas waktu.")
-    st.metric("Rata-rata Hari Keterlambatan", f"{avg_days_late:.1f} hari", help="Rata-rata keterlambatan pengiriman yang tidak on-time.")
-    st.metric("Jumlah Pengiriman Terlambat", f"{late_orders_count:,}".replace(",", "."), help="Total pesanan yang terlambat dari seluruh pengiriman.")
-
-with col2:
-    st.subheader("Dan Semakin Tidak Stabil Seiring Waktu")
+    with main_col2:
+        if map_metric_selection == "Customer Lateness Rate":
+            st.subheader("Lama Keterlambatan Pengiriman ke Pembeli")
+            if show_figure("fig_dist", metric=map_metric_selection, category=selected_category_regional, state=selected_state) is None:
+                st.info("Tidak ada data keterlambatan pelanggan pada kriteria ini.")
+        else:
+            st.subheader("Lama Keterlambatan Pengiriman ke Kurir")
+            if show_figure("fig_dist", metric=map_metric_selection, category=selected_category_regional, state=selected_state) is None:
+                st.info("Tidak ada data keterlambatan penjual pada kriteria ini.")
+
+    st.markdown("Provinsi dengan tingkat pengiriman rendah secara langsung menurunkan performa rata-rata nasional. Perbaikan di area seperti ini perlu dilakukan.")
+    st.markdown("Sangat mungkin juga bahwa keterlambatan yang terjadi merupakan keterlambatan yang sangat drastis, seperti keterlambatan lebih dari 15 hari.")
+
+    st.subheader("Bottleneck Pengiriman Menghancurkan Pengalaman Pengguna")
+    st.markdown("Kurir ke pelanggan menyumbang 73% waktu pengiriman. Seberapa cepat proses sebelumnya tidak akan berpengaruh jika pada akhirnya produk akan telat.")
+    show_figure("fig_avg", state=selected_state)
+
+    st.markdown("Untuk mengatasi masalah **ketidakmerataan keterlambatan secara regional**, strategi yang kami usulkan adalah bekerja sama dengan **mitra regional** serta memberikan **insentif** untuk kurir yang ingin mengantar ke daerah tersebut.")
+
+    st.markdown("Untuk mengatasi masalah **keterlambatan sebanyak 15+ hari**, strategi yang kami usulkan mirip dengan sebelumnya, yaitu menggunakan **SLA** untuk **meningkatkan jaminan tepat waktu**.")
+
+    st.markdown("Untuk mengatasi masalah waktu pengiriman **Carrier to Customer** yang lama, strategi yang kami usulkan adalah **penetapan SLA, penambahan *sorting hub* di setiap *state*, serta diversifikasi opsi kurir**.")
+
+@st.fragment
+@profiler.section("Leaderboard Penjual")
+def seller_section(pipe):
+    st.header("Penjual Mana yang Paling Sering Terlambat?")
+    st.markdown("Peringkat penjual dihitung sekali per *snapshot* data; mengubah filter, urutan, atau halaman hanya memilih baris dari tabel yang sudah terurut.")
+
+    table = pipe["seller_leaderboard"]
+    table_rows = pipe["seller_leaderboard_rows"]
+    # Narrowing a filter starts again at page 1 instead of overshooting the last page.
+    def first_page():
+        st.session_state.pop("seller_page", None)
+    control_col1, control_col2, control_col3 = st.columns(3)
+    with control_col1:
+        state = st.selectbox("Provinsi Penjual:", [leaderboard.ALL_STATES] + list(table_rows['seller_state']), key="seller_state_selector", on_change=first_page)
+        min_orders = st.number_input("Minimum jumlah pesanan:", min_value=1, value=10, key="seller_min_orders", on_change=first_page)
+    with control_col2:
+        category = st.selectbox("Kategori Produk:", [leaderboard.ALL_CATEGORIES] + [c for c in table_rows['product_category_name_english'] if c != leaderboard.ALL_CATEGORIES], key="seller_category_selector", on_change=first_page)
+        sort_label = st.selectbox("Urutkan berdasarkan:", list(leaderboard.SORT_KEYS.values()), key="seller_sort_key")
+    sort_key = next(key for key, label in leaderboard.SORT_KEYS.items() if label == sort_label)
+    with control_col3:
+        descending = st.radio("Urutan:", ["Terbesar dulu", "Terkecil dulu"], horizontal=True, key="seller_sort_order") == "Terbesar dulu"
+
+    positions = leaderboard.rank(table, pipe["seller_sort_index"], table_rows, sort_key, descending, state, category, min_orders)
+    if not len(positions):
+        st.info("Tidak ada penjual yang sesuai dengan filter.")
+        return
+    page_size = 25
+    n_pages = (len(positions) - 1) // page_size + 1
+    if st.session_state.get("seller_page", 1) > n_pages:
+        # A new date window can leave fewer pages than the one kept from before.
+        first_page()
+    with control_col3:
+        page_number = st.number_input(f"Halaman (1-{n_pages}):", min_value=1, max_value=n_pages, value=1, key="seller_page")
+
+    rows = leaderboard.page(table, positions, page_number - 1, page_size)
+    vocabulary = get_seller_vocabulary(pipe.snapshot_id)
+    if vocabulary is not None:
+        rows = rows.assign(seller_id=encoding.decode_ids(rows['seller_id'], vocabulary).to_numpy())
+    st.dataframe(rows.drop(columns='product_category_name_english').rename(columns={'seller_id': 'Seller ID', 'seller_state': 'Provinsi', **leaderboard.SORT_KEYS}), hide_index=True)
+    start = (page_number - 1) * page_size
+    st.caption(f"Menampilkan {start + 1}-{start + len(rows)} dari {len(positions)} penjual. Keterlambatan dispatch dirata-ratakan atas item yang terlambat; rasio ongkir = total ongkir / total harga item.")
+
+@profiler.section("Ongkir")
+def freight_section(pipe):
+    st.header("Secara Diam-diam, Mahalnya Ongkir Membuat Pelanggan Tidak Senang")
+    st.markdown("Ternyata, biaya pengiriman pada platform ini sangat tinggi dan berdampak negatif terhadap nilai ulasan pelanggan.")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Median Rasio Ongkos Kirim Terhadap Harga Produk")
+
+        median_freight_percentage = pipe["approx_freight_ratio" if APPROX else "freight_ratio"]
+        value_str = f"{APPROX_MARK}{median_freight_percentage:.2f}%"
+
+        st.markdown(f"""
+        <div style="text-align: center; padding-top: 20px;">
+            <p style="font-size: 64px; font-weight: bold;">{value_str}</p>
+        </div>
+        """, unsafe_allow_html=True)
+        if APPROX:
+            st.caption(f"≈ Median perkiraan dari sketch kuantil (galat relatif tiap median ±{sketches.QUANTILE_ERROR:.1%}).")
     
-    if 'month' not in df_analysis.columns:
-        df_analysis['month'] = df_analysis['order_purchase_timestamp'].dt.to_period('M').dt.to_timestamp()
-        
-    monthly_customer_late_rate = df_analysis.groupby('month').agg(
-        customer_late_rate=('is_on_time', lambda x: (~x).mean() * 100)
-    ).reset_index()
-
-    fig_performance_trend = px.line(
-        monthly_customer_late_rate,
-        x='month',
-        y='customer_late_rate',
-        markers=True,
-        title="Tren Tingkat Keterlambatan Pengiriman ke Pelanggan"
-    )
-    fig_performance_trend.update_layout(
-        yaxis_title="Tingkat Keterlambatan (%)",
-        xaxis_title="Bulan",
-        yaxis=dict(range=[0, 30])
-    )
-    st.plotly_chart(fig_performance_trend, use_container_width=True)
+    with col2:
+        st.subheader("Skor Ulasan Rata-rata Menurun saat Ongkir Naik")
 
-st.markdown("Terdapat **8.568 pengiriman terlambat** dalam rentang waktu **dua tahun**. Artinya terdapat **3657 pengiriman yang terlambat setiap bulan**.")
+        show_figure("fig_review_freight")
 
-st.markdown("---")
+    st.markdown("Untuk mengatasi masalah ini, strategi yang kami usulkan adalah **memberikan promosi** untuk pesanan dengan harga ongkir tinggi serta **negosiasi biaya** dengan kurir untuk menekan biaya.")
 
-st.header("Masalah Keterlambatan Terdiri dari Beberapa Aspek")
-st.markdown("Terdapat ketidakmerataan angka keterlambatan di beberapa provinsi. Selain itu, distribusi lama keterlambatan juga memberikan pola unik.")
+@profiler.section("Kesenjangan Pasar")
+def market_section(pipe):
+    st.header("Apa yang Dapat Kita Lakukan untuk Memperluas Pasar Kita?")
 
-control_col1, control_col2, control_col3 = st.columns(3)
+    col1, col2 = st.columns(2)
 
-with control_col1:
-    map_metric_selection = st.radio(
-        "Pilih Metrik Peta:",
-        options=["Customer Lateness Rate", "Seller Late Dispatch Rate"],
-        horizontal=True,
-        key="map_metric_selector"
-    )
+    with col1:
+        st.subheader("Top 10 Kategori Produk Berdasarkan Jumlah Pesanan")
 
-with control_col3:
-    category_list = ['Semua Kategori'] + sorted(df_analysis['product_category_name_english'].dropna().unique().tolist())
-    selected_category_regional = st.selectbox(
-        "Pilih Kategori Produk:",
-        options=category_list,
-        key="category_selector"
-    )
+        show_figure("fig_top_cats")
 
-df_regional = df_analysis.copy()
-if selected_category_regional != 'Semua Kategori':
-    df_regional = df_regional[df_regional['product_category_name_english'] == selected_category_regional]
+    with col2:
+        st.subheader("Top 10 Segmen Bisnis Penjual")
 
-with control_col2:
-    state_list = ['Semua State'] + sorted(df_regional['customer_state'].dropna().unique().tolist())
-    selected_state = st.selectbox(
-        "Pilih Provinsi:",
-        options=state_list,
-        key="state_selector"
-    )
+        if show_figure("fig_top_segments") is None:
+            st.info("Tidak ada penjual yang diakuisisi pada rentang tanggal ini.")
 
-main_col1, main_col2 = st.columns([1, 2])
+    st.subheader("Kesempatan dalam Kesenjangan")
+    st.markdown("Grafik di atas menunjukkan **kita 10 kategori produk yang paling sering dipesan serta 10 segmen bisnis penjual yang terpopuler**. Dapat dilihat bahwa beberapa kategori produk memiliki **jumlah pesanan yang sangat besar**, namun **tidak ada segmen bisnis** yang sesuai untuk kategori produk tersebut (Bed Bath Table, Sports Leisure, dan Watches Gifts). Ini menunjukkan bahwa ada *demand* terhadap kategori tersebut sehingga strategi yang dapat diambil adalah **memfokuskan pencarian penjual yang bergerak di segmen bisnis yang populer, namun sepi penjual**.")
 
-with main_col1:
-    map_title_prefix = "Customer Lateness Rate" if map_metric_selection == "Customer Lateness Rate" else "Seller Late Dispatch Rate"
-    st.subheader(f"{map_title_prefix} (%) per Provinsi")
-    
-    if map_metric_selection == "Customer Lateness Rate":
-        metric_by_state = df_regional.groupby('customer_state')['is_on_time'].apply(lambda x: (~x).mean() * 100).reset_index(name='metric_value')
-        map_title = "Customer Lateness Rate (%)"
-    else:
-        metric_by_state = df_regional.groupby('customer_state')['seller_dispatched_on_time'].apply(lambda x: (~x).mean() * 100).reset_index(name='metric_value')
-        map_title = "Seller Late Dispatch Rate (%)"
-    
-    geojson_url = "https://raw.githubusercontent.com/codeforgermany/click_that_hood/main/public/data/brazil-states.geojson"
-    fig_regional_map = px.choropleth(
-        metric_by_state, 
-        geojson=geojson_url, 
-        locations='customer_state', 
-        featureidkey='properties.sigla', 
-        color='metric_value', 
-        color_continuous_scale="RdYlGn_r", 
-        range_color=(0, 30),
-        scope="south america", 
-        labels={'metric_value': map_title}
-    )
-    fig_regional_map.update_geos(fitbounds="locations", visible=False)
-    fig_regional_map.update_layout(margin={"r":0,"t":0,"l":0,"b":0})
-    st.plotly_chart(fig_regional_map, use_container_width=True)
-
-with main_col2:
-    state_filtered_data = df_regional
-    if selected_state != 'Semua State':
-        state_filtered_data = df_regional[df_regional['customer_state'] == selected_state]
-    
-    category_title = f"untuk {selected_category_regional} " if selected_category_regional != 'Semua Kategori' else ""
-    state_title = f"di {selected_state}" if selected_state != 'Semua State' else "di Semua Provinsi"
-
-    if map_metric_selection == "Customer Lateness Rate":
-        st.subheader("Lama Keterlambatan Pengiriman ke Pembeli")
-        late_data = state_filtered_data[~state_filtered_data['is_on_time']].copy()
-        if not late_data.empty:
-            bins = list(np.arange(0, 16, 3)) + [np.inf]
-            labels = [f"{i}-{i+3}" for i in np.arange(0, 15, 3)] + ["15+"]
-            late_data['lateness_bin'] = pd.cut(late_data['days_late'], bins=bins, labels=labels, right=False)
-            binned_counts = late_data['lateness_bin'].value_counts().sort_index().reset_index()
-            binned_counts.columns = ['lateness_bin', 'count']
-
-            total_late = binned_counts['count'].sum()
-            binned_counts['percentage'] = (binned_counts['count'] / total_late) * 100
-            binned_counts['text_label'] = binned_counts.apply(lambda row: f"{row['count']:,} ({row['percentage']:.1f}%)".replace(",", "."), axis=1)
-
-            fig_dist = px.bar(binned_counts, x='lateness_bin', y='count', text='text_label', title=f'Distribusi Keterlambatan Pelanggan {category_title}{state_title}')
-            fig_dist.update_layout(yaxis_title="Jumlah Pesanan Terlambat", xaxis_title='Rentang Hari Keterlambatan')
-            st.plotly_chart(fig_dist, use_container_width=True)
-        else:
-            st.info("Tidak ada data keterlambatan pelanggan pada kriteria ini.")
-    else:
-        st.subheader("Lama Keterlambatan Pengiriman ke Kurir")
-        late_data = state_filtered_data[~state_filtered_data['seller_dispatched_on_time']].copy()
-        if not late_data.empty:
-            bins = list(np.arange(0, 16, 3)) + [np.inf]
-            labels = [f"{i}-{i+3}" for i in np.arange(0, 15, 3)] + ["15+"]
-            late_data['lateness_bin'] = pd.cut(late_data['seller_dispatch_days_late'], bins=bins, labels=labels, right=False)
-            binned_counts = late_data['lateness_bin'].value_counts().sort_index().reset_index()
-            binned_counts.columns = ['lateness_bin', 'count']
-
-            total_late = binned_counts['count'].sum()
-            binned_counts['percentage'] = (binned_counts['count'] / total_late) * 100
-            binned_counts['text_label'] = binned_counts.apply(lambda row: f"{row['count']:,} ({row['percentage']:.1f}%)".replace(",", "."), axis=1)
-
-            fig_dist = px.bar(binned_counts, x='lateness_bin', y='count', text='text_label', title=f'Distribusi Keterlambatan Penjual {category_title}{state_title}')
-            fig_dist.update_layout(yaxis_title="Jumlah Pesanan Terlambat", xaxis_title='Rentang Hari Keterlambatan Penjual', xaxis={'categoryorder':'array', 'categoryarray': labels})
-            st.plotly_chart(fig_dist, use_container_width=True)
-        else:
-            st.info("Tidak ada data keterlambatan penjual pada kriteria ini.")
-
-st.markdown("Provinsi dengan tingkat pengiriman rendah secara langsung menurunkan performa rata-rata nasional. Perbaikan di area seperti ini perlu dilakukan.")
-st.markdown("Sangat mungkin juga bahwa keterlambatan yang terjadi merupakan keterlambatan yang sangat drastis, seperti keterlambatan lebih dari 15 hari.")
-
-df_analysis['order_processing_time'] = (df_analysis['order_approved_at'] - df_analysis['order_purchase_timestamp']).dt.total_seconds() / 3600
-df_analysis['seller_lead_time'] = (df_analysis['order_delivered_carrier_date'] - df_analysis['order_approved_at']).dt.total_seconds() / 3600
-df_analysis['shipping_time'] = (df_analysis['order_delivered_customer_date'] - df_analysis['order_delivered_carrier_date']).dt.total_seconds() / 3600
-
-df_time_filtered = df_analysis.copy()
-if selected_state != 'Semua State':
-    df_time_filtered = df_time_filtered[df_time_filtered['customer_state'] == selected_state]
-
-avg_processing = df_time_filtered['order_processing_time'].mean()
-avg_seller_lead = df_time_filtered['seller_lead_time'].mean()
-avg_shipping = df_time_filtered['shipping_time'].mean()
-
-labels = ['Order Processing', 'Seller to Carrier', 'Carrier to Customer']
-values = [avg_processing, avg_seller_lead, avg_shipping]
-percentages = [v / sum(values) * 100 for v in values]
-
-fig_avg = go.Figure(go.Bar(
-    x=labels,
-    y=values,
-    text=[f"{v:.1f} jam<br>({p:.1f}%)" for v, p in zip(values, percentages)],
-    textposition='auto',
-    marker_color=['#4e79a7', '#f28e2c', '#e15759']
-))
-
-st.subheader("Bottleneck Pengiriman Menghancurkan Pengalaman Pengguna")
-st.markdown("Kurir ke pelanggan menyumbang 73% waktu pengiriman. Seberapa cepat proses sebelumnya tidak akan berpengaruh jika pada akhirnya produk akan telat.")
-fig_avg.update_layout(
-    title=f"Rata-rata Breakdown Waktu Pengiriman ({selected_state})",
-    yaxis_title="Rata-rata Waktu (jam)",
-    xaxis_title="Proses"
-)
-st.plotly_chart(fig_avg, use_container_width=True)
-
-st.markdown("Untuk mengatasi masalah **ketidakmerataan keterlambatan secara regional**, strategi yang kami usulkan adalah bekerja sama dengan **mitra regional** serta memberikan **insentif** untuk kurir yang ingin mengantar ke daerah tersebut.")
-
-st.markdown("Untuk mengatasi masalah **keterlambatan sebanyak 15+ hari**, strategi yang kami usulkan mirip dengan sebelumnya, yaitu menggunakan **SLA** untuk **meningkatkan jaminan tepat waktu**.")
-
-st.markdown("Untuk mengatasi masalah waktu pengiriman **Carrier to Customer** yang lama, strategi yang kami usulkan adalah **penetapan SLA, penambahan *sorting hub* di setiap *state*, serta diversifikasi opsi kurir**.")
-
-st.header("Secara Diam-diam, Mahalnya Ongkir Membuat Pelanggan Tidak Senang")
-st.markdown("Ternyata, biaya pengiriman pada platform ini sangat tinggi dan berdampak negatif terhadap nilai ulasan pelanggan.")
-
-df_freight_analysis = df_master.dropna(subset=['freight_value', 'price', 'review_score', 'product_category_name_english'])
-
-col1, col2 = st.columns(2)
-
-with col1:
-    st.subheader("Median Rasio Ongkos Kirim Terhadap Harga Produk")
-    
-    median_freight_value = df_freight_analysis['freight_value'].median()
-    median_price_value = df_freight_analysis['price'].median()
-    
-    if median_price_value > 0:
-        median_freight_percentage = (median_freight_value / median_price_value) * 100
-    else:
-        median_freight_percentage = 0
-    value_str = f"{median_freight_percentage:.2f}%"
-    
-    st.markdown(f"""
-    <div style="text-align: center; padding-top: 20px;">
-        <p style="font-size: 64px; font-weight: bold;">{value_str}</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-with col2:
-    st.subheader("Skor Ulasan Rata-rata Menurun saat Ongkir Naik")
-    
-    bins = [0, 10, 20, 30, 45, float('inf')]
-    labels = ["0-10", "10-20", "20-30", "30-45", "45+"]
-    df_freight_analysis['freight_bin'] = pd.cut(df_freight_analysis['freight_value'], bins=bins, labels=labels, right=False)
-    
-    review_by_freight = df_freight_analysis.groupby('freight_bin')['review_score'].mean().reset_index().dropna()
-    fig_review_freight = px.bar(
-        review_by_freight, 
-        x='freight_bin', 
-        y='review_score',
-        text=review_by_freight['review_score'].round(2),
-        title="Pengaruh Ongkos Kirim terhadap Skor Ulasan",
-        labels={'freight_bin': 'Kelompok Ongkos Kirim (R$)', 'review_score': 'Skor Ulasan Rata-rata'},
-        color_discrete_sequence=['#d62728'],
-        template=PLOTLY_TEMPLATE
-    )
-    fig_review_freight.update_layout(yaxis=dict(range=[3.5, 5]))
-    st.plotly_chart(fig_review_freight, use_container_width=True)
-
-st.markdown("Untuk mengatasi masalah ini, strategi yang kami usulkan adalah **memberikan promosi** untuk pesanan dengan harga ongkir tinggi serta **negosiasi biaya** dengan kurir untuk menekan biaya.")
+@profiler.section("Konversi Lead")
+def leads_section(pipe):
+    proportions = pipe["lead_type_proportions"]
+    # Deals are windowed by won date; a range before the first won deal has no leads to show.
+    if proportions.empty:
+        st.info("Tidak ada penjual yang diakuisisi pada rentang tanggal ini.")
+        return
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        show_figure("fig_leads")
+    with col2:
+        pct = proportions.get('Online Medium', 0)
+        pct_str = f'{pct:.1%}'.replace('.', ',')
+        st.subheader('Penjual "Online Medium" sebagai Kunci Pertumbuhan')
+        st.write(f"Dengan **39% penjual** yang berhasil diakuisisi berada di segmen 'Online Medium', strategi pemasaran harus fokus pada aktivasi & akselerasi mereka. Insentif yang tepat dan kampanye pertumbuhan dapat membuka potensi pendapatan yang signifikan dari segmen ini.")
+    st.header("Prioritaskan Channel dengan Konversi Cepat untuk Percepatan Akuisisi")
+    st.markdown("Display dan direct traffic terbukti menghasilkan seller lebih cepat. Mengalihkan fokus dan anggaran ke channel berkonversi cepat akan memperpendek siklus akuisisi dan mempercepat pertumbuhan *seller* berkualitas.")
+    show_figure("fig_conversion")
 
+st.title("Scalability Through Continuity")
+st.markdown("Team: Astutea - SSDC2025006")
+st.markdown(" E-Commerce telah mencapai skala yang besar dalam waktu yang pesat, dengan hampir 100.000 pesanan dan 96.000 pelanggan dalam 2 tahun. Namun, pertumbuhan pendapatan menunjukkan **tanda-tanda stagnasi** dan perusahaan masih memiliki banyak **permasalahan dalam segi kualitas pengiriman, relevansi produk, serta kerataan penjual**. *Dashboard* ini mengungkap area strategis yang harus diperbaiki untuk mendorong pertumbuhan berkelanjutan. Fokus pembahasan diarahkan pada **memahami preferensi pelanggan dan inventori, optimasi logistik, dan pertumbuhan pasar yang akurat**. Diharapkan agar strategi yang diusulkan pada *dashboard* ini dapat menjadi perintis dalam memutarkan kembali roda pertumbuhan perusahaan.")
 st.markdown("---")
 
-st.header("Apa yang Dapat Kita Lakukan untuk Memperluas Pasar Kita?")
-
-col1, col2 = st.columns(2)
-
-with col1:
-    st.subheader("Top 10 Kategori Produk Berdasarkan Jumlah Pesanan")
-    
-    df_popular = df_master.dropna(subset=['product_category_name_english'])
-    top_cats_data = df_popular['product_category_name_english'].value_counts().head(10).reset_index()
-    top_cats_data.columns = ['Kategori', 'Jumlah Pesanan']
-    
-    fig_top_cats = px.bar(
-        top_cats_data,
-        x='Jumlah Pesanan',
-        y='Kategori',
-        text='Jumlah Pesanan',
-        orientation='h',
-        color_discrete_sequence=[THEME_COLOR],
-        template=PLOTLY_TEMPLATE
-    )
-    fig_top_cats.update_layout(
-        yaxis={'categoryorder':'total ascending'},
-        height=450,
-        yaxis_title="Kategori Produk",
-        xaxis_title="Jumlah Pesanan"
-    )
-    st.plotly_chart(fig_top_cats, use_container_width=True)
-
-with col2:
-    st.subheader("Top 10 Segmen Bisnis Penjual")
+statistics_section(pipe)
 
-    deals_with_state = deals.merge(
-        sellers[['seller_id', 'seller_state']], on='seller_id', how='left'
-    )
-    
-    deals_with_state['business_segment_formatted'] = deals_with_state['business_segment'].dropna().apply(format_snake_case)
-    
-    top_segments = (
-        deals_with_state['business_segment_formatted']
-        .value_counts()
-        .head(10)
-        .reset_index()
-    )
-    top_segments.columns = ['Business Segment', 'Jumlah Seller']
-    
-    fig_top_segments = px.bar(
-        top_segments,
-        x='Jumlah Seller',
-        y='Business Segment',
-        text='Jumlah Seller',
-        orientation='h',
-        color_discrete_sequence=[THEME_COLOR],
-        template=PLOTLY_TEMPLATE
-    )
-    fig_top_segments.update_layout(
-        yaxis={'categoryorder': 'total ascending'},
-        height=450,
-        yaxis_title="Segmen Bisnis",
-        xaxis_title="Jumlah Seller Terakuisisi"
-    )
-    st.plotly_chart(fig_top_segments, use_container_width=True)
+st.markdown("---")
 
-st.subheader("Kesempatan dalam Kesenjangan")
-st.markdown("Grafik di atas menunjukkan **kita 10 kategori produk yang paling sering dipesan serta 10 segmen bisnis penjual yang terpopuler**. Dapat dilihat bahwa beberapa kategori produk memiliki **jumlah pesanan yang sangat besar**, namun **tidak ada segmen bisnis** yang sesuai untuk kategori produk tersebut (Bed Bath Table, Sports Leisure, dan Watches Gifts). Ini menunjukkan bahwa ada *demand* terhadap kategori tersebut sehingga strategi yang dapat diambil adalah **memfokuskan pencarian penjual yang bergerak di segmen bisnis yang populer, namun sepi penjual**.")
+st.header("Bagaimana Kondisi Perusahaan Saat Ini?")
+st.markdown("Agar mengetahui langkah yang dapat diambil agar perusahaan tetap tumbuh, perlu diketahui terlebih dahulu kondisi *e-commerce* saat ini, seperti **analisis pengalaman pengguna** serta **efisiensi operasional perusahaan**.")
 
-st.markdown("---")
-counts = deals['lead_type'].value_counts().sort_values()
-proportions = counts / counts.sum()
-fig_leads = px.bar(x=proportions.values, y=proportions.index, orientation='h', labels={'x': 'Persentase Prospek', 'y': 'Tipe Prospek'}, title='Distribusi Tipe Prospek Penjual yang Berhasil Diakuisisi', color_discrete_sequence=[THEME_COLOR], template=PLOTLY_TEMPLATE)
-fig_leads.update_traces(text=[f'{p:.1%}' for p in proportions.values], textposition='auto')
-fig_leads.update_layout(xaxis_tickformat='.1%')
-col1, col2 = st.columns([2, 1])
-with col1:
-    st.plotly_chart(fig_leads, use_container_width=True)
-with col2:
-    pct = proportions.get('Online Medium', 0)
-    pct_str = f'{pct:.1%}'.replace('.', ',')
-    st.subheader('Penjual "Online Medium" sebagai Kunci Pertumbuhan')
-    st.write(f"Dengan **39% penjual** yang berhasil diakuisisi berada di segmen 'Online Medium', strategi pemasaran harus fokus pada aktivasi & akselerasi mereka. Insentif yang tepat dan kampanye pertumbuhan dapat membuka potensi pendapatan yang signifikan dari segmen ini.")
-st.header("Prioritaskan Channel dengan Konversi Cepat untuk Percepatan Akuisisi")
-st.markdown("Display dan direct traffic terbukti menghasilkan seller lebih cepat. Mengalihkan fokus dan anggaran ke channel berkonversi cepat akan memperpendek siklus akuisisi dan mempercepat pertumbuhan *seller* berkualitas.")
-df = pd.merge(deals, leads[['mql_id', 'first_contact_date', 'origin']], on='mql_id', how='left')
-df['conversion_days'] = (df['won_date'] - df['first_contact_date']).dt.days
-avg_conversion = df.groupby('origin')['conversion_days'].mean().sort_values(ascending=False).reset_index()
-
-fig = px.bar(
-    avg_conversion,
-    x='conversion_days', y='origin',
-    orientation='h',
-    color='conversion_days',
-    color_continuous_scale='blues',
-    labels={'conversion_days': 'Rata-rata Hari Konversi', 'origin': 'Channel (Origin)'},
-    title='Rata-rata Waktu Konversi Lead Menjadi Seller per Channel (Origin)',
-    template=PLOTLY_TEMPLATE
+# Only the selected tab runs; the others render when first opened.
+reviews_tab, cohort_tab, delivery_tab, freight_tab, market_tab = st.tabs(
+    ["Ulasan Pelanggan", "Retensi Pelanggan", "Pengiriman", "Ongkos Kirim", "Pasar & Akuisisi Penjual"],
+    key="section_tab",
+    on_change="rerun"
 )
-fig.update_traces(text=avg_conversion['conversion_days'].round(1), textposition='outside')
-fig.update_layout(coloraxis_showscale=False)
-st.plotly_chart(fig, use_container_width=True)
+with reviews_tab:
+    if reviews_tab.open:
+        ratings_section(pipe)
+        complaints_section(pipe)
+        st.markdown("---")
+        review_search_section(pipe)
+with cohort_tab:
+    if cohort_tab.open:
+        cohort_section(pipe)
+with delivery_tab:
+    if delivery_tab.open:
+        delivery_section(pipe)
+        st.markdown("---")
+        regional_section(pipe)
+        st.markdown("---")
+        seller_section(pipe)
+with freight_tab:
+    if freight_tab.open:
+        freight_section(pipe)
+with market_tab:
+    if market_tab.open:
+        market_section(pipe)
+        st.markdown("---")
+        leads_section(pipe)
 
 st.markdown("---")
 st.header("Apa yang Dapat Kita Simpulkan?")
@@ -621,4 +565,25 @@ st.markdown("---")
 
 st.header("***~~ Close Gaps, Scale Faster, Continue Stronger ~~***")
 
-st.markdown("---")
\ No newline at end of file
+st.markdown("---")
+
+if DEBUG:
+    history = st.session_state.get("profile_history", [])
+    with st.sidebar.expander("Profil Performa", expanded=True):
+        st.dataframe(pd.DataFrame(profiler.records, columns=profiling.FIELDS).set_index("section").drop(columns="run"))
+        st.download_button("Unduh JSON", profiling.to_json(history), file_name="profile.json", mime="application/json")
+        st.download_button("Unduh CSV", profiling.to_csv(history), file_name="profile.csv", mime="text/csv")
+    with st.sidebar.expander("Waktu Muat Tabel"):
+        st.dataframe(pd.Series(pipe.load_timings, name="detik").rename_axis("tabel"))
+    with st.sidebar.expander("Figure cache"):
+        st.json(figure_store.stats())
+    with st.sidebar.expander("Backend"):
+        st.write(f"Backend aktif: **{pipe.backend}**")
+        if st.checkbox("Bandingkan pandas dan DuckDB"):
+            # Rebuilds each figure on screen, with its current widget values, on both backends.
+            pipes = {backend: windowed(get_pipeline(pipe.snapshot_id, backend, pipe.seed_version), pipe.period) for backend in sql_pipeline.BACKENDS}
+            comparison = pd.DataFrame([
+                {"figure": name, "identik": sql_pipeline.same_figure(figures.FIGURES[name](pipes["pandas"], **widgets), figures.FIGURES[name](pipes["duckdb"], **widgets))}
+                for name, widgets in st.session_state.get("shown_figures", {}).items()
+            ])
+            st.dataframe(comparison, hide_index=True)
@@ -0,0 +1,82 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ID_DOMAINS = {
+    "order": [("payments", "order_id"), ("orders", "order_id"), ("order_items", "order_id"), ("reviews", "order_id")],
+    "customer": [("customers", "customer_id"), ("orders", "customer_id")],
+    "customer_unique": [("customers", "customer_unique_id")],
+    "product": [("products", "product_id"), ("order_items", "product_id")],
+    "seller": [("sellers", "seller_id"), ("order_items", "seller_id"), ("deals", "seller_id")],
+    "review": [("reviews", "review_id")],
+    "mql": [("deals", "mql_id"), ("leads", "mql_id")],
+    "sdr": [("deals", "sdr_id")],
+    "sr": [("deals", "sr_id")],
+    "landing_page": [("leads", "landing_page_id")],
+}
+
+CATEGORY_COLUMNS = {
+    "orders": ["order_status"],
+    "customers": ["customer_state"],
+    "sellers": ["seller_state"],
+    "products": ["product_category_name"],
+    "cat_trans": ["product_category_name"],
+    "payments": ["payment_type"],
+    "leads": ["origin"],
+    "deals": ["lead_type", "business_segment"],
+}
+
+MISSING_CODE = -1
+
+
+def memory_usage(tables):
+    return {name: int(df.memory_usage(deep=True).sum()) for name, df in tables.items()}
+
+
+def build_vocabularies(tables):
+    vocabularies = {}
+    for domain, columns in ID_DOMAINS.items():
+        values = [tables[name][column].dropna().unique() for name, column in columns if name in tables]
+        vocabularies[domain] = pd.Index(np.sort(pd.unique(np.concatenate(values).astype(object))), name=domain)
+    return vocabularies
+
+
+def encode_ids(series, vocabulary):
+    # Missing ids get MISSING_CODE so they still match each other in merges, like NaN keys do.
+    return pd.Series(vocabulary.get_indexer(series).astype(np.int32), index=series.index, name=series.name)
+
+
+def decode_ids(codes, vocabulary):
+    codes = np.asarray(codes)
+    values = vocabulary.to_numpy()[np.where(codes >= 0, codes, 0)]
+    return pd.Series(np.where(codes >= 0, values, None), name=vocabulary.name)
+
+
+def encode_tables(tables):
+    before = memory_usage(tables)
+    tables = dict(tables)
+    vocabularies = build_vocabularies(tables)
+    for domain, columns in ID_DOMAINS.items():
+        for name, column in columns:
+            if name in tables:
+                tables[name] = tables[name].assign(**{column: encode_ids(tables[name][column], vocabularies[domain])})
+
+    # Columns with the same name share one category set so merges on them stay categorical.
+    shared = {}
+    for name, columns in CATEGORY_COLUMNS.items():
+        for column in columns:
+            if name in tables:
+                shared.setdefault(column, []).append(tables[name][column].dropna().unique())
+    for name, columns in CATEGORY_COLUMNS.items():
+        for column in columns:
+            if name in tables:
+                categories = np.sort(pd.unique(np.concatenate(shared[column]).astype(object)))
+                tables[name] = tables[name].assign(**{column: pd.Categorical(tables[name][column], categories=categories)})
+
+    after = memory_usage(tables)
+    report = {name: {"before": before[name], "after": after[name]} for name in tables}
+    logger.info("id/category encoding: %.1f MB -> %.1f MB", sum(before.values()) / 1e6, sum(after.values()) / 1e6)
+    return tables, vocabularies, report
@@ -0,0 +1,59 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import figures
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = int(os.environ.get("ECOMMERCE_FIGURE_CACHE_SIZE", "256"))
+
+
+class FigureCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pipe, name, **widgets):
+        return self.get_sized(pipe, name, **widgets)[0]
+
+    def get_sized(self, pipe, name, **widgets):
+        # Entries are (figure, serialized bytes): the size is measured once per build, not on every hit.
+        key = (name, tuple(sorted(widgets.items())), pipe.snapshot_id, pipe.backend, pipe.seed_version, pipe.period)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        fig = figures.FIGURES[name](pipe, **widgets)
+        entry = fig, 0 if fig is None else len(fig.to_json().encode("utf-8"))
+        logger.debug("figure cache miss %s %s", name, widgets)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,289 @@
+import plotly.express as px
+import plotly.graph_objects as go
+
+import cohort
+import cube
+import geo
+import views
+
+THEME_COLOR = "royalblue"
+PLOTLY_TEMPLATE = "plotly_white"
+
+FIGURES = {}
+
+
+def figure(fn):
+    FIGURES[fn.__name__] = fn
+    return fn
+
+
+def count_labels(counts):
+    percentage = counts['count'] / counts['count'].sum() * 100
+    return [f"{count:,} ({p:.1f}%)".replace(",", ".") for count, p in zip(counts['count'], percentage)]
+
+
+@figure
+def fig_revenue(pipe):
+    monthly_revenue = pipe["monthly_revenue"]
+    fig = px.area(monthly_revenue, x='month', y='payment_value', title="Sudah 9 Bulan Tanpa Rekor Baru Pendapatan (Terakhir Nov 2017)", labels={'month': 'Bulan', 'payment_value': 'Total Pendapatan (R$)'}, color_discrete_sequence=[THEME_COLOR], template=PLOTLY_TEMPLATE)
+    fig.update_layout(height=450)
+    return fig
+
+
+@figure
+def fig_top(pipe, min_reviews):
+    category_quality = pipe["category_quality"]
+    top_categories = category_quality[category_quality['review_count'] >= min_reviews].nlargest(5, 'average_score')
+    fig_top = px.bar(top_categories, x='average_score', y='product_category_name_english', orientation='h', text=top_categories['average_score'].apply(lambda x: f'{x:.2f}'), color_discrete_sequence=['#2ca02c'], template=PLOTLY_TEMPLATE)
+    fig_top.update_layout(yaxis={'categoryorder':'total ascending'}, xaxis_title="Skor Rata-rata", yaxis_title=None, xaxis=dict(range=[1,5]))
+    return fig_top
+
+
+@figure
+def fig_bottom(pipe, min_reviews):
+    category_quality = pipe["category_quality"]
+    bottom_categories = category_quality[category_quality['review_count'] >= min_reviews].nsmallest(5, 'average_score')
+    fig_bottom = px.bar(bottom_categories, x='average_score', y='product_category_name_english', orientation='h', text=bottom_categories['average_score'].apply(lambda x: f'{x:.2f}'), color_discrete_sequence=['#d62728'], template=PLOTLY_TEMPLATE)
+    fig_bottom.update_layout(yaxis={'categoryorder':'total descending'}, xaxis_title="Skor Rata-rata", yaxis_title=None, xaxis=dict(range=[1,5]))
+    return fig_bottom
+
+
+def low_score_reviews_for(pipe, category, columns=None, complaint=None, limit=None):
+    return views.select(
+        pipe["low_score_reviews"],
+        pipe["low_score_review_rows"],
+        columns,
+        limit,
+        product_category_name_english=category if category != 'Semua Kategori' else None,
+        complaint_category=complaint,
+    )
+
+
+# Builders return None when the filter leaves nothing to plot; the caller shows a notice instead.
+@figure
+def fig_complaints(pipe, category):
+    low_score_reviews = low_score_reviews_for(pipe, category, ['complaint_category'])
+    if low_score_reviews.empty:
+        return None
+    category_counts = low_score_reviews['complaint_category'].value_counts().reset_index()
+    category_counts['text_label'] = count_labels(category_counts)
+    fig_complaints = px.bar(
+        category_counts,
+        x='count',
+        y='complaint_category',
+        orientation='h',
+        text='text_label',
+        color_discrete_sequence=[THEME_COLOR],
+        template=PLOTLY_TEMPLATE
+    )
+    fig_complaints.update_layout(
+        yaxis={'categoryorder':'total ascending'},
+        xaxis_title="Jumlah Ulasan Negatif",
+        yaxis_title="Kategori Keluhan"
+    )
+    return fig_complaints
+
+
+@figure
+def fig_performance_trend(pipe):
+    fig_performance_trend = px.line(
+        pipe["monthly_performance"],
+        x='month',
+        y='late_rate',
+        markers=True,
+        title="Tren Tingkat Keterlambatan Pengiriman ke Pelanggan"
+    )
+    fig_performance_trend.update_layout(
+        yaxis_title="Tingkat Keterlambatan (%)",
+        xaxis_title="Bulan",
+        yaxis=dict(range=[0, 30])
+    )
+    return fig_performance_trend
+
+
+def regional_cube(pipe, category, state='Semua State'):
+    return views.select(
+        pipe["lateness_cube"],
+        pipe["lateness_cube_rows"],
+        customer_state=state if state != 'Semua State' else None,
+        product_category_name_english=category if category != 'Semua Kategori' else None,
+    )
+
+
+@figure
+def fig_regional_map(pipe, metric, category):
+    if metric == "Customer Lateness Rate":
+        metric_by_state = cube.late_rate_by(regional_cube(pipe, category), 'customer_state', 'customer').reset_index(name='metric_value')
+        map_title = "Customer Lateness Rate (%)"
+    else:
+        metric_by_state = cube.late_rate_by(regional_cube(pipe, category), 'customer_state', 'seller').reset_index(name='metric_value')
+        map_title = "Seller Late Dispatch Rate (%)"
+    fig_regional_map = px.choropleth(
+        metric_by_state,
+        geojson=geo.load_geojson(),
+        locations='customer_state',
+        featureidkey='properties.sigla',
+        color='metric_value',
+        color_continuous_scale="RdYlGn_r",
+        range_color=(0, 30),
+        scope="south america",
+        labels={'metric_value': map_title}
+    )
+    fig_regional_map.update_geos(fitbounds="locations", visible=False)
+    fig_regional_map.update_layout(margin={"r":0,"t":0,"l":0,"b":0})
+    return fig_regional_map
+
+
+@figure
+def fig_dist(pipe, metric, category, state):
+    category_title = f"untuk {category} " if category != 'Semua Kategori' else ""
+    state_title = f"di {state}" if state != 'Semua State' else "di Semua Provinsi"
+    prefix = "customer" if metric == "Customer Lateness Rate" else "seller"
+    binned_counts = cube.lateness_histogram(regional_cube(pipe, category, state), prefix)
+    if binned_counts['count'].sum() == 0:
+        return None
+    binned_counts['text_label'] = count_labels(binned_counts)
+    if prefix == "customer":
+        fig_dist = px.bar(binned_counts, x='lateness_bin', y='count', text='text_label', title=f'Distribusi Keterlambatan Pelanggan {category_title}{state_title}')
+        fig_dist.update_layout(yaxis_title="Jumlah Pesanan Terlambat", xaxis_title='Rentang Hari Keterlambatan')
+    else:
+        fig_dist = px.bar(binned_counts, x='lateness_bin', y='count', text='text_label', title=f'Distribusi Keterlambatan Penjual {category_title}{state_title}')
+        fig_dist.update_layout(yaxis_title="Jumlah Pesanan Terlambat", xaxis_title='Rentang Hari Keterlambatan Penjual', xaxis={'categoryorder':'array', 'categoryarray': cube.LATENESS_LABELS})
+    return fig_dist
+
+
+@figure
+def fig_avg(pipe, state):
+    if state != 'Semua State':
+        lead_times = pipe["lead_times_by_state"].loc[state]
+    else:
+        lead_times = pipe["delivery_summary"]
+    labels = ['Order Processing', 'Seller to Carrier', 'Carrier to Customer']
+    values = [lead_times['order_processing_time'], lead_times['seller_lead_time'], lead_times['shipping_time']]
+    percentages = [v / sum(values) * 100 for v in values]
+    fig_avg = go.Figure(go.Bar(
+        x=labels,
+        y=values,
+        text=[f"{v:.1f} jam<br>({p:.1f}%)" for v, p in zip(values, percentages)],
+        textposition='auto',
+        marker_color=['#4e79a7', '#f28e2c', '#e15759']
+    ))
+    fig_avg.update_layout(
+        title=f"Rata-rata Breakdown Waktu Pengiriman ({state})",
+        yaxis_title="Rata-rata Waktu (jam)",
+        xaxis_title="Proses"
+    )
+    return fig_avg
+
+
+@figure
+def fig_review_freight(pipe):
+    review_by_freight = pipe["review_by_freight"]
+    fig_review_freight = px.bar(
+        review_by_freight,
+        x='freight_bin',
+        y='review_score',
+        text=review_by_freight['review_score'].round(2),
+        title="Pengaruh Ongkos Kirim terhadap Skor Ulasan",
+        labels={'freight_bin': 'Kelompok Ongkos Kirim (R$)', 'review_score': 'Skor Ulasan Rata-rata'},
+        color_discrete_sequence=['#d62728'],
+        template=PLOTLY_TEMPLATE
+    )
+    fig_review_freight.update_layout(yaxis=dict(range=[3.5, 5]))
+    return fig_review_freight
+
+
+@figure
+def fig_top_cats(pipe):
+    fig_top_cats = px.bar(
+        pipe["top_categories"],
+        x='Jumlah Pesanan',
+        y='Kategori',
+        text='Jumlah Pesanan',
+        orientation='h',
+        color_discrete_sequence=[THEME_COLOR],
+        template=PLOTLY_TEMPLATE
+    )
+    fig_top_cats.update_layout(
+        yaxis={'categoryorder':'total ascending'},
+        height=450,
+        yaxis_title="Kategori Produk",
+        xaxis_title="Jumlah Pesanan"
+    )
+    return fig_top_cats
+
+
+@figure
+def fig_top_segments(pipe):
+    # Deals are windowed by won date, so a date range can hold none of them.
+    if pipe["top_segments"].empty:
+        return None
+    fig_top_segments = px.bar(
+        pipe["top_segments"],
+        x='Jumlah Seller',
+        y='Business Segment',
+        text='Jumlah Seller',
+        orientation='h',
+        color_discrete_sequence=[THEME_COLOR],
+        template=PLOTLY_TEMPLATE
+    )
+    fig_top_segments.update_layout(
+        yaxis={'categoryorder': 'total ascending'},
+        height=450,
+        yaxis_title="Segmen Bisnis",
+        xaxis_title="Jumlah Seller Terakuisisi"
+    )
+    return fig_top_segments
+
+
+@figure
+def fig_leads(pipe):
+    proportions = pipe["lead_type_proportions"]
+    if proportions.empty:
+        return None
+    fig_leads = px.bar(x=proportions.values, y=proportions.index, orientation='h', labels={'x': 'Persentase Prospek', 'y': 'Tipe Prospek'}, title='Distribusi Tipe Prospek Penjual yang Berhasil Diakuisisi', color_discrete_sequence=[THEME_COLOR], template=PLOTLY_TEMPLATE)
+    fig_leads.update_traces(text=[f'{p:.1%}' for p in proportions.values], textposition='auto')
+    fig_leads.update_layout(xaxis_tickformat='.1%')
+    return fig_leads
+
+
+@figure
+def fig_conversion(pipe):
+    avg_conversion = pipe["avg_conversion"]
+    if avg_conversion.empty:
+        return None
+    fig = px.bar(
+        avg_conversion,
+        x='conversion_days', y='origin',
+        orientation='h',
+        color='conversion_days',
+        color_continuous_scale='blues',
+        labels={'conversion_days': 'Rata-rata Hari Konversi', 'origin': 'Channel (Origin)'},
+        title='Rata-rata Waktu Konversi Lead Menjadi Seller per Channel (Origin)',
+        template=PLOTLY_TEMPLATE
+    )
+    fig.update_traces(text=avg_conversion['conversion_days'].round(1), textposition='outside')
+    fig.update_layout(coloraxis_showscale=False)
+    return fig
+
+
+@figure
+def fig_cohort(pipe, measure, state, category):
+    cells = cohort.slice_cohorts(pipe["cohort_matrix"], pipe["cohort_matrix_rows"], state, category)
+    # Month 0 is the first purchase itself (retention 100%); its size goes in the row label instead.
+    grid = cohort.cohort_grid(cells, measure).drop(columns=0, errors='ignore')
+    if grid.empty:
+        return None
+    sizes = cohort.cohort_sizes(cells)
+    grid.index = [f"{month:%Y-%m} (n={sizes[month]:,})".replace(",", ".") for month in grid.index]
+    fig_cohort = px.imshow(
+        grid,
+        text_auto='.1f' if measure in ("retention", "revenue") else True,
+        aspect='auto',
+        color_continuous_scale='blues',
+        labels={'x': 'Bulan Sejak Pembelian Pertama', 'y': 'Kohort (Bulan Pembelian Pertama)', 'color': cohort.MEASURES[measure]},
+        template=PLOTLY_TEMPLATE
+    )
+    fig_cohort.update_xaxes(side='top', dtick=1)
+    fig_cohort.update_layout(height=max(450, 22 * len(grid)))
+    return fig_cohort
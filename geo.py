@@ -0,0 +1,170 @@
+import argparse
+import functools
+import json
+import logging
+import os
+import urllib.request
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GEOJSON_URL = "https://raw.githubusercontent.com/codeforgermany/click_that_hood/main/public/data/brazil-states.geojson"
+GEOJSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "brazil-states.geojson")
+# Douglas-Peucker tolerance and coordinate rounding, both in degrees (0.01 deg is roughly 1 km).
+TOLERANCE = float(os.environ.get("ECOMMERCE_GEOJSON_TOLERANCE", "0.01"))
+PRECISION = int(os.environ.get("ECOMMERCE_GEOJSON_PRECISION", "3"))
+
+
+def download_geojson(url=GEOJSON_URL):
+    with urllib.request.urlopen(url) as response:
+        return json.load(response)
+
+
+def fetch_geojson(url=GEOJSON_URL, path=GEOJSON_PATH, tolerance=TOLERANCE, precision=PRECISION):
+    # Simplified once here and committed, so the page only reads the small file from disk.
+    geojson = simplify_geojson(download_geojson(url), tolerance, precision)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(geojson, f, separators=(",", ":"))
+    return path
+
+
+def _douglas_peucker(points, tolerance):
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        inner = points[start + 1:end]
+        dx, dy = b - a
+        norm = np.hypot(dx, dy)
+        if norm == 0:
+            distance = np.hypot(inner[:, 0] - a[0], inner[:, 1] - a[1])
+        else:
+            distance = np.abs(dx * (inner[:, 1] - a[1]) - dy * (inner[:, 0] - a[0])) / norm
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            keep[start + 1 + i] = True
+            stack.append((start, start + 1 + i))
+            stack.append((start + 1 + i, end))
+    return keep
+
+
+def _polygons(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def simplify_geojson(geojson, tolerance=TOLERANCE, precision=PRECISION):
+    # Topology-preserving simplification: rings are cut into arcs at junctions (vertices where the set of
+    # rings sharing a border changes), and every arc is simplified once, so neighbouring states keep
+    # identical borders instead of developing gaps and overlaps.
+    rings = [[tuple(point) for point in ring[:-1]] for feature in geojson["features"]
+             for polygon in _polygons(feature["geometry"]) for ring in polygon]
+    owners = {}
+    for ring_id, ring in enumerate(rings):
+        for point in ring:
+            owners.setdefault(point, set()).add(ring_id)
+
+    arc_cache = {}
+
+    def simplify_arc(arc):
+        reverse = arc[::-1]
+        key = min(arc, reverse)
+        if key not in arc_cache:
+            points = np.array(key)
+            arc_cache[key] = [key[i] for i in np.flatnonzero(_douglas_peucker(points, tolerance))]
+        return arc_cache[key] if key == arc else arc_cache[key][::-1]
+
+    def join_arcs(ring, junctions, keep_own):
+        # Arcs run junction to junction; keep_own leaves the arcs no other ring shares at full detail.
+        n = len(ring)
+        joined = [ring[junctions[0]]]
+        for start, end in zip(junctions, junctions[1:] + [junctions[0] + n]):
+            arc = tuple(ring[i % n] for i in range(start, end + 1))
+            own = len(arc) > 2 and len(owners[arc[1]]) == 1
+            joined.extend(arc[1:] if keep_own and own else simplify_arc(arc)[1:])
+        return joined
+
+    def finish(points):
+        rounded = [[round(x, precision), round(y, precision)] for x, y in points]
+        return [point for i, point in enumerate(rounded) if i == 0 or point != rounded[i - 1]]
+
+    def simplify_ring(ring):
+        n = len(ring)
+        junctions = [i for i in range(n) if len(owners[ring[i]]) > 1 and (
+            owners[ring[i]] != owners[ring[i - 1]] or owners[ring[i]] != owners[ring[(i + 1) % n]])]
+        if not junctions:
+            # Start closed rings at their smallest vertex so an island and the hole it fills produce the same arc.
+            start = ring.index(min(ring))
+            ring = ring[start:] + ring[:start]
+            simplified = finish(simplify_arc(tuple(ring + ring[:1])))
+            # A ring too small to survive keeps its detail; a hole it fills collapses and falls back alike.
+            return simplified if len(simplified) >= 4 else finish(ring + ring[:1])
+        simplified = finish(join_arcs(ring, junctions, keep_own=False))
+        if len(simplified) < 4:
+            # Too small once simplified: only this ring's own arcs get their detail back, so the borders it
+            # shares stay exactly as its neighbours draw them.
+            simplified = finish(join_arcs(ring, junctions, keep_own=True))
+        return simplified
+
+    features = []
+    for feature in geojson["features"]:
+        geometry = feature["geometry"]
+        polygons = [[simplify_ring([tuple(point) for point in ring[:-1]]) for ring in polygon] for polygon in _polygons(geometry)]
+        coordinates = polygons[0] if geometry["type"] == "Polygon" else polygons
+        features.append(dict(feature, geometry={"type": geometry["type"], "coordinates": coordinates}))
+    return dict(geojson, features=features)
+
+
+# One copy per process, shared by every session and rerun.
+@functools.lru_cache(maxsize=None)
+def load_geojson(path=GEOJSON_PATH):
+    if not os.path.exists(path):
+        logger.warning("%s is missing, falling back to %s (run 'python geo.py fetch')", path, GEOJSON_URL)
+        return GEOJSON_URL
+    with open(path) as f:
+        return json.load(f)
+
+
+def vertex_count(geojson):
+    return sum(len(ring) for feature in geojson["features"] for polygon in _polygons(feature["geometry"]) for ring in polygon)
+
+
+def figure_payload_bytes(fig):
+    return len(fig.to_json().encode("utf-8"))
+
+
+def measure(url=GEOJSON_URL, tolerance=TOLERANCE, precision=PRECISION):
+    import pandas as pd
+    import plotly.express as px
+
+    original = download_geojson(url)
+    simplified = simplify_geojson(original, tolerance, precision)
+    states = [feature["properties"]["sigla"] for feature in original["features"]]
+    data = pd.DataFrame({"customer_state": states, "metric_value": np.linspace(0, 30, len(states))})
+    result = {}
+    for name, geojson in [("original", original), ("simplified", simplified)]:
+        fig = px.choropleth(data, geojson=geojson, locations='customer_state', featureidkey='properties.sigla', color='metric_value')
+        result[name] = {"vertices": vertex_count(geojson), "geojson_bytes": len(json.dumps(geojson, separators=(",", ":"))), "figure_bytes": figure_payload_bytes(fig)}
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the bundled Brazil states GeoJSON.")
+    parser.add_argument("command", choices=["fetch", "measure"])
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--precision", type=int, default=PRECISION)
+    args = parser.parse_args()
+    if args.command == "fetch":
+        print(fetch_geojson(tolerance=args.tolerance, precision=args.precision))
+    else:
+        for name, sizes in measure(tolerance=args.tolerance, precision=args.precision).items():
+            print(f"{name:<11} {sizes['vertices']:>8} vertices {sizes['geojson_bytes'] / 1e3:>9.1f} kB geojson {sizes['figure_bytes'] / 1e3:>9.1f} kB figure")
@@ -0,0 +1,274 @@
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import pandas as pd
+
+import pipeline
+import snapshot
+import streaming
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR = os.environ.get("ECOMMERCE_INCREMENTAL_DIR", ".incremental")
+STATE = "state.json"
+# A batch writes everything here first and moves it under months/ only once the whole batch succeeded.
+STAGING = "staging"
+UNKNOWN_MONTH = "unknown"
+# Natural keys: a row re-sent in a later batch replaces the stored one.
+ROW_KEYS = {
+    "orders": ['order_id'],
+    "order_items": ['order_id', 'order_item_id'],
+    "payments": ['order_id', 'payment_sequential'],
+    "reviews": ['review_id', 'order_id'],
+}
+CUSTOMER_COLUMNS = ['customer_id', 'customer_unique_id', 'customer_state']
+CUSTOMERS = "customers.arrow"
+
+
+def read_state(state_dir=STATE_DIR):
+    try:
+        with open(os.path.join(state_dir, STATE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_state(state_dir, state):
+    tmp_path = os.path.join(state_dir, STATE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, os.path.join(state_dir, STATE))
+
+
+def month_key(timestamps):
+    return pipeline.to_month(timestamps).dt.strftime('%Y-%m').fillna(UNKNOWN_MONTH)
+
+
+def _read(path, template):
+    return pd.read_feather(path) if os.path.exists(path) else pd.read_feather(template)
+
+
+def _read_batch(batch_dir, name, chunk_rows):
+    if not os.path.exists(os.path.join(batch_dir, snapshot.TABLES[name]["file"])):
+        return []
+    return streaming.read_chunks(batch_dir, name, chunk_rows)
+
+
+def _write_pieces(staging_dir, name, df, months, tag):
+    for month, piece in df.groupby(months):
+        month_dir = os.path.join(staging_dir, "months", month)
+        os.makedirs(month_dir, exist_ok=True)
+        piece.reset_index(drop=True).to_feather(os.path.join(month_dir, f"{name}-{tag}.arrow"))
+
+
+def compact_month(state_dir, staging_dir, month, seq, customers):
+    # Pieces are named <table>-<batch seq>-<chunk>.arrow and the compacted file <table>-<batch seq>.arrow,
+    # so sorting by name replays them in arrival order and the last row wins on its natural key, blanks
+    # included. The stored month is only read; the compacted files go to staging until commit_month.
+    month_dir = os.path.join(state_dir, "months", month)
+    staged_dir = os.path.join(staging_dir, "months", month)
+    compacted_dir = os.path.join(staging_dir, "compacted", month)
+    os.makedirs(compacted_dir, exist_ok=True)
+    tables = {}
+    for name, keys in ROW_KEYS.items():
+        paths = sorted(glob.glob(os.path.join(month_dir, f"{name}-*.arrow"))) + sorted(glob.glob(os.path.join(staged_dir, f"{name}-*.arrow")))
+        if not paths:
+            tables[name] = pd.read_feather(os.path.join(state_dir, "templates", name + ".arrow"))
+            continue
+        df = pd.concat([pd.read_feather(path) for path in paths], ignore_index=True)
+        df = df.drop_duplicates(keys, keep='last').reset_index(drop=True)
+        df.to_feather(os.path.join(compacted_dir, f"{name}-{seq:06d}.arrow"))
+        tables[name] = df
+    # Orders are stored as sent; only the customer columns come from the customer dimension.
+    tables["orders"] = tables["orders"].merge(customers, on='customer_id', how='left')
+    return tables
+
+
+def commit_month(state_dir, staging_dir, month):
+    # New files replace first and stale ones go after, so a crash in between leaves both, and the
+    # next compaction still lets the newer file win.
+    month_dir = os.path.join(state_dir, "months", month)
+    compacted_dir = os.path.join(staging_dir, "compacted", month)
+    os.makedirs(month_dir, exist_ok=True)
+    names = os.listdir(compacted_dir)
+    for file_name in names:
+        os.replace(os.path.join(compacted_dir, file_name), os.path.join(month_dir, file_name))
+    for file_name in os.listdir(month_dir):
+        if file_name not in names:
+            os.remove(os.path.join(month_dir, file_name))
+
+
+def read_dim_product(data_dir, batch_dir=None):
+    products = [pd.read_csv(os.path.join(d, snapshot.TABLES["products"]["file"]), usecols=['product_id', 'product_category_name'], encoding="utf-8-sig")
+                for d in (data_dir, batch_dir) if d and os.path.exists(os.path.join(d, snapshot.TABLES["products"]["file"]))]
+    cat_trans = pd.read_csv(os.path.join(data_dir, snapshot.TABLES["cat_trans"]["file"]), encoding="utf-8-sig")
+    return pipeline.dim_product(pd.concat(products).drop_duplicates('product_id', keep='last'), pipeline.dim_category(cat_trans))
+
+
+def batch_checksum(batch_dir):
+    digest = hashlib.sha256()
+    for name, spec in sorted(snapshot.TABLES.items()):
+        path = os.path.join(batch_dir, spec["file"])
+        if os.path.exists(path):
+            digest.update(f"{name}:{snapshot.file_checksum(path)}\n".encode())
+    return digest.hexdigest()
+
+
+def _upsert_customers(state_dir, batch_dir):
+    path = os.path.join(state_dir, CUSTOMERS)
+    stored = pd.read_feather(path) if os.path.exists(path) else pd.DataFrame(columns=CUSTOMER_COLUMNS, dtype=object)
+    batch_path = os.path.join(batch_dir, snapshot.TABLES["customers"]["file"])
+    if not os.path.exists(batch_path):
+        return stored, []
+    sent = pd.read_csv(batch_path, usecols=CUSTOMER_COLUMNS, dtype=object, encoding="utf-8-sig")[CUSTOMER_COLUMNS]
+    sent = sent.drop_duplicates('customer_id', keep='last')
+    # Only rows that differ from the stored ones count as changed (the export re-sends every customer).
+    merged = sent.merge(stored, on='customer_id', how='left', suffixes=('', '_stored'), indicator=True)
+    same = merged['_merge'].eq('both')
+    for column in CUSTOMER_COLUMNS[1:]:
+        same &= merged[column].fillna('') == merged[column + '_stored'].fillna('')
+    changed = sent.loc[~same.to_numpy(), 'customer_id']
+    customers = pd.concat([stored, sent], ignore_index=True).drop_duplicates('customer_id', keep='last').reset_index(drop=True)
+    return customers, changed
+
+
+def _sources(data_dir, index):
+    # The snapshot fingerprint of data_dir when it holds exactly the stored orders, else None; the
+    # dashboard only seeds a pipeline built from that same snapshot.
+    try:
+        order_ids = pd.read_csv(os.path.join(data_dir, snapshot.TABLES["orders"]["file"]), usecols=['order_id'], encoding="utf-8-sig")['order_id']
+    except FileNotFoundError:
+        return None
+    if len(order_ids) != len(index) or not order_ids.isin(index.index).all():
+        return None
+    return snapshot.fingerprint(snapshot.source_states(data_dir))
+
+
+def apply_batch(batch_dir, state_dir=STATE_DIR, data_dir=snapshot.DATA_DIR, chunk_rows=streaming.CHUNK_ROWS):
+    state = read_state(state_dir)
+    if state is None:
+        raise FileNotFoundError(f"no incremental state in {state_dir}, run 'python incremental.py init' first")
+    name = os.path.basename(os.path.normpath(batch_dir))
+    # Batches are known by content, so a re-export under a new name is skipped and a new export that
+    # reuses an old folder name is still applied.
+    checksum = batch_checksum(batch_dir)
+    if checksum in (batch["checksum"] for batch in state["batches"]):
+        logger.info("batch %s already applied, skipping", name)
+        return state
+    seq = len(state["batches"]) + 1
+    # Leftovers of a batch that failed before its commit are discarded; the batch is simply applied again.
+    staging_dir = os.path.join(state_dir, STAGING)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    # Order id -> month it is filed under and its customer, so customer changes find the months to rebuild.
+    index_path = os.path.join(state_dir, "order_index.arrow")
+    index = pd.read_feather(index_path).set_index('order_id') if os.path.exists(index_path) else pd.DataFrame(columns=['month', 'customer_id'], dtype=object)
+    affected, new_orders, updated_orders = set(), 0, 0
+
+    # The customer dimension keeps every customer ever sent, so orders join customers from earlier batches.
+    customers, changed = _upsert_customers(state_dir, batch_dir)
+    os.makedirs(staging_dir)
+    customers.to_feather(os.path.join(staging_dir, CUSTOMERS))
+    for i, orders in enumerate(_read_batch(batch_dir, "orders", chunk_rows)):
+        # An order re-sent within one chunk is one update; the index below needs unique order ids.
+        orders = orders.drop_duplicates('order_id', keep='last')
+        known = orders['order_id'].isin(index.index)
+        # An order's month never changes, so updates go back to the month it was first filed under.
+        months = month_key(orders['order_purchase_timestamp']).where(~known, orders['order_id'].map(index['month']))
+        index = pd.concat([index[~index.index.isin(orders['order_id'])],
+                           pd.DataFrame({'month': months.to_numpy(), 'customer_id': orders['customer_id'].to_numpy()}, index=pd.Index(orders['order_id'], name='order_id'))])
+        _write_pieces(staging_dir, "orders", orders, months, f"{seq:06d}-{i:06d}")
+        affected.update(months.unique())
+        new_orders += int((~known).sum())
+        updated_orders += int(known.sum())
+
+    # Child rows follow their order's month; rows for orders not seen yet wait in pending/ for a later batch.
+    for table in ["order_items", "payments", "reviews"]:
+        pending_path = os.path.join(state_dir, "pending", table + ".arrow")
+        chunks = list(_read_batch(batch_dir, table, chunk_rows))
+        if os.path.exists(pending_path):
+            chunks.insert(0, pd.read_feather(pending_path))
+        waiting = []
+        for i, rows in enumerate(chunks):
+            months = rows['order_id'].map(index['month'])
+            _write_pieces(staging_dir, table, rows[months.notna()], months[months.notna()], f"{seq:06d}-{i:06d}")
+            affected.update(months.dropna().unique())
+            waiting.append(rows[months.isna()])
+        waiting = pd.concat(waiting, ignore_index=True) if waiting else None
+        if waiting is not None and len(waiting):
+            os.makedirs(os.path.join(staging_dir, "pending"), exist_ok=True)
+            waiting.to_feather(os.path.join(staging_dir, "pending", table + ".arrow"))
+            logger.info("%d %s rows wait for their orders", len(waiting), table)
+
+    # Months holding orders of a new or changed customer are rebuilt too.
+    affected.update(index.loc[index['customer_id'].isin(changed), 'month'].unique())
+
+    # Only the touched months are rebuilt; every other month keeps its stored partial aggregates.
+    dim_product = read_dim_product(data_dir, batch_dir)
+    for month in sorted(affected):
+        tables = compact_month(state_dir, staging_dir, month, seq, customers)
+        pd.to_pickle(streaming.partial_aggregates(**tables, dim_product=dim_product), os.path.join(staging_dir, "compacted", month, "partials.pkl"))
+
+    # Commit: only renames from here on, and state.json last, so a batch counts once it is all in place.
+    for month in sorted(affected):
+        commit_month(state_dir, staging_dir, month)
+    for table in ["order_items", "payments", "reviews"]:
+        pending_path = os.path.join(state_dir, "pending", table + ".arrow")
+        staged_path = os.path.join(staging_dir, "pending", table + ".arrow")
+        if os.path.exists(staged_path):
+            os.makedirs(os.path.dirname(pending_path), exist_ok=True)
+            os.replace(staged_path, pending_path)
+        elif os.path.exists(pending_path):
+            os.remove(pending_path)
+    os.replace(os.path.join(staging_dir, CUSTOMERS), os.path.join(state_dir, CUSTOMERS))
+    index_tmp = index_path + ".tmp"
+    index.rename_axis('order_id').reset_index().to_feather(index_tmp)
+    os.replace(index_tmp, index_path)
+    state["batches"].append({"name": name, "checksum": checksum, "seq": seq, "new_orders": new_orders, "updated_orders": updated_orders, "months": sorted(affected)})
+    state["sources"] = _sources(data_dir, index)
+    _write_state(state_dir, state)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    logger.info("applied %s: %d new orders, %d updated, %d months rebuilt", name, new_orders, updated_orders, len(affected))
+    return state
+
+
+def init(data_dir=snapshot.DATA_DIR, state_dir=STATE_DIR, chunk_rows=streaming.CHUNK_ROWS):
+    shutil.rmtree(state_dir, ignore_errors=True)
+    os.makedirs(os.path.join(state_dir, "templates"))
+    for name in ROW_KEYS:
+        template = next(iter(streaming.read_chunks(data_dir, name, 1000))).iloc[:0]
+        template.reset_index(drop=True).to_feather(os.path.join(state_dir, "templates", name + ".arrow"))
+    _write_state(state_dir, {"batches": [], "sources": None})
+    return apply_batch(data_dir, state_dir, data_dir, chunk_rows)
+
+
+def load_aggregates(state_dir=STATE_DIR):
+    # Keyed like the pipeline nodes of the same name, so they can seed a Pipeline (Pipeline.seed).
+    partials = [pd.read_pickle(path) for path in sorted(glob.glob(os.path.join(state_dir, "months", "*", "partials.pkl")))]
+    return streaming.fold(partials)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the monthly dashboard aggregates incrementally.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    init_parser = subparsers.add_parser("init", help="rebuild the state from a full data directory")
+    init_parser.add_argument("--data-dir", default=snapshot.DATA_DIR)
+    refresh_parser = subparsers.add_parser("refresh", help="apply new batch directories in order")
+    refresh_parser.add_argument("batch_dirs", nargs="+")
+    refresh_parser.add_argument("--data-dir", default=snapshot.DATA_DIR, help="where the product dimension lives")
+    subparsers.add_parser("status", help="print the applied batches")
+    parser.add_argument("--state-dir", default=STATE_DIR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "init":
+        init(args.data_dir, args.state_dir)
+    elif args.command == "refresh":
+        for batch_dir in args.batch_dirs:
+            apply_batch(batch_dir, args.state_dir, args.data_dir)
+    else:
+        print(json.dumps(read_state(args.state_dir), indent=2))
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+import views
+
+ALL_CATEGORIES = 'Semua Kategori'
+ALL_STATES = 'Semua State'
+# sort key -> column label on the page
+SORT_KEYS = {
+    "late_dispatch_rate": "Late Dispatch Rate (%)",
+    "avg_dispatch_delay": "Rata-rata Keterlambatan Dispatch (hari)",
+    "orders": "Jumlah Pesanan",
+    "avg_review_score": "Rata-rata Skor Ulasan",
+    "freight_ratio": "Rasio Ongkir (%)",
+}
+
+
+def _aggregate(items, keys):
+    table = items.groupby(keys, observed=True).agg(
+        items=('order_id', 'size'),
+        late=('is_seller_late', 'sum'),
+        avg_dispatch_delay=('late_dispatch_delay', 'mean'),
+        orders=('order_id', 'nunique'),
+        price=('price', 'sum'),
+        freight=('freight_value', 'sum'),
+    )
+    # Review scores are per order, so each order counts once however many of its items the seller shipped.
+    table['avg_review_score'] = items.drop_duplicates(keys + ['order_id']).groupby(keys, observed=True)['review_score'].mean()
+    table['late_dispatch_rate'] = table['late'] / table['items'] * 100
+    table['freight_ratio'] = table['freight'] / table['price'].where(table['price'] > 0) * 100
+    return table.reset_index()
+
+
+# One row per seller and category, plus one per seller over all categories (category ALL_CATEGORIES),
+# so every filter combination is a row selection and nothing is re-aggregated per request.
+def build_seller_table(df_analysis, dim_seller):
+    items = df_analysis[['seller_id', 'order_id', 'product_category_name_english', 'is_seller_late', 'seller_dispatch_days_late', 'review_score', 'price', 'freight_value']]
+    items = items.assign(late_dispatch_delay=items['seller_dispatch_days_late'].where(items['is_seller_late']))
+    overall = _aggregate(items, ['seller_id']).assign(product_category_name_english=ALL_CATEGORIES)
+    per_category = _aggregate(items, ['seller_id', 'product_category_name_english'])
+    table = pd.concat([overall, per_category], ignore_index=True)
+    return table.merge(dim_seller, on='seller_id', how='left')[['seller_id', 'seller_state', 'product_category_name_english', *SORT_KEYS]]
+
+
+def build_sort_index(table):
+    # Row positions ascending by each key, NaN last; ties go by seller id so pages are stable.
+    return {key: np.lexsort((table['seller_id'].to_numpy(), table[key].to_numpy())) for key in SORT_KEYS}
+
+
+def rank(table, sort_index, row_index, sort_key, descending=True, state=ALL_STATES, category=ALL_CATEGORIES, min_orders=1):
+    # Filtering keeps the presorted order, so a new sort key, direction or page never sorts or aggregates again.
+    mask = np.zeros(len(table), dtype=bool)
+    mask[views.selected_rows(row_index, product_category_name_english=category, seller_state=None if state == ALL_STATES else state)] = True
+    mask &= table['orders'].to_numpy() >= min_orders
+    order = sort_index[sort_key]
+    order = order[mask[order]]
+    if descending:
+        missing = np.isnan(table[sort_key].to_numpy(dtype=np.float64)[order])
+        order = np.concatenate([order[~missing][::-1], order[missing]])
+    return order
+
+
+def page(table, positions, number, page_size=25):
+    return table.iloc[positions[number * page_size:(number + 1) * page_size]]
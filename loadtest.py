@@ -0,0 +1,109 @@
+import argparse
+import concurrent.futures
+import json
+import logging
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+
+import benchmark
+import figures
+import pipeline
+import report
+import snapshot
+from profiling import rss_bytes
+
+logger = logging.getLogger(__name__)
+
+MODES = ["shared", "copy"]
+
+
+def session(pipe, jobs, interactions, seed):
+    # One simulated analyst: a rerun per interaction, each a figure with a random widget state.
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(interactions):
+        name, widgets = rng.choice(jobs)
+        start = time.perf_counter()
+        figures.FIGURES[name](pipe, **widgets)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_sessions(key, snapshot_dir, n_sessions, mode="shared", interactions=20, seed=0):
+    baseline = rss_bytes()
+    if baseline is None:
+        raise RuntimeError("the load test reads resident memory from /proc/self/statm (Linux only)")
+    tables = snapshot.read_tables(key, snapshot_dir)
+    shared = pipeline.Pipeline(tables, key)
+    jobs = report.combinations(shared)
+    # Warm the shared nodes first, as the first visitor of a running server would.
+    for name in figures.FIGURES:
+        figures.FIGURES[name](shared, **next(widgets for n, widgets in jobs if n == name))
+    warm = rss_bytes()
+
+    sessions = []
+    lock = threading.Lock()
+    def start(i):
+        if mode == "shared":
+            pipe = shared
+        else:
+            # The old behaviour: every session holds private copies of the tables and derived frames.
+            pipe = pipeline.Pipeline({name: df.copy() for name, df in tables.items()}, key)
+        with lock:
+            sessions.append(pipe)
+        return session(pipe, jobs, interactions, seed + i)
+
+    wall = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n_sessions, thread_name_prefix="session") as executor:
+        latencies = [s for result in executor.map(start, range(n_sessions)) for s in result]
+    wall = time.perf_counter() - wall
+    latencies.sort()
+    result = {
+        "mode": mode,
+        "sessions": n_sessions,
+        "interactions": len(latencies),
+        "wall_seconds": wall,
+        "median_seconds": statistics.median(latencies),
+        "p95_seconds": latencies[int(0.95 * (len(latencies) - 1))],
+        "max_seconds": latencies[-1],
+        "baseline_rss_bytes": baseline,
+        "warm_rss_bytes": warm,
+        "rss_bytes": rss_bytes(),
+        "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+    result["rss_per_session_bytes"] = (result["rss_bytes"] - warm) / n_sessions
+    logger.info("%-6s %3d sessions: median %.3fs p95 %.3fs, rss %.0f MB (+%.1f MB per session)", mode, n_sessions,
+                result["median_seconds"], result["p95_seconds"], result["rss_bytes"] / 1e6, result["rss_per_session_bytes"] / 1e6)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure memory and latency with many concurrent dashboard sessions.")
+    parser.add_argument("sessions", type=int, nargs="*", default=[1, 10, 50])
+    parser.add_argument("--data-dir", default=snapshot.DATA_DIR)
+    parser.add_argument("--snapshot-dir", default=snapshot.SNAPSHOT_DIR)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="shared: one pipeline per process (the page); copy: one per session")
+    parser.add_argument("--interactions", type=int, default=20, help="reruns per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    logging.getLogger("pipeline").setLevel(logging.WARNING)
+
+    key = snapshot.ensure_snapshot(args.data_dir, args.snapshot_dir)
+    results = []
+    for mode in args.modes:
+        for n_sessions in args.sessions:
+            # A fresh process per run so resident memory starts from the same baseline.
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(run_sessions, key, args.snapshot_dir, n_sessions, mode, args.interactions, args.seed).result())
+    report_json = {"environment": benchmark.environment(), "snapshot": key, "results": results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report_json, f, indent=2)
+    else:
+        json.dump(report_json, sys.stdout, indent=2)
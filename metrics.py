@@ -0,0 +1,34 @@
+from collections import namedtuple
+
+Metric = namedtuple("Metric", ["column", "reduction", "scale"])
+
+# Every KPI is one built-in reduction over a column precomputed on df_analysis.
+METRICS = {
+    "late_rate": Metric("is_late", "mean", 100),
+    "seller_late_rate": Metric("is_seller_late", "mean", 100),
+    "late_orders_count": Metric("is_late", "sum", 1),
+    "avg_days_late": Metric("late_days_late", "mean", 1),
+    "order_processing_time": Metric("order_processing_time", "mean", 1),
+    "seller_lead_time": Metric("seller_lead_time", "mean", 1),
+    "shipping_time": Metric("shipping_time", "mean", 1),
+}
+
+
+def add_metric_columns(df_analysis):
+    df_analysis['is_late'] = ~df_analysis['is_on_time']
+    df_analysis['is_seller_late'] = ~df_analysis['seller_dispatched_on_time']
+    df_analysis['late_days_late'] = df_analysis['days_late'].where(df_analysis['is_late'])
+    return df_analysis
+
+
+def compute(df, names, by=None):
+    # Without `by` the KPIs come back as a dict of scalars, otherwise as one frame from a single groupby.
+    specs = {name: (METRICS[name].column, METRICS[name].reduction) for name in names}
+    if by:
+        result = df.groupby(by, observed=True).agg(**specs)
+    else:
+        result = {name: df[column].agg(reduction) for name, (column, reduction) in specs.items()}
+    for name in names:
+        if METRICS[name].scale != 1:
+            result[name] = result[name] * METRICS[name].scale
+    return result
@@ -0,0 +1,418 @@
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import cohort
+import cube
+import leaderboard
+import metrics
+import sketches
+import timeline
+import views
+from complaints import classify_complaints
+
+logger = logging.getLogger(__name__)
+
+# Node values are shared read-only by every session in the process. Under pandas 3's copy-on-write
+# (requirements.txt pins pandas>=3) the filters and projections a session derives from them never
+# copy or write through until the session modifies its own result.
+NODES = {}
+
+
+def node(*deps):
+    def register(fn):
+        NODES[fn.__name__] = (fn, deps)
+        return fn
+    return register
+
+
+class Pipeline:
+    backend = "pandas"
+    # Set on windows: the pipeline they slice, the purchase range [start, end) and each table's row range.
+    parent = None
+    period = None
+    bounds = None
+    # Which precomputed aggregates stand in for nodes (see seed); part of every cache key.
+    seed_version = None
+
+    def __init__(self, tables, snapshot_id):
+        self.snapshot_id = snapshot_id
+        self.tables = dict(tables)
+        self.timings = {}
+        self.load_timings = {}
+        self._values = dict(tables)
+        self._lock = threading.RLock()
+
+    def get(self, name):
+        if name in self._values:
+            return self._values[name]
+        with self._lock:
+            if name not in self._values:
+                start = time.perf_counter()
+                if name in MONTHLY_NODES and self.parent is not None and timeline.is_month_aligned(*self.period):
+                    self._values[name] = select_months(self.parent[name], *self.period)
+                else:
+                    self._values[name] = self.build(name)
+                self.timings[name] = time.perf_counter() - start
+                logger.info("built %s in %.3fs (snapshot %s, %s)", name, self.timings[name], self.snapshot_id, self.backend)
+        return self._values[name]
+
+    def seed(self, values, version):
+        # Precomputed node values (streaming.aggregate, incremental.load_aggregates) are served as if
+        # built here. Month-aligned windows select their months from them like from any parent value.
+        self._values.update(values)
+        self.seed_version = version
+        return self
+
+    def build(self, name):
+        fn, deps = NODES[name]
+        return fn(*[self.get(dep) for dep in deps])
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def window(self, start, end):
+        # Purchases in [start, end) only. Tables are stored in purchase order, so each one is a single
+        # row slice found by binary search, and nodes rebuild lazily from the slices like any pipeline.
+        bounds = timeline.window_bounds(self["time_index"], start, end)
+        window = type(self)(timeline.window_tables(self.tables, bounds), self.snapshot_id)
+        window.parent, window.period, window.bounds = self, (start, end), bounds
+        window.seed_version = self.seed_version
+        window.load_timings = self.load_timings
+        return window
+
+
+# Nodes keyed by purchase month. A window on month boundaries selects their months from the parent's
+# value instead of rebuilding them from the sliced tables.
+MONTHLY_NODES = ["monthly_revenue", "monthly_performance", "lateness_cube", "order_sketches"]
+
+
+def select_months(value, start, end):
+    if 'month' in value.index.names:
+        months = value.index.get_level_values('month')
+        return value[(months >= start) & (months < end)]
+    return value[(value['month'] >= start) & (value['month'] < end)].reset_index(drop=True)
+
+
+def format_snake_case(s):
+    if isinstance(s, str): return s.replace('_', ' ').title()
+    return s
+
+
+def to_month(timestamps):
+    return timestamps.dt.to_period('M').dt.to_timestamp()
+
+
+def hours_between(start, end):
+    return (end - start).dt.total_seconds() / 3600
+
+
+@node("orders", "deals", *timeline.ORDER_KEYS, *timeline.DIMENSION_KEYS)
+def time_index(orders, deals, *tables):
+    return timeline.build_time_index({"orders": orders, "deals": deals, **dict(zip([*timeline.ORDER_KEYS, *timeline.DIMENSION_KEYS], tables))})
+
+
+@node("payments", "customers", "orders", "sellers", "products")
+def headline_stats(payments, customers, orders, sellers, products):
+    return {
+        "total_revenue": payments['payment_value'].sum(),
+        "total_customers": customers['customer_unique_id'].nunique(),
+        "total_orders": orders['order_id'].nunique(),
+        "total_sellers": sellers['seller_id'].nunique(),
+        "total_products": products['product_id'].nunique(),
+    }
+
+
+# Approximate variants backed by mergeable sketches, one sketch per group so any roll-up (a month,
+# a state, everything) is a merge. Exact distinct counts and medians need every value in memory.
+# These nodes still build their sketches from the in-memory tables; only streaming.partial_aggregates
+# builds them chunk by chunk, and a seeded pipeline serves those instead.
+@node("customers")
+def customer_sketches(customers):
+    return sketches.sketch_by(customers, 'customer_state', 'customer_unique_id', sketches.HyperLogLog.of)
+
+
+@node("payments", "sellers", "products", "customer_sketches", "order_sketches")
+def approx_headline_stats(payments, sellers, products, customer_sketches, order_sketches):
+    return {
+        "total_revenue": payments['payment_value'].sum(),
+        "total_customers": sketches.merge_all(customer_sketches, sketches.HyperLogLog()).count(),
+        "total_orders": sketches.merge_all(order_sketches, sketches.HyperLogLog()).count(),
+        "total_sellers": sellers['seller_id'].nunique(),
+        "total_products": products['product_id'].nunique(),
+    }
+
+
+# Star schema: each fact table has one explicit grain and charts aggregate at that grain,
+# so no node ever materializes the orders x reviews x items fan-out.
+
+@node("cat_trans")
+def dim_category(cat_trans):
+    dim_category = cat_trans[['product_category_name', 'product_category_name_english']].copy()
+    dim_category['product_category_name_english'] = dim_category['product_category_name_english'].apply(format_snake_case)
+    return dim_category
+
+
+@node("products", "dim_category")
+def dim_product(products, dim_category):
+    return products[['product_id', 'product_category_name']].merge(dim_category, on='product_category_name', how='left')
+
+
+@node("customers")
+def dim_customer(customers):
+    return customers[['customer_id', 'customer_unique_id', 'customer_state']]
+
+
+@node("sellers")
+def dim_seller(sellers):
+    return sellers[['seller_id', 'seller_state']]
+
+
+# One row per order, with its review score and payment total rolled up to the order.
+@node("orders", "dim_customer", "reviews", "payments")
+def fact_orders(orders, dim_customer, reviews, payments):
+    fact_orders = orders.merge(dim_customer, on='customer_id', how='left')
+    fact_orders['review_score'] = fact_orders['order_id'].map(reviews.groupby('order_id')['review_score'].mean())
+    fact_orders['payment_value'] = fact_orders['order_id'].map(payments.groupby('order_id')['payment_value'].sum())
+    return fact_orders
+
+
+# One row per order item.
+@node("order_items", "dim_product")
+def fact_order_items(order_items, dim_product):
+    return order_items.merge(dim_product, on='product_id', how='left')
+
+
+# One row per review.
+@node("reviews")
+def fact_reviews(reviews):
+    return reviews[['review_id', 'order_id', 'review_score', 'review_comment_message', 'review_comment_message_en']]
+
+
+# Row-aligned with reviews (search hits are row positions): each review's score and customer state.
+@node("fact_reviews", "fact_orders")
+def review_facets(fact_reviews, fact_orders):
+    states = fact_orders.drop_duplicates('order_id').set_index('order_id')['customer_state']
+    return fact_reviews[['order_id', 'review_score']].assign(customer_state=fact_reviews['order_id'].map(states))
+
+
+# Bridge between orders and the distinct product categories they contain.
+@node("fact_order_items")
+def order_categories(fact_order_items):
+    return fact_order_items[['order_id', 'product_category_name_english']].dropna().drop_duplicates()
+
+
+@node("fact_orders")
+def order_sketches(fact_orders):
+    orders = fact_orders[['order_id', 'customer_state']].assign(month=to_month(fact_orders['order_purchase_timestamp']))
+    return sketches.sketch_by(orders, ['month', 'customer_state'], 'order_id', sketches.HyperLogLog.of)
+
+
+# Sparse cohort x months-since-first-purchase cells; the retention filters only select and sum its rows.
+# In a date window the cohorts are rebuilt from the window's orders, so a customer's cohort is the month
+# of their first purchase within the window, not their first purchase ever.
+@node("fact_orders", "order_categories")
+def cohort_matrix(fact_orders, order_categories):
+    return cohort.build_cohort_matrix(fact_orders, order_categories)
+
+
+@node("cohort_matrix")
+def cohort_matrix_rows(cohort_matrix):
+    return views.build_row_index(cohort_matrix, ['customer_state', 'product_category_name_english'])
+
+
+@node("fact_orders")
+def monthly_revenue(fact_orders):
+    revenue_over_time = fact_orders[['order_purchase_timestamp', 'payment_value']].dropna(subset=['payment_value'])
+    revenue_over_time = revenue_over_time.assign(month=to_month(revenue_over_time['order_purchase_timestamp']))
+    return revenue_over_time.groupby('month')['payment_value'].sum().reset_index()
+
+
+# Each review counts once for every distinct category in its order.
+@node("fact_reviews", "order_categories")
+def category_quality(fact_reviews, order_categories):
+    review_categories = fact_reviews[['order_id', 'review_score']].merge(order_categories, on='order_id')
+    return review_categories.groupby('product_category_name_english').agg(average_score=('review_score', 'mean'), review_count=('review_score', 'count')).reset_index()
+
+
+@node("fact_reviews")
+def low_score_reviews(fact_reviews):
+    low_score_reviews_all = fact_reviews.dropna(subset=['review_comment_message', 'review_comment_message_en'])
+    # A review_id sent for several orders counts once, on its earliest order (reviews are in purchase order).
+    low_score_reviews_all = low_score_reviews_all.drop_duplicates(subset=['review_id'])
+    low_score_reviews_all = low_score_reviews_all[low_score_reviews_all['review_score'] <= 2]
+    # assign() under copy-on-write adds the column without copying the review texts.
+    return low_score_reviews_all.assign(complaint_category=classify_complaints(low_score_reviews_all['review_comment_message']))
+
+
+# Row positions per filter value (see views.py): widgets select rows of the shared frames through
+# these instead of comparing whole columns, and option lists are their keys.
+@node("low_score_reviews", "order_categories")
+def low_score_review_rows(low_score_reviews, order_categories):
+    bridge = pd.DataFrame({'order_id': low_score_reviews['order_id'].to_numpy(), 'row': np.arange(len(low_score_reviews))}).merge(order_categories, on='order_id')
+    return {
+        'product_category_name_english': views.positions_by(bridge['product_category_name_english'], bridge['row']),
+        'complaint_category': views.positions_by(low_score_reviews['complaint_category']),
+    }
+
+
+@node("low_score_reviews", "order_categories")
+def low_score_review_categories(low_score_reviews, order_categories):
+    return low_score_reviews.merge(order_categories, on='order_id')
+
+
+@node("fact_orders", "fact_order_items")
+def df_analysis(fact_orders, fact_order_items):
+    df_analysis = fact_orders[fact_orders['order_status'] == 'delivered'].merge(
+        fact_order_items[['order_id', 'order_item_id', 'product_id', 'seller_id', 'shipping_limit_date', 'price', 'freight_value', 'product_category_name', 'product_category_name_english']],
+        on='order_id'
+    )
+    df_analysis = df_analysis.dropna(
+        subset=[
+            'order_purchase_timestamp',
+            'order_approved_at',
+            'order_delivered_carrier_date',
+            'order_delivered_customer_date',
+            'order_estimated_delivery_date',
+            'shipping_limit_date',
+            'product_category_name_english'
+        ]
+    ).reset_index(drop=True)
+    df_analysis['days_late'] = hours_between(df_analysis['order_estimated_delivery_date'], df_analysis['order_delivered_customer_date']) / 24
+    df_analysis['is_on_time'] = df_analysis['days_late'] <= 0
+    df_analysis['seller_dispatched_on_time'] = (
+        df_analysis['order_delivered_carrier_date'] <= df_analysis['shipping_limit_date']
+    )
+    df_analysis['seller_dispatch_days_late'] = hours_between(df_analysis['shipping_limit_date'], df_analysis['order_delivered_carrier_date']) / 24
+    df_analysis['month'] = to_month(df_analysis['order_purchase_timestamp'])
+    df_analysis['order_processing_time'] = hours_between(df_analysis['order_purchase_timestamp'], df_analysis['order_approved_at'])
+    df_analysis['seller_lead_time'] = hours_between(df_analysis['order_approved_at'], df_analysis['order_delivered_carrier_date'])
+    df_analysis['shipping_time'] = hours_between(df_analysis['order_delivered_carrier_date'], df_analysis['order_delivered_customer_date'])
+    return metrics.add_metric_columns(df_analysis)
+
+
+DELIVERY_KPIS = ["late_rate", "seller_late_rate", "avg_days_late", "late_orders_count", "order_processing_time", "seller_lead_time", "shipping_time"]
+LEAD_TIME_KPIS = ["order_processing_time", "seller_lead_time", "shipping_time"]
+
+
+@node("df_analysis")
+def delivery_summary(df_analysis):
+    return metrics.compute(df_analysis, DELIVERY_KPIS)
+
+
+@node("df_analysis")
+def monthly_performance(df_analysis):
+    return metrics.compute(df_analysis, ["late_rate", "seller_late_rate", "avg_days_late"], by='month').reset_index()
+
+
+@node("df_analysis")
+def lead_times_by_state(df_analysis):
+    return metrics.compute(df_analysis, LEAD_TIME_KPIS, by='customer_state')
+
+
+@node("df_analysis")
+def lateness_cube(df_analysis):
+    return cube.build_lateness_cube(df_analysis)
+
+
+@node("lateness_cube")
+def lateness_cube_rows(lateness_cube):
+    return views.build_row_index(lateness_cube, ['customer_state', 'product_category_name_english'])
+
+
+@node("df_analysis", "dim_seller")
+def seller_leaderboard(df_analysis, dim_seller):
+    return leaderboard.build_seller_table(df_analysis, dim_seller)
+
+
+@node("seller_leaderboard")
+def seller_sort_index(seller_leaderboard):
+    return leaderboard.build_sort_index(seller_leaderboard)
+
+
+@node("seller_leaderboard")
+def seller_leaderboard_rows(seller_leaderboard):
+    return views.build_row_index(seller_leaderboard, ['seller_state', 'product_category_name_english'])
+
+
+FREIGHT_BINS = [0, 10, 20, 30, 45, float('inf')]
+FREIGHT_LABELS = ["0-10", "10-20", "20-30", "30-45", "45+"]
+
+
+# Item grain: each item's freight and price against its order's review score.
+@node("fact_order_items", "fact_orders")
+def freight_analysis(fact_order_items, fact_orders):
+    df_freight_analysis = fact_order_items[['order_id', 'freight_value', 'price', 'product_category_name_english']].merge(
+        fact_orders[['order_id', 'review_score']], on='order_id', how='left'
+    )
+    df_freight_analysis = df_freight_analysis.dropna(subset=['freight_value', 'price', 'review_score', 'product_category_name_english']).reset_index(drop=True)
+    df_freight_analysis['freight_bin'] = pd.cut(df_freight_analysis['freight_value'], bins=FREIGHT_BINS, labels=FREIGHT_LABELS, right=False)
+    return df_freight_analysis
+
+
+# Median freight as a percentage of the median item price.
+@node("freight_analysis")
+def freight_ratio(freight_analysis):
+    median_price_value = freight_analysis['price'].median()
+    if median_price_value > 0:
+        return freight_analysis['freight_value'].median() / median_price_value * 100
+    return 0
+
+
+@node("freight_analysis")
+def freight_sketches(freight_analysis):
+    return {column: sketches.sketch_by(freight_analysis, 'product_category_name_english', column, sketches.QuantileSketch.of) for column in ['freight_value', 'price']}
+
+
+@node("freight_sketches")
+def approx_freight_ratio(freight_sketches):
+    median_price_value = sketches.merge_all(freight_sketches['price'], sketches.QuantileSketch()).median()
+    if median_price_value > 0:
+        return sketches.merge_all(freight_sketches['freight_value'], sketches.QuantileSketch()).median() / median_price_value * 100
+    return 0
+
+
+@node("freight_analysis")
+def review_by_freight(freight_analysis):
+    return freight_analysis.groupby('freight_bin', observed=False)['review_score'].mean().reset_index().dropna()
+
+
+def top_counts(values, n=10):
+    # Ties are broken by name so every backend (and the streamed fold) ranks the same top n.
+    return values.value_counts().sort_index().sort_values(ascending=False, kind='stable').head(n)
+
+
+# Number of distinct orders containing each category.
+@node("order_categories")
+def top_categories(order_categories):
+    top_cats_data = top_counts(order_categories['product_category_name_english']).reset_index()
+    top_cats_data.columns = ['Kategori', 'Jumlah Pesanan']
+    return top_cats_data
+
+
+@node("deals", "sellers")
+def top_segments(deals, sellers):
+    deals_with_state = deals.merge(
+        sellers[['seller_id', 'seller_state']], on='seller_id', how='left'
+    )
+    deals_with_state['business_segment_formatted'] = deals_with_state['business_segment'].dropna().astype(str).apply(format_snake_case)
+    top_segments = top_counts(deals_with_state['business_segment_formatted']).reset_index()
+    top_segments.columns = ['Business Segment', 'Jumlah Seller']
+    return top_segments
+
+
+@node("deals")
+def lead_type_proportions(deals):
+    # Categorical value_counts lists absent lead types too; a date window can leave some empty.
+    counts = deals['lead_type'].value_counts().loc[lambda counts: counts > 0].sort_index().sort_values(kind='stable')
+    return counts / counts.sum()
+
+
+@node("deals", "leads")
+def avg_conversion(deals, leads):
+    df = pd.merge(deals, leads[['mql_id', 'first_contact_date', 'origin']], on='mql_id', how='left')
+    df['conversion_days'] = (df['won_date'] - df['first_contact_date']).dt.days
+    return df.groupby('origin', observed=True)['conversion_days'].mean().sort_values(ascending=False).reset_index()
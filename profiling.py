@@ -0,0 +1,105 @@
+import functools
+import io
+import json
+import logging
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ["run", "section", "wall_seconds", "cpu_seconds", "peak_memory_delta_bytes", "rss_bytes", "figures", "figure_bytes"]
+
+
+def rss_bytes():
+    # Resident size of the whole process (Linux only): a gauge shared by every session, not a section's cost.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+# Sections are delimited by begin() calls (or the section() decorator): starting a section closes
+# the previous one. on_record sees every finished record, including ones from fragment reruns that
+# happen after the page script has returned. tracemalloc's peak is process-wide, so the per-section
+# peak (trace_memory) is only meaningful with one session at a time; otherwise sections get rss_bytes.
+class Profiler:
+    def __init__(self, run, enabled=True, trace_memory=False, on_record=None):
+        self.run = run
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.on_record = on_record
+        self.records = []
+        self._current = None
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self, section):
+        self.end()
+        if not self.enabled:
+            return
+        memory = None
+        if self.trace_memory:
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._current = {
+            "run": self.run,
+            "section": section,
+            "figures": 0,
+            "figure_bytes": 0,
+            "_memory": memory,
+            "_wall": time.perf_counter(),
+            "_cpu": time.process_time(),
+        }
+
+    def section(self, name):
+        def wrap(fn):
+            @functools.wraps(fn)
+            def run(*args, **kwargs):
+                self.begin(name)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.end()
+            return run
+        return wrap
+
+    def add_figure(self, fig, nbytes):
+        if self._current is not None and fig is not None:
+            self._current["figures"] += 1
+            self._current["figure_bytes"] += nbytes
+
+    def end(self):
+        record, self._current = self._current, None
+        if record is None:
+            return
+        wall = time.perf_counter() - record.pop("_wall")
+        cpu = time.process_time() - record.pop("_cpu")
+        memory = record.pop("_memory")
+        peak = None if memory is None else tracemalloc.get_traced_memory()[1] - memory
+        record.update(wall_seconds=wall, cpu_seconds=cpu, peak_memory_delta_bytes=peak, rss_bytes=rss_bytes())
+        record = {field: record[field] for field in FIELDS}
+        self.records.append(record)
+        if self.on_record is not None:
+            self.on_record(record)
+        logger.debug("section %s: %.3fs wall, %.3fs cpu, %s peak, %d figures (%.1f kB)",
+                     record["section"], wall, cpu, "-" if peak is None else f"{peak / 1e6:+.1f} MB", record["figures"], record["figure_bytes"] / 1e3)
+
+
+def to_json(records):
+    return json.dumps(records, indent=2)
+
+
+def to_csv(records):
+    buffer = io.StringIO()
+    pd.DataFrame(records, columns=FIELDS).to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+
+def append_log(records, path):
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
@@ -0,0 +1,133 @@
+import argparse
+import concurrent.futures
+import importlib.util
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+import cohort
+import figures
+import snapshot
+import sql_pipeline
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ["html", "json", "png"]
+MAP_METRICS = ["Customer Lateness Rate", "Seller Late Dispatch Rate"]
+MIN_REVIEWS = [10, 50, 100, 200]
+
+
+# The same option lists the page offers. fig_dist crosses metric x state over all categories and
+# metric x category over all states (fig_cohort likewise per measure); --full adds every category x state pair.
+def widget_grid(pipe, full=False):
+    complaint_categories = ['Semua Kategori'] + list(pipe["low_score_review_rows"]['product_category_name_english'])
+    cube_rows = pipe["lateness_cube_rows"]
+    categories = ['Semua Kategori'] + list(cube_rows['product_category_name_english'])
+    states = ['Semua State'] + list(cube_rows['customer_state'])
+    dist_pairs = [(c, s) for c in categories for s in states] if full else [('Semua Kategori', s) for s in states] + [(c, 'Semua State') for c in categories]
+    cohort_rows = pipe["cohort_matrix_rows"]
+    cohort_categories = [cohort.ALL_CATEGORIES] + [c for c in cohort_rows['product_category_name_english'] if c != cohort.ALL_CATEGORIES]
+    cohort_states = [cohort.ALL_STATES] + list(cohort_rows['customer_state'])
+    cohort_pairs = [(c, s) for c in cohort_categories for s in cohort_states] if full else [(cohort.ALL_CATEGORIES, s) for s in cohort_states] + [(c, cohort.ALL_STATES) for c in cohort_categories]
+    return {
+        "fig_top": [{"min_reviews": n} for n in MIN_REVIEWS],
+        "fig_bottom": [{"min_reviews": n} for n in MIN_REVIEWS],
+        "fig_complaints": [{"category": c} for c in complaint_categories],
+        "fig_regional_map": [{"metric": m, "category": c} for m in MAP_METRICS for c in categories],
+        "fig_dist": [{"metric": m, "category": c, "state": s} for m in MAP_METRICS for c, s in dist_pairs],
+        "fig_avg": [{"state": s} for s in states],
+        "fig_cohort": [{"measure": m, "state": s, "category": c} for m in cohort.MEASURES for c, s in cohort_pairs],
+    }
+
+
+def combinations(pipe, names=None, full=False):
+    # Keyed like the figure cache, so a combination listed twice is rendered once.
+    grid = widget_grid(pipe, full)
+    unique = {}
+    for name in names or figures.FIGURES:
+        for widgets in grid.get(name, [{}]):
+            unique.setdefault((name, tuple(sorted(widgets.items()))), widgets)
+    return [(name, widgets) for (name, _), widgets in unique.items()]
+
+
+def slug(widgets):
+    if not widgets:
+        return "default"
+    return "__".join(f"{key}-{re.sub(r'[^0-9A-Za-z]+', '-', str(value)).strip('-').lower()}" for key, value in sorted(widgets.items()))
+
+
+_pipe = None
+
+
+def _init_worker(key, snapshot_dir, backend):
+    # Each worker memory-maps the snapshot and builds the nodes its figures need once.
+    global _pipe
+    logging.basicConfig(level=logging.WARNING)
+    _pipe = sql_pipeline.BACKENDS[backend](snapshot.read_tables(key, snapshot_dir), key)
+
+
+def render(name, widgets, out_dir, formats):
+    start = time.perf_counter()
+    fig = figures.FIGURES[name](_pipe, **widgets)
+    files = []
+    if fig is not None:
+        stem = os.path.join(out_dir, name, slug(widgets))
+        os.makedirs(os.path.dirname(stem), exist_ok=True)
+        for fmt in formats:
+            path = f"{stem}.{fmt}"
+            if fmt == "html":
+                fig.write_html(path, include_plotlyjs="cdn")
+            elif fmt == "json":
+                with open(path, "w") as f:
+                    f.write(fig.to_json())
+            else:
+                fig.write_image(path)
+            files.append(os.path.relpath(path, out_dir))
+    return {"figure": name, "widgets": widgets, "files": files, "empty": fig is None, "seconds": time.perf_counter() - start}
+
+
+def run(out_dir, data_dir=snapshot.DATA_DIR, snapshot_dir=snapshot.SNAPSHOT_DIR, formats=("html", "json"), names=None,
+        full=False, workers=None, backend="pandas"):
+    start = time.perf_counter()
+    key = snapshot.ensure_snapshot(data_dir, snapshot_dir)
+    # The grid only reads small nodes, so the parent builds them on its own copy of the pipeline.
+    pipe = sql_pipeline.BACKENDS[backend](snapshot.read_tables(key, snapshot_dir), key)
+    jobs = combinations(pipe, names, full)
+    os.makedirs(out_dir, exist_ok=True)
+    logger.info("rendering %d figure combinations as %s", len(jobs), ", ".join(formats))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(key, snapshot_dir, backend)) as executor:
+        futures = [executor.submit(render, name, widgets, out_dir, formats) for name, widgets in jobs]
+        results = [future.result() for future in futures]
+    index = {
+        "snapshot": key,
+        "backend": backend,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "seconds": time.perf_counter() - start,
+        "figures": results,
+    }
+    with open(os.path.join(out_dir, "index.json"), "w") as f:
+        json.dump(index, f, indent=2)
+    logger.info("wrote %d files for %d combinations (%d empty) to %s in %.1fs",
+                sum(len(r["files"]) for r in results), len(results), sum(r["empty"] for r in results), out_dir, index["seconds"])
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render every dashboard figure and widget combination to static files.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--data-dir", default=snapshot.DATA_DIR)
+    parser.add_argument("--snapshot-dir", default=snapshot.SNAPSHOT_DIR)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["html", "json"])
+    parser.add_argument("--figures", nargs="+", choices=list(figures.FIGURES), help="only these figures (default: all)")
+    parser.add_argument("--full", action="store_true", help="every category x state pair for fig_dist")
+    parser.add_argument("--workers", type=int, help="render processes (default: CPU count)")
+    parser.add_argument("--backend", choices=list(sql_pipeline.BACKENDS), default=os.environ.get("ECOMMERCE_BACKEND", "pandas"))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    if "png" in args.formats and importlib.util.find_spec("kaleido") is None:
+        parser.error("png output needs kaleido (pip install kaleido)")
+    run(args.out_dir, args.data_dir, args.snapshot_dir, args.formats, args.figures, args.full, args.workers, args.backend)
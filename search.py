@@ -0,0 +1,143 @@
+import argparse
+import logging
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+import pipeline
+import snapshot
+
+logger = logging.getLogger(__name__)
+
+TEXT_COLUMNS = ['review_comment_message', 'review_comment_message_en']
+INDEX_DIR = "search"
+TOKEN = r"[0-9a-z]+"
+QUERY_TERM = re.compile(r"([0-9a-z]+)(\*?)")
+
+
+def fold(texts):
+    # Lower-case and strip accents so "Não", "NAO" and "nao" index as one term.
+    return texts.astype("string").str.normalize("NFKD").str.replace("[\u0300-\u036f]", "", regex=True).str.lower()
+
+
+# Postings are stored CSR-style: the review rows containing terms[i] are docs[starts[i]:starts[i + 1]],
+# sorted. Terms are sorted too, so all terms sharing a prefix form one contiguous run of postings.
+class ReviewIndex:
+    def __init__(self, terms, starts, docs):
+        self.terms = terms
+        self.starts = starts
+        self.docs = docs
+
+    def lookup(self, term, prefix=False):
+        lo = np.searchsorted(self.terms, term, side='left')
+        hi = np.searchsorted(self.terms, term + "\x7f" if prefix else term, side='right')
+        if hi - lo == 1:
+            return self.docs[self.starts[lo]:self.starts[hi]]
+        return np.unique(self.docs[self.starts[lo]:self.starts[hi]])
+
+    def search(self, query):
+        # Every term must match; "term*" matches any term starting with it. Returns review row positions.
+        terms = QUERY_TERM.findall(fold(pd.Series([query]))[0])
+        if not terms:
+            return None
+        matches = None
+        for term, star in sorted(terms, key=lambda t: t[1]):
+            docs = self.lookup(term, prefix=bool(star))
+            matches = docs if matches is None else np.intersect1d(matches, docs, assume_unique=True)
+            if not len(matches):
+                break
+        return matches
+
+
+def build_index(reviews):
+    texts = fold(reviews[TEXT_COLUMNS[0]].fillna("") + " " + reviews[TEXT_COLUMNS[1]].fillna(""))
+    tokens = texts.reset_index(drop=True).str.findall(TOKEN).explode().dropna()
+    # Terms stay Python strings (object); a fixed-width <U array would pad every term to the longest one.
+    postings = pd.DataFrame({'term': tokens.to_numpy(dtype=object), 'doc': tokens.index.to_numpy(dtype=np.int32)})
+    postings = postings.drop_duplicates().sort_values(['term', 'doc'], kind='stable')
+    terms, starts = np.unique(postings['term'].to_numpy(), return_index=True)
+    logger.info("indexed %d reviews: %d terms, %d postings", len(reviews), len(terms), len(postings))
+    return ReviewIndex(terms, np.append(starts, len(postings)), postings['doc'].to_numpy())
+
+
+def write_index(index, path):
+    os.makedirs(path)
+    feather.write_feather(pd.DataFrame({'term': index.terms, 'start': index.starts[:-1]}), os.path.join(path, "terms.arrow"), compression="uncompressed")
+    feather.write_feather(pd.DataFrame({'doc': index.docs}), os.path.join(path, "docs.arrow"), compression="uncompressed")
+
+
+def read_index(path):
+    terms = feather.read_table(os.path.join(path, "terms.arrow"), memory_map=True).to_pandas()
+    docs = feather.read_table(os.path.join(path, "docs.arrow"), memory_map=True).column('doc').to_numpy()
+    return ReviewIndex(terms['term'].to_numpy(dtype=object), np.append(terms['start'].to_numpy(), len(docs)), docs)
+
+
+def ensure_index(reviews, snapshot_dir=snapshot.SNAPSHOT_DIR):
+    # Kept beside the snapshot and keyed by the reviews and orders sources alone, so a rebuild caused by
+    # any other table reuses the index; doc ids are row positions, and reviews are stored in the
+    # purchase order of their orders, so only those two files can move them.
+    manifest = snapshot.read_manifest(snapshot_dir)
+    if manifest is None:
+        return build_index(reviews)
+    sources = manifest['sources']
+    version = f"v{snapshot.SNAPSHOT_VERSION}-{sources['reviews']['sha256'][:16]}-{sources['orders']['sha256'][:16]}"
+    root = os.path.join(snapshot_dir, INDEX_DIR)
+    target = os.path.join(root, version)
+    if not os.path.isdir(target):
+        # Each process builds under its own name; when two build the same version, the second rename loses.
+        tmp_target = f"{target}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_target, ignore_errors=True)
+        write_index(build_index(reviews), tmp_target)
+        try:
+            os.replace(tmp_target, target)
+        except OSError:
+            if not os.path.isdir(target):
+                raise
+            shutil.rmtree(tmp_target, ignore_errors=True)
+        # Only finished versions are stale; a *.tmp directory may be another process's build in progress.
+        for stale in os.listdir(root):
+            if stale != version and not stale.endswith(".tmp"):
+                shutil.rmtree(os.path.join(root, stale), ignore_errors=True)
+    return read_index(target)
+
+
+def facet_counts(pipe, docs):
+    # Each matching review counts once per distinct category in its order, as in category_quality.
+    hits = pipe["review_facets"].iloc[docs]
+    categories = hits[['order_id']].merge(pipe["order_categories"], on='order_id')['product_category_name_english']
+    return {
+        "product_category_name_english": categories.value_counts(),
+        "customer_state": hits['customer_state'].value_counts().loc[lambda counts: counts > 0],
+        "review_score": hits['review_score'].value_counts().sort_index(),
+    }
+
+
+def matching_reviews(pipe, docs, limit=50):
+    hits = pipe["review_facets"].iloc[docs[:limit]]
+    return hits[['review_score', 'customer_state']].join(pipe["fact_reviews"][TEXT_COLUMNS])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search review comments through the persisted inverted index.")
+    parser.add_argument("query", help='terms that must all match; "term*" matches a prefix')
+    parser.add_argument("--data-dir", default=snapshot.DATA_DIR)
+    parser.add_argument("--snapshot-dir", default=snapshot.SNAPSHOT_DIR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    key, tables = snapshot.load_snapshot(args.data_dir, args.snapshot_dir)
+    pipe = pipeline.Pipeline(tables, key)
+    index = ensure_index(tables["reviews"], args.snapshot_dir)
+    start = time.perf_counter()
+    docs = index.search(args.query)
+    print(f"{0 if docs is None else len(docs)} reviews in {(time.perf_counter() - start) * 1e3:.2f} ms")
+    if docs is not None and len(docs):
+        for counts in facet_counts(pipe, docs).values():
+            print(f"\n{counts.head(10).to_string()}")
+        print()
+        print(matching_reviews(pipe, docs, 10).to_string())
@@ -0,0 +1,134 @@
+import functools
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# Target relative standard error of distinct counts, and guaranteed relative error of quantiles.
+HLL_ERROR = float(os.environ.get("ECOMMERCE_HLL_ERROR", "0.01"))
+QUANTILE_ERROR = float(os.environ.get("ECOMMERCE_QUANTILE_ERROR", "0.01"))
+
+
+def hash_values(values):
+    # Stable 64-bit hashes, so sketches built in different chunks or processes agree on every value.
+    return pd.util.hash_array(np.asarray(values))
+
+
+# HyperLogLog with 2^p one-byte registers (2^14 = 16 kB at the default 1% error). Merging two sketches
+# is an element-wise max, so per-chunk, per-month and per-state sketches fold into any roll-up.
+class HyperLogLog:
+    def __init__(self, error=HLL_ERROR, registers=None):
+        p = min(18, max(4, math.ceil(math.log2((1.04 / error) ** 2))))
+        self.p = p if registers is None else int(math.log2(len(registers)))
+        self.registers = np.zeros(1 << self.p, dtype=np.uint8) if registers is None else registers
+
+    @property
+    def error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    @classmethod
+    def of(cls, values, error=HLL_ERROR):
+        sketch = cls(error)
+        sketch.add(values)
+        return sketch
+
+    def add(self, values):
+        hashes = hash_values(values)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Rank = leading zeros in the remaining 64 - p bits, plus one; frexp gives the bit length.
+        bit_length = np.where(rest > 0, np.frexp(rest.astype(np.float64))[1], 0)
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        if self.p != other.p:
+            raise ValueError(f"cannot merge HyperLogLog sketches of precision {self.p} and {other.p}")
+        return HyperLogLog(registers=np.maximum(self.registers, other.registers))
+
+    def __eq__(self, other):
+        return isinstance(other, HyperLogLog) and np.array_equal(self.registers, other.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            # Small cardinalities: linear counting over the empty registers is far more accurate.
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+# Quantiles with relative value error: magnitudes fall in logarithmic buckets of ratio
+# gamma = (1 + error) / (1 - error), and a bucket reports the value within `error` of all its members.
+# Counts are sparse (bucket -> count) per sign, so merging is adding counts (DDSketch).
+class QuantileSketch:
+    def __init__(self, error=QUANTILE_ERROR, positive=None, negative=None, zeros=0):
+        self.error = error
+        self.gamma = (1 + error) / (1 - error)
+        self.positive = pd.Series(dtype=np.int64) if positive is None else positive
+        self.negative = pd.Series(dtype=np.int64) if negative is None else negative
+        self.zeros = zeros
+
+    @classmethod
+    def of(cls, values, error=QUANTILE_ERROR):
+        sketch = cls(error)
+        sketch.add(values)
+        return sketch
+
+    def _counts(self, magnitudes):
+        return pd.Series(np.ceil(np.log(magnitudes) / math.log(self.gamma)).astype(np.int64)).value_counts()
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.positive = self.positive.add(self._counts(values[values > 0]), fill_value=0).astype(np.int64)
+        self.negative = self.negative.add(self._counts(-values[values < 0]), fill_value=0).astype(np.int64)
+        self.zeros += int(np.count_nonzero(values == 0))
+        return self
+
+    def merge(self, other):
+        if self.error != other.error:
+            raise ValueError(f"cannot merge quantile sketches with error {self.error} and {other.error}")
+        return QuantileSketch(
+            self.error,
+            self.positive.add(other.positive, fill_value=0).astype(np.int64),
+            self.negative.add(other.negative, fill_value=0).astype(np.int64),
+            self.zeros + other.zeros,
+        )
+
+    def __eq__(self, other):
+        return (isinstance(other, QuantileSketch) and self.error == other.error and self.zeros == other.zeros
+                and self.positive.sort_index().equals(other.positive.sort_index()) and self.negative.sort_index().equals(other.negative.sort_index()))
+
+    def count(self):
+        return int(self.positive.sum() + self.negative.sum()) + self.zeros
+
+    def quantile(self, q):
+        n = self.count()
+        if n == 0:
+            return float('nan')
+        # Representative values in ascending order: negatives by falling magnitude, zeros, positives.
+        negative, positive = self.negative.sort_index(ascending=False), self.positive.sort_index()
+        values = np.concatenate([-self._value(negative.index.to_numpy()), [0.0], self._value(positive.index.to_numpy())])
+        counts = np.concatenate([negative.to_numpy(), [self.zeros], positive.to_numpy()])
+        return float(values[np.searchsorted(np.cumsum(counts), q * (n - 1), side='right')])
+
+    def _value(self, buckets):
+        return 2 * self.gamma ** buckets.astype(np.float64) / (self.gamma + 1)
+
+    def median(self):
+        return self.quantile(0.5)
+
+
+def merge_all(sketches, empty):
+    # `empty` is a fresh sketch with the wanted error; it is also the result when there is nothing to merge.
+    return functools.reduce(lambda merged, sketch: merged.merge(sketch), sketches, empty)
+
+
+def sketch_by(df, by, column, make):
+    # One sketch per group; merge_all over any subset gives that subset's roll-up.
+    return df.groupby(by, observed=True, dropna=False)[column].apply(make)
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow.feather as feather
+
+import encoding
+import timeline
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get("ECOMMERCE_DATA_DIR", "E-Commerce")
+SNAPSHOT_DIR = os.environ.get("ECOMMERCE_SNAPSHOT_DIR", ".snapshot")
+MANIFEST = "manifest.json"
+# Bump whenever the on-disk layout or the ingest transforms change.
+SNAPSHOT_VERSION = 3
+# Tables are read on a bounded thread pool: the CSV parser and Arrow reads release the GIL for most
+# of their work, so threads overlap both downloads and parsing without copying frames between processes.
+LOAD_WORKERS = int(os.environ.get("ECOMMERCE_LOAD_WORKERS", "4"))
+# Source timestamps have one fixed layout; an explicit format skips per-column format inference.
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+
+TABLES = {
+    "payments": {
+        "file": "order_payments_dataset.csv",
+        "url": "https://drive.google.com/uc?id=113dmpJdb8hA8urg45nYkYXDWhdFvCBYL",
+        "parse_dates": [],
+        "date_format": None,
+    },
+    "customers": {
+        "file": "customers_dataset.csv",
+        "url": "https://drive.google.com/uc?id=1F2-guLBn-XsTf9TKg6lMrFYHZR_CZbpl",
+        "parse_dates": [],
+        "date_format": None,
+    },
+    "orders": {
+        "file": "orders_dataset.csv",
+        "url": "https://drive.google.com/uc?id=11CtVRGgAEmKYPFYmcDwbVLgpZg_smDfo",
+        "parse_dates": ["order_purchase_timestamp", "order_delivered_customer_date", "order_estimated_delivery_date", "order_approved_at", "order_delivered_carrier_date"],
+        "date_format": DATETIME_FORMAT,
+    },
+    "sellers": {
+        "file": "sellers_dataset.csv",
+        "url": "https://drive.google.com/uc?id=1hWy1kOf2X6dr2gaP5DuanPqyjNdYuxui",
+        "parse_dates": [],
+        "date_format": None,
+    },
+    "products": {
+        "file": "products_dataset.csv",
+        "url": "https://drive.google.com/uc?id=14BWKVgA4HuRRat8BJxkYIJA6A0pcw0Kr",
+        "parse_dates": [],
+        "date_format": None,
+    },
+    "order_items": {
+        "file": "order_items_dataset.csv",
+        "url": "https://drive.google.com/uc?id=1dtiJfdrUDZoduKu-y29j_BSoi4uwwcAE",
+        "parse_dates": ["shipping_limit_date"],
+        "date_format": DATETIME_FORMAT,
+    },
+    "reviews": {
+        "file": "order_reviews_dataset.csv",
+        "url": "https://drive.google.com/uc?id=1JAge-xr3SkoTI-_wPpW7gHQaanZ-DWMF",
+        "parse_dates": [],
+        "date_format": None,
+    },
+    "cat_trans": {
+        "file": "product_category_name_translation.csv",
+        "url": "https://drive.google.com/uc?id=1gLiDRqex2oFmE62t2hMXlRJUxv6kjLZ5",
+        "parse_dates": [],
+        "date_format": None,
+    },
+    "deals": {
+        "file": "closed_deals_dataset.csv",
+        "url": "https://drive.google.com/uc?id=1Y-nwkv9D91luGetDrVanJQpPrPLyQnY9",
+        "parse_dates": ["won_date"],
+        "date_format": DATETIME_FORMAT,
+    },
+    "leads": {
+        "file": "marketing_qualified_leads_dataset.csv",
+        "url": "https://drive.google.com/uc?id=1Ec2sgXZG4JMWlcHzg5NbDUrXw6okdSBa",
+        "parse_dates": ["first_contact_date"],
+        "date_format": DATE_FORMAT,
+    },
+}
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(snapshot_dir, manifest):
+    tmp_path = os.path.join(snapshot_dir, MANIFEST + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(snapshot_dir, MANIFEST))
+
+
+def source_states(data_dir=DATA_DIR, previous=None):
+    previous = (previous or {}).get("sources", {})
+    states = {}
+    for name, spec in TABLES.items():
+        path = os.path.join(data_dir, spec["file"])
+        if not os.path.exists(path):
+            if name in previous and previous[name]["source"] == spec["url"]:
+                states[name] = previous[name]
+            else:
+                states[name] = {"source": spec["url"], "sha256": None}
+            continue
+        stat = os.stat(path)
+        old = previous.get(name)
+        # Only rehash when the file looks touched; the checksum decides whether it actually changed.
+        if old and old["source"] == path and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+            states[name] = old
+        else:
+            states[name] = {"source": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_checksum(path)}
+    return states
+
+
+def fingerprint(states):
+    digest = hashlib.sha256(f"v{SNAPSHOT_VERSION}\n".encode())
+    for name in sorted(states):
+        digest.update(f"{name}:{states[name]['sha256']}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def csv_options(name):
+    spec = TABLES[name]
+    return {"parse_dates": spec["parse_dates"], "date_format": spec["date_format"], "encoding": "utf-8-sig"}
+
+
+def read_source(name, source):
+    try:
+        return pd.read_csv(source, **csv_options(name))
+    except urllib.error.URLError as e:
+        raise FileNotFoundError(f"{TABLES[name]['file']} ({e.reason})") from e
+
+
+def _timed(load, name):
+    start = time.perf_counter()
+    return load(name), time.perf_counter() - start
+
+
+def load_parallel(load, names, max_workers=LOAD_WORKERS, timings=None):
+    # Cold start approaches the slowest single table instead of the sum of all of them.
+    # `timings` (if given) receives per-table seconds plus the wall time of the whole load.
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="load") as executor:
+        futures = {name: executor.submit(_timed, load, name) for name in names}
+        tables = {}
+        for name, future in futures.items():
+            tables[name], seconds = future.result()
+            if timings is not None:
+                timings[name] = seconds
+            logger.debug("loaded %s in %.3fs", name, seconds)
+    wall = time.perf_counter() - start
+    if timings is not None:
+        timings["total"] = wall
+    logger.info("loaded %d tables in %.3fs on %d workers", len(tables), wall, max_workers)
+    return tables
+
+
+def read_sources(sources, max_workers=LOAD_WORKERS, timings=None):
+    return load_parallel(lambda name: read_source(name, sources[name]), sources, max_workers, timings)
+
+
+def build_snapshot(data_dir=DATA_DIR, snapshot_dir=SNAPSHOT_DIR, states=None):
+    states = states or source_states(data_dir)
+    tables = read_sources({name: state["source"] for name, state in states.items()})
+    for name, state in states.items():
+        if state["sha256"] is None:
+            # Remote sources have no file to stat, so fingerprint the downloaded content instead.
+            state["sha256"] = hashlib.sha256(pd.util.hash_pandas_object(tables[name]).values.tobytes()).hexdigest()
+    tables, vocabularies, memory = encoding.encode_tables(tables)
+    tables = timeline.sort_tables(tables)
+    key = fingerprint(states)
+    target = os.path.join(snapshot_dir, key)
+    tmp_target = target + ".tmp"
+    shutil.rmtree(tmp_target, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_target, "vocab"))
+    for name, df in tables.items():
+        feather.write_feather(df, os.path.join(tmp_target, name + ".arrow"), compression="uncompressed")
+    for domain, vocabulary in vocabularies.items():
+        feather.write_feather(vocabulary.to_frame(index=False), os.path.join(tmp_target, "vocab", domain + ".arrow"), compression="uncompressed")
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_target, target)
+
+    previous = read_manifest(snapshot_dir)
+    _write_manifest(snapshot_dir, {"fingerprint": key, "sources": states, "memory": memory})
+    if previous and previous["fingerprint"] != key:
+        shutil.rmtree(os.path.join(snapshot_dir, previous["fingerprint"]), ignore_errors=True)
+    logger.info("built snapshot %s from %s", key, data_dir)
+    return key
+
+
+def ensure_snapshot(data_dir=DATA_DIR, snapshot_dir=SNAPSHOT_DIR):
+    manifest = read_manifest(snapshot_dir)
+    states = source_states(data_dir, manifest)
+    if manifest and None not in (s["sha256"] for s in states.values()):
+        key = fingerprint(states)
+        if key == manifest["fingerprint"] and os.path.isdir(os.path.join(snapshot_dir, key)):
+            if states != manifest["sources"]:
+                _write_manifest(snapshot_dir, dict(manifest, sources=states))
+            return key
+    os.makedirs(snapshot_dir, exist_ok=True)
+    return build_snapshot(data_dir, snapshot_dir, states)
+
+
+def read_table(key, name, snapshot_dir=SNAPSHOT_DIR):
+    table = feather.read_table(os.path.join(snapshot_dir, key, name + ".arrow"), memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def read_vocabulary(key, domain, snapshot_dir=SNAPSHOT_DIR):
+    table = feather.read_table(os.path.join(snapshot_dir, key, "vocab", domain + ".arrow"), memory_map=True)
+    return pd.Index(table.column(0).to_numpy(zero_copy_only=False), name=domain)
+
+
+def read_tables(key, snapshot_dir=SNAPSHOT_DIR, max_workers=LOAD_WORKERS, timings=None):
+    return load_parallel(lambda name: read_table(key, name, snapshot_dir), TABLES, max_workers, timings)
+
+
+def load_snapshot(data_dir=DATA_DIR, snapshot_dir=SNAPSHOT_DIR):
+    key = ensure_snapshot(data_dir, snapshot_dir)
+    return key, read_tables(key, snapshot_dir)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    key = ensure_snapshot()
+    memory = read_manifest()["memory"]
+    for name, usage in memory.items():
+        print(f"{name:<12} {usage['before'] / 1e6:>8.2f} MB -> {usage['after'] / 1e6:>8.2f} MB")
+    print(f"{'total':<12} {sum(u['before'] for u in memory.values()) / 1e6:>8.2f} MB -> {sum(u['after'] for u in memory.values()) / 1e6:>8.2f} MB")
@@ -0,0 +1,362 @@
+"""DuckDB backend for the pipeline nodes in SQL_NODES; every other node falls back to pandas.
+
+The SQL only covers the unfiltered nodes. Widget filters (category, state, minimum reviews, ...)
+run in pandas on the node results through views.select and its row indexes. A date window
+registers the iloc slices that Pipeline.window cuts from the purchase-ordered tables instead of
+pushing a WHERE on the purchase timestamp into the queries. Both select the same rows a SQL
+filter would; tests/test_sql_parity.py checks nodes, windows and figures against pandas.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+import cube
+import pipeline
+from complaints import classify_complaints
+
+logger = logging.getLogger(__name__)
+
+SQL_NODES = {}
+
+
+# A SQL node runs against the snapshot tables registered in the engine. Its deps are pipeline
+# nodes (built by whichever backend owns them) registered as views before the query runs.
+def sql_node(*deps):
+    def register(fn):
+        SQL_NODES[fn.__name__] = (fn, deps)
+        return fn
+    return register
+
+
+def connect():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("the SQL backend needs duckdb (pip install duckdb)") from e
+    return duckdb.connect()
+
+
+class SqlPipeline(pipeline.Pipeline):
+    backend = "duckdb"
+
+    def __init__(self, tables, snapshot_id):
+        super().__init__(tables, snapshot_id)
+        self.con = connect()
+        # Registration is zero-copy: the engine scans the (memory-mapped) frames in place.
+        for name, df in tables.items():
+            self.con.register(name, df)
+
+    def build(self, name):
+        if name not in SQL_NODES:
+            return super().build(name)
+        fn, deps = SQL_NODES[name]
+        for dep in deps:
+            self.con.register(dep, self.get(dep))
+        return fn(self.con)
+
+
+BACKENDS = {"pandas": pipeline.Pipeline, "duckdb": SqlPipeline}
+
+
+def query(con, sql, *params):
+    return con.execute(sql, list(params)).df()
+
+
+def hours_between(start, end):
+    return f"(epoch({end}) - epoch({start})) / 3600"
+
+
+def bin_case(column, bins):
+    # Same buckets as pd.cut(..., right=False, labels=False); values outside every bin stay NULL.
+    whens = " ".join(f"WHEN {column} >= {lo} AND {column} < {hi} THEN {i}" for i, (lo, hi) in enumerate(zip(bins, bins[1:])) if hi != float('inf'))
+    last = len(bins) - 2
+    if bins[-1] == float('inf'):
+        whens += f" WHEN {column} >= {bins[-2]} THEN {last}"
+    return f"CASE {whens} END"
+
+
+ORDER_CATEGORIES = """
+    SELECT DISTINCT i.order_id, d.product_category_name_english
+    FROM order_items i
+    JOIN products p USING (product_id)
+    JOIN dim_category d ON p.product_category_name = d.product_category_name
+    WHERE d.product_category_name_english IS NOT NULL
+"""
+
+# df_analysis without the row-level frame: delivered orders joined to their items, same dropna.
+ANALYSIS = f"""
+    SELECT
+        c.customer_state,
+        d.product_category_name_english,
+        date_trunc('month', o.order_purchase_timestamp) AS month,
+        {hours_between('o.order_estimated_delivery_date', 'o.order_delivered_customer_date')} / 24 AS days_late,
+        {hours_between('i.shipping_limit_date', 'o.order_delivered_carrier_date')} / 24 AS seller_dispatch_days_late,
+        o.order_delivered_carrier_date > i.shipping_limit_date AS is_seller_late,
+        {hours_between('o.order_purchase_timestamp', 'o.order_approved_at')} AS order_processing_time,
+        {hours_between('o.order_approved_at', 'o.order_delivered_carrier_date')} AS seller_lead_time,
+        {hours_between('o.order_delivered_carrier_date', 'o.order_delivered_customer_date')} AS shipping_time
+    FROM orders o
+    LEFT JOIN customers c USING (customer_id)
+    JOIN order_items i USING (order_id)
+    LEFT JOIN products p USING (product_id)
+    LEFT JOIN dim_category d ON p.product_category_name = d.product_category_name
+    WHERE o.order_status = 'delivered'
+        AND o.order_purchase_timestamp IS NOT NULL
+        AND o.order_approved_at IS NOT NULL
+        AND o.order_delivered_carrier_date IS NOT NULL
+        AND o.order_delivered_customer_date IS NOT NULL
+        AND o.order_estimated_delivery_date IS NOT NULL
+        AND i.shipping_limit_date IS NOT NULL
+        AND d.product_category_name_english IS NOT NULL
+"""
+
+DELIVERY_KPIS = """
+    avg(CASE WHEN days_late > 0 THEN 1.0 ELSE 0.0 END) * 100 AS late_rate,
+    avg(CASE WHEN is_seller_late THEN 1.0 ELSE 0.0 END) * 100 AS seller_late_rate,
+    avg(CASE WHEN days_late > 0 THEN days_late END) AS avg_days_late
+"""
+
+FREIGHT = """
+    SELECT i.freight_value, i.price, r.review_score
+    FROM order_items i
+    JOIN products p USING (product_id)
+    JOIN dim_category d ON p.product_category_name = d.product_category_name
+    JOIN (SELECT order_id, avg(review_score) AS review_score FROM reviews GROUP BY order_id) r USING (order_id)
+    WHERE i.freight_value IS NOT NULL AND i.price IS NOT NULL AND r.review_score IS NOT NULL
+        AND d.product_category_name_english IS NOT NULL
+"""
+
+
+@sql_node()
+def headline_stats(con):
+    stats = query(con, """
+        SELECT
+            (SELECT sum(payment_value) FROM payments) AS total_revenue,
+            (SELECT count(DISTINCT customer_unique_id) FROM customers) AS total_customers,
+            (SELECT count(DISTINCT order_id) FROM orders) AS total_orders,
+            (SELECT count(DISTINCT seller_id) FROM sellers) AS total_sellers,
+            (SELECT count(DISTINCT product_id) FROM products) AS total_products
+    """)
+    return stats.to_dict('records')[0]
+
+
+@sql_node("dim_category")
+def order_categories(con):
+    return query(con, ORDER_CATEGORIES)
+
+
+@sql_node()
+def monthly_revenue(con):
+    return query(con, """
+        SELECT date_trunc('month', o.order_purchase_timestamp) AS month, sum(p.payment_value) AS payment_value
+        FROM orders o
+        JOIN (SELECT order_id, sum(payment_value) AS payment_value FROM payments GROUP BY order_id) p USING (order_id)
+        WHERE o.order_purchase_timestamp IS NOT NULL
+        GROUP BY month
+        ORDER BY month
+    """)
+
+
+@sql_node("dim_category")
+def category_quality(con):
+    return query(con, f"""
+        SELECT oc.product_category_name_english, avg(r.review_score) AS average_score, count(r.review_score) AS review_count
+        FROM reviews r
+        JOIN ({ORDER_CATEGORIES}) oc USING (order_id)
+        GROUP BY oc.product_category_name_english
+        ORDER BY oc.product_category_name_english
+    """)
+
+
+# The score and comment filters run in the engine; only the low-score rows reach the classifier.
+@sql_node()
+def low_score_reviews(con):
+    low_score_reviews_all = query(con, """
+        SELECT r.review_id, r.order_id, r.review_score, r.review_comment_message, r.review_comment_message_en
+        FROM reviews r
+        LEFT JOIN orders o USING (order_id)
+        WHERE r.review_comment_message IS NOT NULL AND r.review_comment_message_en IS NOT NULL
+        QUALIFY row_number() OVER (PARTITION BY r.review_id ORDER BY o.order_purchase_timestamp NULLS LAST, r.order_id) = 1
+            AND r.review_score <= 2
+    """)
+    low_score_reviews_all['complaint_category'] = classify_complaints(low_score_reviews_all['review_comment_message'])
+    return low_score_reviews_all
+
+
+@sql_node("low_score_reviews", "dim_category")
+def low_score_review_categories(con):
+    return query(con, f"""
+        SELECT l.*, oc.product_category_name_english
+        FROM low_score_reviews l
+        JOIN ({ORDER_CATEGORIES}) oc USING (order_id)
+    """)
+
+
+@sql_node("dim_category")
+def delivery_summary(con):
+    summary = query(con, f"""
+        SELECT {DELIVERY_KPIS},
+            count(*) FILTER (WHERE days_late > 0) AS late_orders_count,
+            avg(order_processing_time) AS order_processing_time,
+            avg(seller_lead_time) AS seller_lead_time,
+            avg(shipping_time) AS shipping_time
+        FROM ({ANALYSIS})
+    """)
+    return {name: summary[name].iloc[0].item() for name in pipeline.DELIVERY_KPIS}
+
+
+@sql_node("dim_category")
+def monthly_performance(con):
+    return query(con, f"SELECT month, {DELIVERY_KPIS} FROM ({ANALYSIS}) GROUP BY month ORDER BY month")
+
+
+@sql_node("dim_category")
+def lead_times_by_state(con):
+    return query(con, f"""
+        SELECT customer_state,
+            avg(order_processing_time) AS order_processing_time,
+            avg(seller_lead_time) AS seller_lead_time,
+            avg(shipping_time) AS shipping_time
+        FROM ({ANALYSIS})
+        WHERE customer_state IS NOT NULL
+        GROUP BY customer_state
+        ORDER BY customer_state
+    """).set_index('customer_state')
+
+
+LATE_EXPRESSIONS = {
+    "customer": ("days_late > 0", "days_late"),
+    "seller": ("is_seller_late", "seller_dispatch_days_late"),
+}
+
+
+@sql_node("dim_category")
+def lateness_cube(con):
+    measures = []
+    for prefix, (late, days_late) in LATE_EXPRESSIONS.items():
+        lateness_bin = bin_case(f"CASE WHEN {late} THEN {days_late} END", cube.LATENESS_BINS)
+        measures += [
+            f'count(*) FILTER (WHERE {late}) AS "{prefix}_late"',
+            f'count(*) FILTER (WHERE NOT ({late})) AS "{prefix}_on_time"',
+        ]
+        measures += [f'count(*) FILTER (WHERE {lateness_bin} = {i}) AS "{prefix}_late_{label}"' for i, label in enumerate(cube.LATENESS_LABELS)]
+    keys = ", ".join(cube.CUBE_KEYS)
+    cells = query(con, f"SELECT {keys}, {', '.join(measures)} FROM ({ANALYSIS}) GROUP BY {keys} ORDER BY {keys}")
+    return cells.set_index(cube.CUBE_KEYS).astype(np.int32)
+
+
+@sql_node("dim_category")
+def freight_ratio(con):
+    median_freight_value, median_price_value = query(con, f"SELECT median(freight_value), median(price) FROM ({FREIGHT})").iloc[0]
+    if median_price_value > 0:
+        return (median_freight_value / median_price_value) * 100
+    return 0
+
+
+@sql_node("dim_category")
+def review_by_freight(con):
+    freight_bin = bin_case("freight_value", pipeline.FREIGHT_BINS)
+    result = query(con, f"""
+        SELECT {freight_bin} AS bin, avg(review_score) AS review_score
+        FROM ({FREIGHT})
+        WHERE {freight_bin} IS NOT NULL
+        GROUP BY bin
+        ORDER BY bin
+    """)
+    labels = pd.Categorical.from_codes(result['bin'], categories=pipeline.FREIGHT_LABELS, ordered=True)
+    return pd.DataFrame({'freight_bin': labels, 'review_score': result['review_score']})
+
+
+@sql_node("dim_category")
+def top_categories(con):
+    return query(con, f"""
+        SELECT product_category_name_english AS "Kategori", count(*) AS "Jumlah Pesanan"
+        FROM ({ORDER_CATEGORIES})
+        GROUP BY product_category_name_english
+        ORDER BY "Jumlah Pesanan" DESC, "Kategori"
+        LIMIT 10
+    """)
+
+
+# Segment labels are formatted in Python, so the engine counts raw segments and pandas relabels the few rows.
+@sql_node()
+def top_segments(con):
+    counts = query(con, """
+        SELECT CAST(business_segment AS VARCHAR) AS segment, count(*) AS n
+        FROM deals
+        WHERE business_segment IS NOT NULL
+        GROUP BY segment
+    """)
+    counts['segment'] = counts['segment'].apply(pipeline.format_snake_case)
+    top_segments = counts.groupby('segment')['n'].sum().sort_values(ascending=False, kind='stable').head(10).reset_index()
+    top_segments.columns = ['Business Segment', 'Jumlah Seller']
+    return top_segments
+
+
+@sql_node()
+def lead_type_proportions(con):
+    counts = query(con, """
+        SELECT CAST(lead_type AS VARCHAR) AS lead_type, count(*) AS n
+        FROM deals
+        WHERE lead_type IS NOT NULL
+        GROUP BY lead_type
+        ORDER BY n, lead_type
+    """).set_index('lead_type')['n']
+    return (counts / counts.sum()).rename('count')
+
+
+@sql_node()
+def avg_conversion(con):
+    return query(con, """
+        SELECT CAST(l.origin AS VARCHAR) AS origin, avg(floor((epoch(d.won_date) - epoch(l.first_contact_date)) / 86400)) AS conversion_days
+        FROM deals d
+        LEFT JOIN leads l USING (mql_id)
+        WHERE l.origin IS NOT NULL
+        GROUP BY l.origin
+        ORDER BY conversion_days DESC
+    """)
+
+
+def _sorted(df):
+    df = df.astype({column: object for column in df.columns if not pd.api.types.is_numeric_dtype(df[column])})
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def same_result(expected, actual, rtol=1e-9):
+    # Identical up to float summation order; row order is ignored where the pandas path leaves ties unordered.
+    if isinstance(expected, dict):
+        return expected.keys() == actual.keys() and all(same_result(expected[k], actual[k], rtol) for k in expected)
+    if isinstance(expected, pd.Series):
+        return same_result(expected.rename_axis('key').reset_index(name='value'), actual.rename_axis('key').reset_index(name='value'), rtol)
+    if isinstance(expected, pd.DataFrame):
+        # Named indexes are data (a group key); unnamed ones are leftover row labels.
+        expected, actual = expected.reset_index(drop=expected.index.names == [None]), actual.reset_index(drop=actual.index.names == [None])
+        try:
+            pd.testing.assert_frame_equal(_sorted(expected), _sorted(actual), check_dtype=False, rtol=rtol)
+        except AssertionError:
+            return False
+        return True
+    if isinstance(expected, (list, tuple, np.ndarray)):
+        expected, actual = np.asarray(expected), np.asarray(actual)
+        if expected.shape != actual.shape:
+            return False
+        if expected.dtype.kind in "fiu" and actual.dtype.kind in "fiu":
+            return bool(np.allclose(expected, actual, rtol=rtol, atol=0, equal_nan=True))
+        return all(same_result(e, a, rtol) for e, a in zip(expected.ravel(), actual.ravel()))
+    if isinstance(expected, (float, np.floating)) and isinstance(actual, (int, float, np.number)):
+        return bool(np.isclose(expected, actual, rtol=rtol, atol=0, equal_nan=True))
+    return bool(expected == actual) or (pd.isna(expected) and pd.isna(actual))
+
+
+def compare(pandas_pipe, sql_pipe, names=None):
+    return {name: same_result(pandas_pipe[name], sql_pipe[name]) for name in names or SQL_NODES}
+
+
+def same_figure(expected, actual, rtol=1e-9):
+    if expected is None or actual is None:
+        return expected is None and actual is None
+    # Traces keep their numpy arrays here; to_dict() would hand back base64-packed buffers.
+    return len(expected.data) == len(actual.data) and all(
+        same_result(e.to_plotly_json(), a.to_plotly_json(), rtol) for e, a in zip(expected.data, actual.data)
+    ) and same_result(expected.layout.to_plotly_json(), actual.layout.to_plotly_json(), rtol)
@@ -0,0 +1,222 @@
+import argparse
+import glob
+import logging
+import math
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import cube
+import pipeline
+import sketches
+import snapshot
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = int(os.environ.get("ECOMMERCE_CHUNK_ROWS", "200000"))
+# Target size of one on-disk partition; a partition is the unit that is joined in memory.
+PARTITION_BYTES = int(os.environ.get("ECOMMERCE_PARTITION_MB", "128")) << 20
+STREAMED_TABLES = ["orders", "order_items", "payments", "reviews"]
+AGGREGATES = ["monthly_revenue", "monthly_performance", "category_quality", "lateness_cube", "review_by_freight", "top_categories"]
+# Folded by merging per-group sketches, so partitions and months combine without keeping raw values.
+SKETCHES = ["order_sketches", "freight_sketches"]
+
+
+def read_chunks(data_dir, name, chunk_rows=CHUNK_ROWS):
+    return pd.read_csv(os.path.join(data_dir, snapshot.TABLES[name]["file"]), chunksize=chunk_rows, **snapshot.csv_options(name))
+
+
+def partition_of(keys, n_partitions):
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy() % n_partitions
+
+
+def spill(chunks, key, n_partitions, spill_dir, name, tag=""):
+    # Scatter rows into on-disk partitions by key hash, one file per (chunk, partition). An empty
+    # slice of the first chunk is kept as a template so empty partitions still carry the dtypes.
+    for i, chunk in enumerate(chunks):
+        template = os.path.join(spill_dir, f"{name}.template.arrow")
+        if not os.path.exists(template):
+            chunk.iloc[:0].reset_index(drop=True).to_feather(template)
+        for partition, piece in chunk.groupby(partition_of(chunk[key], n_partitions)):
+            piece.reset_index(drop=True).to_feather(os.path.join(spill_dir, f"{name}-{partition:05d}-{tag}{i:06d}.arrow"))
+
+
+def read_partition(spill_dir, name, partition):
+    paths = sorted(glob.glob(os.path.join(spill_dir, f"{name}-{partition:05d}-*.arrow")))
+    if not paths:
+        return pd.read_feather(os.path.join(spill_dir, f"{name}.template.arrow"))
+    return pd.concat([pd.read_feather(path) for path in paths], ignore_index=True)
+
+
+def default_partitions(data_dir):
+    size = sum(os.path.getsize(os.path.join(data_dir, snapshot.TABLES[name]["file"])) for name in STREAMED_TABLES + ["customers"])
+    return max(1, math.ceil(size / PARTITION_BYTES))
+
+
+def partial_aggregates(orders, order_items, payments, reviews, dim_product):
+    # Every order's items, payments and reviews share its partition, so the regular pipeline nodes
+    # apply unchanged; only the final reductions are split into foldable sums and counts.
+    dim_customer = orders[['customer_id', 'customer_unique_id', 'customer_state']].drop_duplicates('customer_id')
+    fact_orders = pipeline.fact_orders(orders.drop(columns=['customer_unique_id', 'customer_state']), dim_customer, reviews, payments)
+    fact_order_items = pipeline.fact_order_items(order_items, dim_product)
+    order_categories = pipeline.order_categories(fact_order_items)
+    review_categories = pipeline.fact_reviews(reviews)[['order_id', 'review_score']].merge(order_categories, on='order_id')
+    freight_analysis = pipeline.freight_analysis(fact_order_items, fact_orders)
+    df_analysis = pipeline.df_analysis(fact_orders, fact_order_items)
+    return {
+        "monthly_revenue": pipeline.monthly_revenue(fact_orders),
+        "monthly_performance": df_analysis.groupby('month').agg(
+            rows=('is_late', 'size'),
+            late=('is_late', 'sum'),
+            seller_late=('is_seller_late', 'sum'),
+            days_late_sum=('late_days_late', 'sum'),
+            days_late_count=('late_days_late', 'count'),
+        ),
+        "category_quality": review_categories.groupby('product_category_name_english').agg(score_sum=('review_score', 'sum'), review_count=('review_score', 'count')),
+        "lateness_cube": cube.build_lateness_cube(df_analysis),
+        "review_by_freight": freight_analysis.groupby('freight_bin', observed=False).agg(score_sum=('review_score', 'sum'), review_count=('review_score', 'count')),
+        "top_categories": order_categories['product_category_name_english'].value_counts(),
+        "order_sketches": pipeline.order_sketches(fact_orders),
+        "freight_sketches": pipeline.freight_sketches(freight_analysis),
+    }
+
+
+def fold_sketches(groups, empty):
+    levels = list(range(groups.index.nlevels))
+    return groups.groupby(level=levels, dropna=False).agg(lambda group: sketches.merge_all(group, empty))
+
+
+def fold(partials):
+    # Partials are tiny (one row per month, category, bin or cube cell), so folding them keeps memory flat.
+    monthly_revenue = pd.concat(p["monthly_revenue"] for p in partials).groupby('month')['payment_value'].sum().reset_index()
+
+    performance = pd.concat(p["monthly_performance"] for p in partials).groupby(level=0).sum()
+    monthly_performance = pd.DataFrame({
+        'late_rate': performance['late'] / performance['rows'] * 100,
+        'seller_late_rate': performance['seller_late'] / performance['rows'] * 100,
+        'avg_days_late': performance['days_late_sum'] / performance['days_late_count'].where(performance['days_late_count'] > 0),
+    }).rename_axis('month').reset_index()
+
+    category_quality = pd.concat(p["category_quality"] for p in partials).groupby(level=0).sum()
+    category_quality = pd.DataFrame({
+        'average_score': category_quality['score_sum'] / category_quality['review_count'],
+        'review_count': category_quality['review_count'],
+    }).rename_axis('product_category_name_english').reset_index()
+
+    lateness_cube = pd.concat(p["lateness_cube"] for p in partials)
+    lateness_cube = lateness_cube.groupby(level=cube.CUBE_KEYS, observed=True, dropna=False).sum().astype(np.int32)
+
+    freight = pd.concat(p["review_by_freight"] for p in partials).groupby(level=0, observed=False).sum()
+    review_by_freight = (freight['score_sum'] / freight['review_count'].where(freight['review_count'] > 0)).rename('review_score').reset_index().dropna()
+
+    top_categories = pd.concat(p["top_categories"] for p in partials).groupby(level=0).sum()
+    top_categories = top_categories.sort_values(ascending=False, kind='stable').head(10).reset_index()
+    top_categories.columns = ['Kategori', 'Jumlah Pesanan']
+
+    order_sketches = fold_sketches(pd.concat(p["order_sketches"] for p in partials), sketches.HyperLogLog())
+    freight_sketches = {column: fold_sketches(pd.concat(p["freight_sketches"][column] for p in partials), sketches.QuantileSketch())
+                        for column in ['freight_value', 'price']}
+
+    return {
+        "monthly_revenue": monthly_revenue,
+        "monthly_performance": monthly_performance,
+        "category_quality": category_quality,
+        "lateness_cube": lateness_cube,
+        "review_by_freight": review_by_freight,
+        "top_categories": top_categories,
+        "order_sketches": order_sketches,
+        "freight_sketches": freight_sketches,
+    }
+
+
+def aggregate(data_dir=snapshot.DATA_DIR, n_partitions=None, chunk_rows=CHUNK_ROWS, spill_dir=None):
+    n_partitions = n_partitions or default_partitions(data_dir)
+    own_spill_dir = spill_dir is None
+    spill_dir = spill_dir or tempfile.mkdtemp(prefix="ecommerce-spill-")
+    by_customer = os.path.join(spill_dir, "by_customer")
+    by_order = os.path.join(spill_dir, "by_order")
+    os.makedirs(by_customer, exist_ok=True)
+    os.makedirs(by_order, exist_ok=True)
+    try:
+        # The small dimensions stay in memory; orders and customers are joined partition by partition
+        # on customer_id, then everything is repartitioned on order_id.
+        dim_product = pipeline.dim_product(
+            pd.read_csv(os.path.join(data_dir, snapshot.TABLES["products"]["file"]), usecols=['product_id', 'product_category_name'], encoding="utf-8-sig"),
+            pipeline.dim_category(pd.read_csv(os.path.join(data_dir, snapshot.TABLES["cat_trans"]["file"]), encoding="utf-8-sig")),
+        )
+        spill(read_chunks(data_dir, "orders", chunk_rows), 'customer_id', n_partitions, by_customer, "orders")
+        spill(read_chunks(data_dir, "customers", chunk_rows), 'customer_id', n_partitions, by_customer, "customers")
+        for partition in range(n_partitions):
+            customers = read_partition(by_customer, "customers", partition)[['customer_id', 'customer_unique_id', 'customer_state']]
+            orders = read_partition(by_customer, "orders", partition).merge(customers, on='customer_id', how='left')
+            spill([orders], 'order_id', n_partitions, by_order, "orders", tag=f"{partition:05d}-")
+        shutil.rmtree(by_customer)
+        for name in STREAMED_TABLES[1:]:
+            spill(read_chunks(data_dir, name, chunk_rows), 'order_id', n_partitions, by_order, name)
+
+        partials = []
+        for partition in range(n_partitions):
+            tables = {name: read_partition(by_order, name, partition) for name in STREAMED_TABLES}
+            partials.append(partial_aggregates(**tables, dim_product=dim_product))
+        logger.info("folded %d partitions of %s", n_partitions, data_dir)
+        return fold(partials)
+    finally:
+        if own_spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+
+def comparable(df):
+    if isinstance(df.index, pd.MultiIndex):
+        df = df.reset_index()
+    keys = [column for column in df.columns if not pd.api.types.is_numeric_dtype(df[column])]
+    return df.astype({column: object for column in keys}).sort_values(keys).reset_index(drop=True)
+
+
+def verify(streamed, pipe):
+    # Compares against the in-memory pipeline; floats only differ by summation order.
+    mismatches = {}
+    for name in AGGREGATES:
+        try:
+            pd.testing.assert_frame_equal(comparable(pipe[name]), comparable(streamed[name]), check_dtype=False, rtol=1e-9)
+        except AssertionError as e:
+            mismatches[name] = str(e)
+    # Merging is lossless, so folded quantile sketches equal the ones built over all rows at once. Order ids
+    # are hashed as raw strings here but as snapshot codes in the pipeline, so only the estimate is compared.
+    for column in ['freight_value', 'price']:
+        if sketches.merge_all(streamed["freight_sketches"][column], sketches.QuantileSketch()) != sketches.merge_all(pipe["freight_sketches"][column], sketches.QuantileSketch()):
+            mismatches["freight_sketches"] = f"merged {column} sketch differs from the sketch over all rows"
+    orders = sketches.merge_all(streamed["order_sketches"], sketches.HyperLogLog())
+    exact = pipe["headline_stats"]["total_orders"]
+    if abs(orders.count() / exact - 1) > 3 * orders.error:
+        mismatches["order_sketches"] = f"{orders.count()} distinct orders estimated, {exact} exact"
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the dashboard aggregates from CSV files in bounded memory.")
+    parser.add_argument("--data-dir", default=snapshot.DATA_DIR)
+    parser.add_argument("--partitions", type=int, help="number of on-disk partitions (default: source size / ECOMMERCE_PARTITION_MB)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--out", help="write each aggregate as <out>/<name>.arrow")
+    parser.add_argument("--verify", action="store_true", help="compare against the in-memory pipeline")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    aggregates = aggregate(args.data_dir, args.partitions, args.chunk_rows)
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        for name in AGGREGATES:
+            df = aggregates[name]
+            (df.reset_index() if name == "lateness_cube" else df).to_feather(os.path.join(args.out, name + ".arrow"))
+    if args.verify:
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            key, tables = snapshot.load_snapshot(args.data_dir, snapshot_dir)
+            mismatches = verify(aggregates, pipeline.Pipeline(tables, key))
+        for name in AGGREGATES + SKETCHES:
+            print(f"{name:<20} {'MISMATCH' if name in mismatches else 'ok'}")
+            if name in mismatches:
+                print(mismatches[name])
+        raise SystemExit(1 if mismatches else 0)
@@ -0,0 +1,234 @@
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+
+logger = logging.getLogger(__name__)
+
+STATES = ["SP", "RJ", "MG", "RS", "PR", "SC", "BA", "DF", "ES", "GO", "PE", "CE", "PA", "MT", "MA", "MS", "PB", "PI", "RN", "AL", "SE", "TO", "RO", "AM", "AC", "AP", "RR"]
+STATE_WEIGHTS = np.array([42, 13, 12, 5.5, 5, 3.6, 3.4, 2.1, 2, 2, 1.7, 1.3, 1, .9, .7, .7, .5, .5, .5, .4, .35, .3, .25, .15, .08, .07, .05])
+ORDER_STATUS = ["delivered", "shipped", "canceled", "unavailable", "invoiced", "processing", "created", "approved"]
+ORDER_STATUS_WEIGHTS = np.array([97.0, 1.1, .6, .6, .3, .3, .05, .05])
+PAYMENT_TYPES = ["credit_card", "boleto", "voucher", "debit_card"]
+PAYMENT_TYPE_WEIGHTS = np.array([74, 19, 5.5, 1.5])
+ORIGINS = ["organic_search", "paid_search", "social", "unknown", "direct_traffic", "email", "referral", "other", "display", "other_publicities"]
+LEAD_TYPES = ["online_medium", "online_big", "industry", "offline", "online_small", "online_beginner", "online_top", "other"]
+SEGMENTS = ["home_decor", "health_beauty", "car_accessories", "household_utilities", "construction_tools_house_garden", "audio_video_electronics", "computers", "pet", "food_supplement", "toys", "sports"]
+
+COMMENTS = [
+    ("o produto ainda não chegou e o prazo já passou", "the product has not arrived yet and the deadline has passed"),
+    ("entrega muito atrasada, demorou demais", "very late delivery, it took too long"),
+    ("recebi apenas uma unidade, faltou o resto do kit", "I received only one unit, the rest of the kit was missing"),
+    ("produto com defeito, não funciona", "defective product, it does not work"),
+    ("veio um modelo diferente do anunciado, cor errada", "a different model from the advertised one came, wrong color"),
+    ("embalagem rasgada e caixa danificada", "torn packaging and damaged box"),
+    ("vendedor não responde, péssimo atendimento", "seller does not respond, terrible service"),
+    ("a foto do anúncio é enganosa, não é como na descrição", "the ad photo is misleading, it is not as described"),
+    ("quero devolver e cancelar a compra", "I want to return and cancel the purchase"),
+    ("não gostei", "I did not like it"),
+    ("produto excelente, chegou antes do prazo", "excellent product, arrived before the deadline"),
+    ("recomendo, ótima qualidade", "I recommend it, great quality"),
+    ("tudo certo, entrega rápida", "all good, fast delivery"),
+]
+COMMENT_ENDINGS = [
+    ("", ""),
+    (". muito insatisfeito", ". very dissatisfied"),
+    (", não compro mais nessa loja", ", I will not buy from this store again"),
+    ("!!", "!!"),
+    (". obrigado", ". thank you"),
+]
+POSITIVE_COMMENTS = slice(10, 13)
+NEGATIVE_COMMENTS = slice(0, 10)
+
+
+def _hex_ids(rng, n):
+    raw = rng.integers(0, 2**63, size=(n, 2), dtype=np.int64).view(np.uint64)
+    return np.char.add(np.char.mod("%016x", raw[:, 0]), np.char.mod("%016x", raw[:, 1])).astype(object)
+
+
+def _choice(rng, options, weights, n):
+    weights = np.asarray(weights, dtype=float)
+    return np.asarray(options, dtype=object)[rng.choice(len(options), size=n, p=weights / weights.sum())]
+
+
+def _with_nulls(rng, values, rate):
+    values = pd.Series(values)
+    return values.mask(rng.random(len(values)) < rate)
+
+
+# Olist-shaped tables at any scale: same columns, id formats and null patterns as the Kaggle dump,
+# with fan-out ratios (customers, items, payments, reviews per order) taken from the real data.
+def generate(n_orders=100_000, seed=0, categories=None):
+    rng = np.random.default_rng(seed)
+    if categories is None:
+        categories = pd.DataFrame({
+            "product_category_name": [f"categoria_{i:02d}" for i in range(71)],
+            "product_category_name_english": [f"category_{i:02d}" for i in range(71)],
+        })
+    n_customers = max(int(n_orders * 0.994), 1)
+    n_unique = max(int(n_customers * 0.966), 1)
+    n_products = max(int(n_orders * 0.33), 1)
+    n_sellers = max(int(n_orders * 0.031), 1)
+    n_leads = max(int(n_orders * 0.08), 1)
+    n_deals = max(int(n_leads * 0.105), 1)
+
+    unique_ids = _hex_ids(rng, n_unique)
+    customers = pd.DataFrame({
+        "customer_id": _hex_ids(rng, n_customers),
+        "customer_unique_id": unique_ids[rng.integers(0, n_unique, n_customers)],
+        "customer_zip_code_prefix": rng.integers(1000, 99999, n_customers),
+        "customer_city": "sao paulo",
+        "customer_state": _choice(rng, STATES, STATE_WEIGHTS, n_customers),
+    })
+
+    sellers = pd.DataFrame({
+        "seller_id": _hex_ids(rng, n_sellers),
+        "seller_zip_code_prefix": rng.integers(1000, 99999, n_sellers),
+        "seller_city": "sao paulo",
+        "seller_state": _choice(rng, STATES, STATE_WEIGHTS, n_sellers),
+    })
+
+    category_names = categories["product_category_name"].to_numpy(dtype=object)
+    products = pd.DataFrame({
+        "product_id": _hex_ids(rng, n_products),
+        "product_category_name": category_names[rng.zipf(1.6, n_products) % len(category_names)],
+        "product_name_lenght": rng.integers(5, 76, n_products).astype(float),
+        "product_description_lenght": rng.integers(4, 3992, n_products).astype(float),
+        "product_photos_qty": rng.integers(1, 10, n_products).astype(float),
+        "product_weight_g": rng.gamma(1.2, 1800, n_products).round(),
+        "product_length_cm": rng.integers(7, 105, n_products).astype(float),
+        "product_height_cm": rng.integers(2, 105, n_products).astype(float),
+        "product_width_cm": rng.integers(6, 118, n_products).astype(float),
+    })
+    no_category = rng.random(n_products) < 0.0185
+    products.loc[no_category, ["product_category_name", "product_name_lenght", "product_description_lenght", "product_photos_qty"]] = np.nan
+
+    purchase = pd.Timestamp("2016-09-04") + pd.to_timedelta(np.sort(rng.beta(2.2, 1.2, n_orders)) * 730, unit="D")
+    purchase = purchase.floor("s")
+    approved = (purchase + pd.to_timedelta(rng.exponential(10, n_orders), unit="h")).floor("s")
+    carrier = (approved + pd.to_timedelta(rng.gamma(2, 1.4, n_orders), unit="D")).floor("s")
+    delivered = (carrier + pd.to_timedelta(rng.gamma(2.2, 4.2, n_orders), unit="D")).floor("s")
+    estimated = (purchase + pd.to_timedelta(rng.normal(24, 8, n_orders).clip(3), unit="D")).normalize()
+    status = _choice(rng, ORDER_STATUS, ORDER_STATUS_WEIGHTS, n_orders)
+    not_delivered = status != "delivered"
+    orders = pd.DataFrame({
+        "order_id": _hex_ids(rng, n_orders),
+        "customer_id": customers["customer_id"].to_numpy()[rng.permutation(n_orders) % n_customers],
+        "order_status": status,
+        "order_purchase_timestamp": purchase,
+        "order_approved_at": pd.Series(approved).mask(rng.random(n_orders) < 0.0016),
+        "order_delivered_carrier_date": pd.Series(carrier).mask(not_delivered & (rng.random(n_orders) < 0.8)),
+        "order_delivered_customer_date": pd.Series(delivered).mask(not_delivered),
+        "order_estimated_delivery_date": estimated,
+    })
+
+    items_per_order = np.minimum(rng.geometric(0.88, n_orders), 21)
+    items_per_order[status == "canceled"] = 0
+    item_order = np.repeat(np.arange(n_orders), items_per_order)
+    n_items = len(item_order)
+    item_seq = np.arange(n_items) - np.repeat(np.cumsum(items_per_order) - items_per_order, items_per_order) + 1
+    product_idx = rng.zipf(1.3, n_items) % n_products
+    repeat_product = item_seq > 1
+    product_idx[repeat_product] = product_idx[np.flatnonzero(repeat_product) - 1]
+    seller_of_product = rng.integers(0, n_sellers, n_products)
+    price = np.round(rng.lognormal(4.3, 0.9, n_items).clip(0.85, 6735), 2)
+    order_items = pd.DataFrame({
+        "order_id": orders["order_id"].to_numpy()[item_order],
+        "order_item_id": item_seq,
+        "product_id": products["product_id"].to_numpy()[product_idx],
+        "seller_id": sellers["seller_id"].to_numpy()[seller_of_product[product_idx]],
+        "shipping_limit_date": (approved[item_order] + pd.to_timedelta(rng.normal(6, 2, n_items).clip(1), unit="D")).floor("s"),
+        "price": price,
+        "freight_value": np.round((price * rng.uniform(0.05, 0.4, n_items)).clip(0, 410), 2),
+    })
+
+    payments_per_order = np.where(rng.random(n_orders) < 0.03, rng.integers(2, 6, n_orders), 1)
+    pay_order = np.repeat(np.arange(n_orders), payments_per_order)
+    order_value = np.bincount(item_order, weights=order_items["price"] + order_items["freight_value"], minlength=n_orders)
+    order_value[order_value == 0] = rng.lognormal(4.5, 0.8, (order_value == 0).sum())
+    payments = pd.DataFrame({
+        "order_id": orders["order_id"].to_numpy()[pay_order],
+        "payment_sequential": np.arange(len(pay_order)) - np.repeat(np.cumsum(payments_per_order) - payments_per_order, payments_per_order) + 1,
+        "payment_type": _choice(rng, PAYMENT_TYPES, PAYMENT_TYPE_WEIGHTS, len(pay_order)),
+        "payment_installments": rng.integers(1, 11, len(pay_order)),
+        "payment_value": np.round(order_value[pay_order] / payments_per_order[pay_order], 2),
+    })
+
+    reviews_per_order = np.where(rng.random(n_orders) < 0.008, 0, 1) + (rng.random(n_orders) < 0.006)
+    review_order = np.repeat(np.arange(n_orders), reviews_per_order)
+    n_reviews = len(review_order)
+    late = (delivered > estimated)[review_order]
+    score = _choice(rng, [5, 4, 3, 2, 1], [58, 19, 8, 3, 12], n_reviews).astype(int)
+    score = np.where(late & (rng.random(n_reviews) < 0.55), rng.integers(1, 3, n_reviews), score)
+    has_comment = rng.random(n_reviews) < np.where(score <= 2, 0.75, 0.3)
+    comment_idx = np.where(score <= 2, rng.integers(NEGATIVE_COMMENTS.start, NEGATIVE_COMMENTS.stop, n_reviews), rng.integers(POSITIVE_COMMENTS.start, POSITIVE_COMMENTS.stop, n_reviews))
+    ending_idx = rng.integers(0, len(COMMENT_ENDINGS), n_reviews)
+    comment_pt = np.array([c[0] for c in COMMENTS], dtype=object)[comment_idx] + np.array([e[0] for e in COMMENT_ENDINGS], dtype=object)[ending_idx]
+    comment_en = np.array([c[1] for c in COMMENTS], dtype=object)[comment_idx] + np.array([e[1] for e in COMMENT_ENDINGS], dtype=object)[ending_idx]
+    creation = (delivered[review_order] + pd.to_timedelta(rng.integers(0, 5, n_reviews), unit="D")).normalize()
+    reviews = pd.DataFrame({
+        "review_id": _hex_ids(rng, n_reviews),
+        "order_id": orders["order_id"].to_numpy()[review_order],
+        "review_score": score,
+        "review_comment_title": pd.Series(np.where(score <= 2, "ruim", "bom"), dtype=object).mask(rng.random(n_reviews) < 0.88),
+        "review_comment_message": pd.Series(comment_pt).where(has_comment),
+        "review_creation_date": creation,
+        "review_answer_timestamp": (creation + pd.to_timedelta(rng.exponential(3, n_reviews), unit="D")).floor("s"),
+        "review_comment_message_en": pd.Series(comment_en).where(has_comment),
+    })
+
+    leads = pd.DataFrame({
+        "mql_id": _hex_ids(rng, n_leads),
+        "first_contact_date": (pd.Timestamp("2017-06-14") + pd.to_timedelta(rng.integers(0, 365, n_leads), unit="D")).strftime("%Y-%m-%d"),
+        "landing_page_id": _hex_ids(rng, max(n_leads // 16, 1))[rng.integers(0, max(n_leads // 16, 1), n_leads)],
+        "origin": _with_nulls(rng, _choice(rng, ORIGINS, [29, 20, 17, 14, 6, 6, 3, 2, 1.5, .8], n_leads), 0.0075),
+    })
+    deal_lead = rng.choice(n_leads, size=min(n_deals, n_leads), replace=False)
+    first_contact = pd.to_datetime(leads["first_contact_date"].to_numpy()[deal_lead])
+    deals = pd.DataFrame({
+        "mql_id": leads["mql_id"].to_numpy()[deal_lead],
+        "seller_id": sellers["seller_id"].to_numpy()[rng.integers(0, n_sellers, len(deal_lead))],
+        "sdr_id": _hex_ids(rng, 32)[rng.integers(0, 32, len(deal_lead))],
+        "sr_id": _hex_ids(rng, 22)[rng.integers(0, 22, len(deal_lead))],
+        "won_date": (first_contact + pd.to_timedelta(rng.gamma(1.1, 45, len(deal_lead)), unit="D")).floor("s"),
+        "business_segment": _with_nulls(rng, _choice(rng, SEGMENTS, np.arange(len(SEGMENTS), 0, -1), len(deal_lead)), 0.001),
+        "lead_type": _with_nulls(rng, _choice(rng, LEAD_TYPES, [39, 15, 14, 12, 8, 1, 1, 1], len(deal_lead)), 0.007),
+        "lead_behaviour_profile": _with_nulls(rng, _choice(rng, ["cat", "eagle", "wolf", "shark"], [50, 15, 10, 3], len(deal_lead)), 0.21),
+        "has_company": _with_nulls(rng, rng.random(len(deal_lead)) < 0.9, 0.925),
+        "has_gtin": _with_nulls(rng, rng.random(len(deal_lead)) < 0.85, 0.924),
+        "average_stock": _with_nulls(rng, _choice(rng, ["5-20", "20-50", "50-200", "1-5", "200+", "unknown"], [22, 15, 13, 6, 6, 5], len(deal_lead)), 0.92),
+        "business_type": _with_nulls(rng, _choice(rng, ["reseller", "manufacturer", "other"], [69, 29, 2], len(deal_lead)), 0.012),
+        "declared_product_catalog_size": _with_nulls(rng, rng.integers(1, 2000, len(deal_lead)).astype(float), 0.92),
+        "declared_monthly_revenue": np.where(rng.random(len(deal_lead)) < 0.92, 0.0, rng.lognormal(11, 1.5, len(deal_lead)).round()),
+    })
+
+    return dict(zip(snapshot.TABLES, (payments, customers, orders, sellers, products, order_items, reviews, categories, deals, leads)))
+
+
+def read_categories(data_dir=snapshot.DATA_DIR):
+    path = os.path.join(data_dir, snapshot.TABLES["cat_trans"]["file"])
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, encoding="utf-8-sig")
+
+
+def write_tables(tables, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    for name, df in tables.items():
+        df.to_csv(os.path.join(out_dir, snapshot.TABLES[name]["file"]), index=False, date_format=snapshot.DATETIME_FORMAT)
+    logger.info("wrote %d tables (%d orders) to %s", len(tables), len(tables["orders"]), out_dir)
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic Olist-shaped dataset as CSV files.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    write_tables(generate(args.orders, args.seed, read_categories()), args.out_dir)
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import encoding
+import pipeline
+import snapshot
+import synthetic
+import timeline
+
+N_ORDERS = 3000
+
+
+@pytest.fixture(scope="session")
+def source_tables():
+    return synthetic.generate(N_ORDERS, seed=1)
+
+
+@pytest.fixture(scope="session")
+def data_dir(source_tables, tmp_path_factory):
+    return synthetic.write_tables(source_tables, str(tmp_path_factory.mktemp("data")))
+
+
+@pytest.fixture(scope="session")
+def snapshot_dir(data_dir, tmp_path_factory):
+    snapshot_dir = str(tmp_path_factory.mktemp("snapshot"))
+    snapshot.ensure_snapshot(data_dir, snapshot_dir)
+    return snapshot_dir
+
+
+@pytest.fixture(scope="session")
+def pipe(data_dir, snapshot_dir):
+    key, tables = snapshot.load_snapshot(data_dir, snapshot_dir)
+    return pipeline.Pipeline(tables, key)
+
+
+@pytest.fixture(scope="session")
+def shuffled_dir(source_tables, tmp_path_factory):
+    # Same rows in arbitrary order, as a remote source may serve them.
+    rng = np.random.default_rng(2)
+    shuffled = {name: df.take(rng.permutation(len(df))) for name, df in source_tables.items()}
+    return synthetic.write_tables(shuffled, str(tmp_path_factory.mktemp("shuffled")))
+
+
+def read_remote(data_dir):
+    # What the dashboard's load_data does for a non-snapshot source, reading files instead of URLs.
+    sources = {name: os.path.join(data_dir, spec["file"]) for name, spec in snapshot.TABLES.items()}
+    tables, _, _ = encoding.encode_tables(snapshot.read_sources(sources))
+    return tables
+
+
+@pytest.fixture(scope="session")
+def remote_pipe(shuffled_dir):
+    return pipeline.Pipeline(timeline.sort_tables(read_remote(shuffled_dir)), "remote")
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cohort
+
+MEASURES = ['customers', 'orders', 'revenue']
+
+
+def naive_cells(fact_orders, state=cohort.ALL_STATES):
+    # The slow way: one customer x month pivot straight from the orders.
+    orders = fact_orders[~fact_orders['order_status'].isin(cohort.EXCLUDED_STATUSES) & (fact_orders['customer_unique_id'] >= 0)]
+    orders = orders.dropna(subset=['order_purchase_timestamp']).sort_values(['order_purchase_timestamp', 'order_id'], kind='stable')
+    first = orders.drop_duplicates('customer_unique_id').set_index('customer_unique_id')
+    if state != cohort.ALL_STATES:
+        orders = orders[orders['customer_unique_id'].map(first['customer_state']) == state]
+    first_purchase = orders['customer_unique_id'].map(first['order_purchase_timestamp'])
+    orders = orders.assign(
+        cohort=first_purchase.dt.to_period('M').dt.to_timestamp(),
+        period=(orders['order_purchase_timestamp'].dt.year - first_purchase.dt.year) * 12
+               + orders['order_purchase_timestamp'].dt.month - first_purchase.dt.month,
+    )
+    return orders.groupby(['cohort', 'period']).agg(
+        customers=('customer_unique_id', 'nunique'),
+        orders=('order_id', 'size'),
+        revenue=('payment_value', 'sum'),
+    )
+
+
+def assert_same_cells(expected, actual):
+    actual = actual[MEASURES]
+    assert actual.index.equals(expected.index)
+    for measure in MEASURES:
+        assert np.allclose(actual[measure].to_numpy(dtype=float), expected[measure].to_numpy(dtype=float)), measure
+
+
+def states(pipe):
+    return list(pipe["cohort_matrix_rows"]['customer_state'])
+
+
+def test_all_states_match_naive_pivot(pipe):
+    assert_same_cells(naive_cells(pipe["fact_orders"]), cohort.slice_cohorts(pipe["cohort_matrix"], pipe["cohort_matrix_rows"]))
+
+
+def test_state_slices_match_naive_pivot(pipe):
+    for state in states(pipe)[:5]:
+        expected = naive_cells(pipe["fact_orders"], state)
+        assert_same_cells(expected, cohort.slice_cohorts(pipe["cohort_matrix"], pipe["cohort_matrix_rows"], state=state))
+
+
+def test_state_rows_sum_to_all_states(pipe):
+    matrix, rows = pipe["cohort_matrix"], pipe["cohort_matrix_rows"]
+    total = cohort.slice_cohorts(matrix, rows)
+    by_state = pd.concat([cohort.slice_cohorts(matrix, rows, state=state) for state in states(pipe)])
+    assert_same_cells(total, by_state.groupby(level=['cohort', 'period']).sum())
+
+
+def test_canceled_orders_are_not_purchases(pipe):
+    fact_orders = pipe["fact_orders"]
+    excluded = fact_orders['order_status'].isin(cohort.EXCLUDED_STATUSES)
+    assert excluded.any()
+    total = cohort.slice_cohorts(pipe["cohort_matrix"], pipe["cohort_matrix_rows"])
+    counted = ~excluded & fact_orders['order_purchase_timestamp'].notna() & (fact_orders['customer_unique_id'] >= 0)
+    assert total['orders'].sum() == counted.sum()
+
+
+@pytest.mark.parametrize("measure", list(cohort.MEASURES))
+def test_grid_has_one_row_per_cohort(pipe, measure):
+    cells = cohort.slice_cohorts(pipe["cohort_matrix"], pipe["cohort_matrix_rows"])
+    grid = cohort.cohort_grid(cells, measure)
+    assert list(grid.index) == sorted(cells.index.get_level_values('cohort').unique())
+    if measure == "retention":
+        assert np.allclose(grid[0], 100)
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+import complaints
+
+
+# The per-comment rule classify_complaints replaced: one point per keyword found, ties go to the
+# category listed first, no match is Unclassified.
+def categorize_complaint(comment):
+    if not isinstance(comment, str):
+        return complaints.UNCLASSIFIED
+    comment_lower = comment.lower()
+    scores = {category: sum(1 for keyword in keywords if keyword in comment_lower) for category, keywords in complaints.complaint_keywords.items()}
+    max_score = max(scores.values())
+    if max_score == 0:
+        return complaints.UNCLASSIFIED
+    return [category for category, score in scores.items() if score == max_score][0]
+
+
+EDGE_CASES = [
+    None, np.nan, 3, "", "   ",
+    "NÃO CHEGOU até agora", "nao chegou", "Não Recebi o produto",
+    "caixa",  # Bad Product Quality and Bad Packaging both list it: the first listed wins
+    "produto veio com a cor errada e embalagem rasgada",
+    "só veio uma unidade do kit", "ótimo, recomendo",
+    "atraso atraso atraso", "vendedor não respondeu, quero cancelar e devolver",
+]
+
+
+def test_classifier_matches_per_comment_rule(source_tables):
+    reviews = source_tables["reviews"]
+    comments = pd.concat([reviews["review_comment_message"], pd.Series(EDGE_CASES, dtype=object)], ignore_index=True)
+    expected = comments.map(categorize_complaint)
+    pd.testing.assert_series_equal(complaints.classify_complaints(comments), expected, check_names=False)
+
+
+def test_classifier_cache_is_bounded(source_tables, monkeypatch):
+    comments = source_tables["reviews"]["review_comment_message"].dropna()
+    expected = comments.map(categorize_complaint)
+    monkeypatch.setattr(complaints, "CACHE_SIZE", 10)
+    monkeypatch.setattr(complaints, "_category_cache", complaints.OrderedDict())
+    for part in (comments, comments.iloc[:50], comments.iloc[::-1], comments):
+        pd.testing.assert_series_equal(complaints.classify_complaints(part), expected.loc[part.index], check_names=False)
+    assert len(complaints._category_cache) <= 10
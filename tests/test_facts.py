@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+import pipeline
+import snapshot
+import synthetic
+
+
+@pytest.fixture(scope="module")
+def shared_review_pipe(tmp_path_factory):
+    # Olist sends some reviews for several orders under one review_id; reuse ids to mimic that.
+    tables = synthetic.generate(1500, seed=3)
+    reviews = tables["reviews"]
+    shared = ['review_id', 'review_score', 'review_comment_message', 'review_comment_message_en']
+    copies = reviews.index[1::7]
+    reviews.loc[copies, shared] = reviews.loc[reviews.index[0::7][:len(copies)], shared].to_numpy()
+    root = tmp_path_factory.mktemp("shared_reviews")
+    key, loaded = snapshot.load_snapshot(synthetic.write_tables(tables, str(root / "data")), str(root / "snapshot"))
+    return pipeline.Pipeline(loaded, key)
+
+
+def test_low_score_reviews_count_each_review_once(shared_review_pipe):
+    reviews = shared_review_pipe["fact_reviews"]
+    commented = reviews.dropna(subset=['review_comment_message', 'review_comment_message_en']).drop_duplicates('review_id')
+    low = shared_review_pipe["low_score_reviews"]
+    assert low['review_id'].is_unique
+    assert len(low) == (commented['review_score'] <= 2).sum()
+
+
+def test_sql_low_score_reviews_keep_the_same_orders(shared_review_pipe):
+    sql_pipeline = pytest.importorskip("sql_pipeline")
+    pytest.importorskip("duckdb")
+    sql_pipe = sql_pipeline.SqlPipeline(shared_review_pipe.tables, shared_review_pipe.snapshot_id)
+    assert sql_pipeline.same_result(shared_review_pipe["low_score_reviews"], sql_pipe["low_score_reviews"])
+    assert sql_pipeline.same_result(shared_review_pipe["low_score_review_categories"], sql_pipe["low_score_review_categories"])
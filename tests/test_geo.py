@@ -0,0 +1,58 @@
+import json
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import geo
+
+N, STEPS = 3, 100
+
+
+def jagged_grid():
+    # N x N square "states" whose inner borders wiggle, so simplification has detail to drop.
+    rng = np.random.default_rng(0)
+
+    def line(i):
+        offset = np.zeros(N * STEPS + 1) if i in (0, N) else rng.normal(0, 0.05, N * STEPS + 1)
+        offset[::STEPS] = 0
+        return np.linspace(0, N, N * STEPS + 1), np.round(i + offset, 6)
+
+    vertical = [[(x, y) for y, x in zip(*line(i))] for i in range(N + 1)]
+    horizontal = [[(x, y) for x, y in zip(*line(j))] for j in range(N + 1)]
+    features = []
+    for i in range(N):
+        for j in range(N):
+            cell = slice(i * STEPS, (i + 1) * STEPS + 1), slice(j * STEPS, (j + 1) * STEPS + 1)
+            bottom, top = horizontal[j][cell[0]], horizontal[j + 1][cell[0]][::-1]
+            right, left = vertical[i + 1][cell[1]], vertical[i][cell[1]][::-1]
+            ring = bottom + right[1:] + top[1:] + left[1:]
+            features.append({"type": "Feature", "properties": {"sigla": f"S{i}{j}"},
+                             "geometry": {"type": "Polygon", "coordinates": [[list(point) for point in ring]]}})
+    return {"type": "FeatureCollection", "features": features}
+
+
+def edges(feature):
+    ring = feature["geometry"]["coordinates"][0]
+    return {frozenset((tuple(a), tuple(b))) for a, b in zip(ring, ring[1:])}
+
+
+def on_outline(edge):
+    return all(x in (0, N) or y in (0, N) for x, y in edge)
+
+
+@pytest.mark.parametrize("tolerance", [0.01, 0.05, 0.2])
+def test_neighbours_keep_identical_borders(tolerance):
+    simplified = geo.simplify_geojson(jagged_grid(), tolerance, 4)
+    counts = Counter(edge for feature in simplified["features"] for edge in edges(feature))
+    # Every inner edge is drawn by both states it separates: no gaps, no overlaps.
+    assert [edge for edge, count in counts.items() if count != 2 and not on_outline(edge)] == []
+    assert geo.vertex_count(simplified) < geo.vertex_count(jagged_grid())
+
+
+def test_output_shrinks_as_tolerance_grows():
+    original = jagged_grid()
+    sizes = [(geo.vertex_count(simplified), len(json.dumps(simplified, separators=(",", ":"))))
+             for simplified in (geo.simplify_geojson(original, tolerance, 4) for tolerance in [0.001, 0.01, 0.05, 0.2])]
+    assert sizes == sorted(sizes, reverse=True)
+    assert len(set(sizes)) == len(sizes)
@@ -0,0 +1,104 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import incremental
+import snapshot
+import streaming
+
+
+def split(data_dir, base_dir, batch_dir, cutoff):
+    # Orders before the cutoff go to the base, later ones (re-sending a few of them) to one batch.
+    read = lambda name: pd.read_csv(os.path.join(data_dir, snapshot.TABLES[name]["file"]), encoding="utf-8-sig")
+    write = lambda out_dir, name, df: df.to_csv(os.path.join(out_dir, snapshot.TABLES[name]["file"]), index=False)
+    for out_dir in (base_dir, batch_dir):
+        os.makedirs(out_dir)
+    for name in snapshot.TABLES:
+        shutil.copy(os.path.join(data_dir, snapshot.TABLES[name]["file"]), base_dir)
+    shutil.copy(os.path.join(data_dir, snapshot.TABLES["customers"]["file"]), batch_dir)
+    orders = read("orders")
+    new = orders['order_purchase_timestamp'] >= cutoff
+    write(base_dir, "orders", orders[~new])
+    write(batch_dir, "orders", pd.concat([orders[new], orders[new].iloc[:5]]))
+    for name in ["order_items", "payments", "reviews"]:
+        rows = read(name)
+        later = rows['order_id'].isin(orders.loc[new, 'order_id'])
+        write(base_dir, name, rows[~later])
+        write(batch_dir, name, rows[later])
+
+
+def stored_files(state_dir):
+    return {os.path.join(root, name): os.path.getmtime(os.path.join(root, name))
+            for root, _, names in os.walk(state_dir) for name in names}
+
+
+def test_incremental_refresh_matches_pipeline(pipe, data_dir, tmp_path, monkeypatch):
+    base_dir, batch_dir, state_dir = str(tmp_path / "base"), str(tmp_path / "batch"), str(tmp_path / "state")
+    split(data_dir, base_dir, batch_dir, "2018-05-01")
+    # Built from exactly the base files, so it may seed a pipeline of their snapshot.
+    assert incremental.init(base_dir, state_dir)["sources"] == snapshot.fingerprint(snapshot.source_states(base_dir))
+    before = stored_files(state_dir)
+
+    # A batch failing halfway leaves the stored state exactly as it was.
+    partial_aggregates = streaming.partial_aggregates
+    def fail(**tables):
+        raise RuntimeError("interrupted")
+    monkeypatch.setattr(streaming, "partial_aggregates", fail)
+    with pytest.raises(RuntimeError):
+        incremental.apply_batch(batch_dir, state_dir, base_dir)
+    monkeypatch.setattr(streaming, "partial_aggregates", partial_aggregates)
+    assert {path: mtime for path, mtime in stored_files(state_dir).items() if incremental.STAGING not in path} == before
+
+    state = incremental.apply_batch(batch_dir, state_dir, base_dir)
+    assert state["batches"][-1]["updated_orders"] == 0
+    # The base files lack the batch's orders, so no snapshot of them matches the state any more.
+    assert state["sources"] is None
+    assert incremental.apply_batch(batch_dir, state_dir, base_dir) == state
+    assert streaming.verify(incremental.load_aggregates(state_dir), pipe) == {}
+
+
+def test_orders_join_customers_sent_in_earlier_batches(pipe, data_dir, tmp_path):
+    base_dir, batch_dir, state_dir = str(tmp_path / "base"), str(tmp_path / "batch"), str(tmp_path / "state")
+    split(data_dir, base_dir, batch_dir, "2018-05-01")
+    os.remove(os.path.join(batch_dir, snapshot.TABLES["customers"]["file"]))
+    incremental.init(base_dir, state_dir)
+    incremental.apply_batch(batch_dir, state_dir, base_dir)
+    assert streaming.verify(incremental.load_aggregates(state_dir), pipe) == {}
+
+
+def stored_orders(state_dir):
+    paths = [os.path.join(root, name) for root, _, names in os.walk(os.path.join(state_dir, "months")) for name in names if name.startswith("orders-")]
+    return pd.concat([pd.read_feather(path) for path in paths], ignore_index=True).set_index('order_id')
+
+
+def test_resent_order_replaces_the_whole_row(data_dir, tmp_path):
+    base_dir, batch_dir, state_dir = str(tmp_path / "base"), str(tmp_path / "batch"), str(tmp_path / "state")
+    split(data_dir, base_dir, batch_dir, "2018-05-01")
+    incremental.init(base_dir, state_dir)
+    orders = pd.read_csv(os.path.join(base_dir, snapshot.TABLES["orders"]["file"]))
+    delivered = orders[orders['order_delivered_customer_date'].notna()].iloc[:3].copy()
+    delivered['order_delivered_customer_date'] = None
+    os.makedirs(str(tmp_path / "correction"))
+    delivered.to_csv(os.path.join(str(tmp_path / "correction"), snapshot.TABLES["orders"]["file"]), index=False)
+    state = incremental.apply_batch(str(tmp_path / "correction"), state_dir, base_dir)
+    assert state["batches"][-1]["updated_orders"] == 3
+    # A blank in the newer row clears the stored value instead of falling back to it.
+    assert stored_orders(state_dir).loc[delivered['order_id'], 'order_delivered_customer_date'].isna().all()
+
+
+def test_batches_are_known_by_content(data_dir, tmp_path):
+    base_dir, batch_dir, state_dir = str(tmp_path / "base"), str(tmp_path / "batch"), str(tmp_path / "state")
+    split(data_dir, base_dir, batch_dir, "2018-05-01")
+    incremental.init(base_dir, state_dir)
+    state = incremental.apply_batch(batch_dir, state_dir, base_dir)
+    # The same export under another name is skipped.
+    shutil.copytree(batch_dir, str(tmp_path / "renamed"))
+    assert incremental.apply_batch(str(tmp_path / "renamed"), state_dir, base_dir) == state
+    # A new export reusing the folder name is applied.
+    orders = pd.read_csv(os.path.join(batch_dir, snapshot.TABLES["orders"]["file"])).iloc[:2]
+    for name in os.listdir(batch_dir):
+        os.remove(os.path.join(batch_dir, name))
+    orders.to_csv(os.path.join(batch_dir, snapshot.TABLES["orders"]["file"]), index=False)
+    assert incremental.apply_batch(batch_dir, state_dir, base_dir)["batches"][-1]["updated_orders"] == 2
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import leaderboard
+
+PAGE_SIZE = 7
+
+
+def naive_ranking(pipe, sort_key, descending, state, category, min_orders):
+    # The slow way: group the filtered items per seller on every request, then sort.
+    items = pipe["df_analysis"].merge(pipe["dim_seller"], on='seller_id', how='left')
+    if state != leaderboard.ALL_STATES:
+        items = items[items['seller_state'] == state]
+    if category != leaderboard.ALL_CATEGORIES:
+        items = items[items['product_category_name_english'] == category]
+    grouped = items.groupby('seller_id')
+    table = pd.DataFrame({
+        'late_dispatch_rate': grouped['is_seller_late'].mean() * 100,
+        'avg_dispatch_delay': items['seller_dispatch_days_late'].where(items['is_seller_late']).groupby(items['seller_id']).mean(),
+        'orders': grouped['order_id'].nunique(),
+        'avg_review_score': items.drop_duplicates(['seller_id', 'order_id']).groupby('seller_id')['review_score'].mean(),
+        'freight_ratio': grouped['freight_value'].sum() / grouped['price'].sum().where(lambda price: price > 0) * 100,
+    }).reset_index()
+    table = table[table['orders'] >= min_orders]
+    # Ties by seller id, reversed with the direction; sellers without a value last, by seller id.
+    ascending = not descending
+    missing = table[sort_key].isna()
+    return pd.concat([table[~missing].sort_values([sort_key, 'seller_id'], ascending=ascending), table[missing].sort_values('seller_id')])
+
+
+def paged(table, positions):
+    pages = [leaderboard.page(table, positions, number, PAGE_SIZE) for number in range((len(positions) - 1) // PAGE_SIZE + 1)]
+    assert all(len(rows) == PAGE_SIZE for rows in pages[:-1]) and 0 < len(pages[-1]) <= PAGE_SIZE
+    return pd.concat(pages)
+
+
+def filters(pipe):
+    items = pipe["df_analysis"].merge(pipe["dim_seller"], on='seller_id')
+    state = items['seller_state'].value_counts().index[0]
+    category = items['product_category_name_english'].value_counts().index[0]
+    return [(leaderboard.ALL_STATES, leaderboard.ALL_CATEGORIES, 1), (state, leaderboard.ALL_CATEGORIES, 1),
+            (leaderboard.ALL_STATES, category, 2), (state, category, 1), (leaderboard.ALL_STATES, leaderboard.ALL_CATEGORIES, 5)]
+
+
+@pytest.mark.parametrize("descending", [True, False])
+@pytest.mark.parametrize("sort_key", list(leaderboard.SORT_KEYS))
+def test_ranking_matches_naive_groupby(pipe, sort_key, descending):
+    table = pipe["seller_leaderboard"]
+    for state, category, min_orders in filters(pipe):
+        positions = leaderboard.rank(table, pipe["seller_sort_index"], pipe["seller_leaderboard_rows"], sort_key, descending, state, category, min_orders)
+        expected = naive_ranking(pipe, sort_key, descending, state, category, min_orders)
+        assert len(positions) == len(expected) > 0, (state, category, min_orders)
+        actual = paged(table, positions)
+        assert actual['seller_id'].tolist() == expected['seller_id'].tolist(), (state, category, min_orders)
+        for column in leaderboard.SORT_KEYS:
+            assert np.allclose(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float), equal_nan=True), column
+
+
+def test_empty_filter_ranks_nothing(pipe):
+    positions = leaderboard.rank(pipe["seller_leaderboard"], pipe["seller_sort_index"], pipe["seller_leaderboard_rows"], "orders", min_orders=10 ** 9)
+    assert len(positions) == 0
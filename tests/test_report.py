@@ -0,0 +1,41 @@
+import json
+import os
+
+import pytest
+
+import figures
+import report
+
+# Widget-driven figures with short option lists, plus ones that have no widgets; the cohort and
+# distribution grids run to hundreds of combinations.
+NAMES = ["fig_revenue", "fig_top", "fig_bottom", "fig_complaints", "fig_avg", "fig_leads", "fig_conversion"]
+
+
+def rendered(out_dir):
+    return {os.path.join(root, name)[len(out_dir):]: open(os.path.join(root, name), "rb").read()
+            for root, _, names in os.walk(out_dir) for name in names if name != "index.json"}
+
+
+@pytest.fixture(scope="module")
+def rendered_report(data_dir, snapshot_dir, tmp_path_factory):
+    out_dir = str(tmp_path_factory.mktemp("report"))
+    return out_dir, report.run(out_dir, data_dir, snapshot_dir, formats=("json",), names=NAMES, workers=2)
+
+
+def test_report_renders_every_combination_like_the_page(pipe, rendered_report):
+    out_dir, index = rendered_report
+    jobs = report.combinations(pipe, NAMES)
+    assert [(r["figure"], r["widgets"]) for r in index["figures"]] == jobs
+    for result in index["figures"]:
+        fig = figures.FIGURES[result["figure"]](pipe, **result["widgets"])
+        assert result["empty"] == (fig is None)
+        if fig is not None:
+            with open(os.path.join(out_dir, result["files"][0])) as f:
+                assert json.load(f) == json.loads(fig.to_json())
+
+
+def test_report_output_is_deterministic(rendered_report, data_dir, snapshot_dir, tmp_path):
+    # Another run with a different worker count writes byte-identical files.
+    first, second = rendered_report[0], str(tmp_path / "second")
+    report.run(second, data_dir, snapshot_dir, formats=("json",), names=NAMES, workers=1)
+    assert rendered(first) == rendered(second)
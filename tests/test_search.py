@@ -0,0 +1,87 @@
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import search
+import snapshot
+
+QUERIES = ["nao", "entrega rapida", "entreg*", "produto excelente prazo", "qualid*", "recomendo otima", "kit faltou", "zzz", "n*"]
+
+
+@pytest.fixture(scope="module")
+def reviews(pipe):
+    return pipe.tables["reviews"]
+
+
+@pytest.fixture(scope="module")
+def index(reviews):
+    return search.build_index(reviews)
+
+
+def scan(reviews, query):
+    # The slow reference: a regex over every folded comment, one whole-token pattern per term.
+    texts = search.fold(reviews[search.TEXT_COLUMNS[0]].fillna("") + " " + reviews[search.TEXT_COLUMNS[1]].fillna(""))
+    matches = pd.Series(True, index=texts.index)
+    for term, star in search.QUERY_TERM.findall(search.fold(pd.Series([query]))[0]):
+        pattern = rf"(?<![0-9a-z]){re.escape(term)}{'[0-9a-z]*' if star else ''}(?![0-9a-z])"
+        matches &= texts.str.contains(pattern, regex=True).fillna(False).astype(bool)
+    return np.flatnonzero(matches.to_numpy())
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_index_matches_regex_scan(reviews, index, query):
+    assert np.array_equal(index.search(query), scan(reviews, query))
+
+
+def test_accents_and_case_fold_to_one_term(index):
+    hits = [index.search(query) for query in ["Não", "NAO", "nao", "não"]]
+    assert len(hits[0]) and all(np.array_equal(hits[0], other) for other in hits[1:])
+
+
+def test_prefix_and_terms_narrow_the_hits(index):
+    assert set(index.search("entrega")) <= set(index.search("entreg*"))
+    both = index.search("entrega rapida")
+    assert np.array_equal(both, np.intersect1d(index.search("entrega"), index.search("rapida")))
+    assert index.search("!!") is None
+
+
+@pytest.fixture
+def copied_dirs(data_dir, tmp_path):
+    copied = str(tmp_path / "data")
+    shutil.copytree(data_dir, copied)
+    return copied, str(tmp_path / "snapshot")
+
+
+def rewrite(data_dir, name, change):
+    path = os.path.join(data_dir, snapshot.TABLES[name]["file"])
+    change(pd.read_csv(path, encoding="utf-8-sig")).to_csv(path, index=False)
+
+
+def persisted(data_dir, snapshot_dir):
+    key, tables = snapshot.load_snapshot(data_dir, snapshot_dir)
+    index = search.ensure_index(tables["reviews"], snapshot_dir)
+    return index, os.listdir(os.path.join(snapshot_dir, search.INDEX_DIR))
+
+
+def test_index_is_reused_when_another_table_changes(copied_dirs):
+    data_dir, snapshot_dir = copied_dirs
+    _, before = persisted(data_dir, snapshot_dir)
+    built = os.path.getmtime(os.path.join(snapshot_dir, search.INDEX_DIR, before[0]))
+    rewrite(data_dir, "sellers", lambda sellers: sellers.iloc[:-1])
+    _, after = persisted(data_dir, snapshot_dir)
+    assert after == before
+    assert os.path.getmtime(os.path.join(snapshot_dir, search.INDEX_DIR, after[0])) == built
+
+
+def test_index_is_rebuilt_when_reviews_change(copied_dirs):
+    data_dir, snapshot_dir = copied_dirs
+    _, before = persisted(data_dir, snapshot_dir)
+    rewrite(data_dir, "reviews", lambda reviews: reviews.assign(review_comment_message=reviews['review_comment_message'].where(reviews.index != 0, "Embalagem amassada")))
+    index, after = persisted(data_dir, snapshot_dir)
+    # The old version is pruned and the new text is searchable.
+    assert len(after) == 1 and after != before
+    assert len(index.search("embalagem amassada")) == 1
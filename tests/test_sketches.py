@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import sketches
+import streaming
+
+
+def ids(n, seed=0):
+    return np.random.default_rng(seed).permutation(n).astype(str).astype(object)
+
+
+def values(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.concatenate([rng.lognormal(3, 1.5, n), -rng.lognormal(1, 1, n // 10), np.zeros(n // 50)])
+
+
+@pytest.mark.parametrize("error", [0.01, 0.05])
+@pytest.mark.parametrize("n", [50, 5000, 200000])
+def test_distinct_count_within_error(n, error):
+    sketch = sketches.HyperLogLog.of(np.concatenate([ids(n), ids(n)[:n // 3]]), error)
+    # Hashes are fixed, so this is deterministic; three standard errors leave room for the rare miss.
+    assert abs(sketch.count() - n) <= 3 * sketch.error * n
+    assert sketch.error <= error
+
+
+@pytest.mark.parametrize("error", [0.01, 0.05])
+def test_quantiles_within_relative_error(error):
+    data = values()
+    sketch = sketches.QuantileSketch.of(data, error)
+    ordered = np.sort(data)
+    assert sketch.count() == len(data)
+    for q in np.linspace(0, 1, 41):
+        exact = ordered[int(q * (len(data) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= error * abs(exact) + 1e-12, q
+
+
+def test_merged_partitions_equal_whole_table_sketch():
+    data, keys = values(), ids(30000)
+    parts = np.array_split(np.arange(len(data)), 7)
+    merged = sketches.merge_all([sketches.QuantileSketch.of(data[part]) for part in parts], sketches.QuantileSketch())
+    assert merged == sketches.QuantileSketch.of(data)
+    parts = np.array_split(np.arange(len(keys)), 7)
+    merged = sketches.merge_all([sketches.HyperLogLog.of(keys[part]) for part in parts], sketches.HyperLogLog())
+    assert merged == sketches.HyperLogLog.of(keys)
+
+
+def test_partition_sketches_merge_to_the_single_partition_sketch(data_dir):
+    whole, merged = streaming.aggregate(data_dir, 1), streaming.aggregate(data_dir, 3, 500)
+    for name in streaming.SKETCHES:
+        for column in ([None] if name == "order_sketches" else ["freight_value", "price"]):
+            expected = whole[name] if column is None else whole[name][column]
+            actual = merged[name] if column is None else merged[name][column]
+            assert actual.sort_index().index.equals(expected.sort_index().index)
+            assert all(actual[key] == expected[key] for key in expected.index), (name, column)
+
+
+def test_approx_headline_stats_within_error(pipe):
+    exact, approx = pipe["headline_stats"], pipe["approx_headline_stats"]
+    for name in ["total_customers", "total_orders"]:
+        assert abs(approx[name] - exact[name]) <= 3 * sketches.HyperLogLog().error * exact[name]
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+import figures
+import sql_pipeline
+
+
+@pytest.fixture(scope="module")
+def sql_pipe(pipe):
+    return sql_pipeline.SqlPipeline(pipe.tables, pipe.snapshot_id)
+
+
+@pytest.mark.parametrize("name", list(sql_pipeline.SQL_NODES))
+def test_sql_node_matches_pandas(pipe, sql_pipe, name):
+    assert sql_pipeline.same_result(pipe[name], sql_pipe[name])
+
+
+@pytest.mark.parametrize("name", list(sql_pipeline.SQL_NODES))
+def test_sql_window_matches_pandas(pipe, sql_pipe, name):
+    start, end = pd.Timestamp("2017-03-14"), pd.Timestamp("2017-11-20")
+    assert sql_pipeline.same_result(pipe.window(start, end)[name], sql_pipe.window(start, end)[name])
+
+
+def test_sql_figures_match_pandas(pipe, sql_pipe):
+    for name in ["fig_revenue", "fig_performance_trend", "fig_review_freight", "fig_top_cats", "fig_top_segments", "fig_leads", "fig_conversion"]:
+        assert sql_pipeline.same_figure(figures.FIGURES[name](pipe), figures.FIGURES[name](sql_pipe)), name
@@ -0,0 +1,12 @@
+import pytest
+
+import streaming
+
+
+@pytest.mark.parametrize("n_partitions, chunk_rows", [(1, streaming.CHUNK_ROWS), (3, 500)])
+def test_streamed_aggregates_match_pipeline(pipe, data_dir, n_partitions, chunk_rows):
+    assert streaming.verify(streaming.aggregate(data_dir, n_partitions, chunk_rows), pipe) == {}
+
+
+def test_streaming_ignores_row_order(pipe, shuffled_dir):
+    assert streaming.verify(streaming.aggregate(shuffled_dir, 2, 700), pipe) == {}
@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+import pytest
+
+import snapshot
+import synthetic
+
+BUNDLED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "E-Commerce")
+
+
+def test_generates_every_table(source_tables):
+    assert list(source_tables) == list(snapshot.TABLES)
+    assert len(source_tables["orders"]) == 3000
+
+
+@pytest.mark.parametrize("name", [name for name, spec in snapshot.TABLES.items() if os.path.exists(os.path.join(BUNDLED_DIR, spec["file"]))])
+def test_columns_match_bundled_data(source_tables, name):
+    bundled = pd.read_csv(os.path.join(BUNDLED_DIR, snapshot.TABLES[name]["file"]), nrows=5, encoding="utf-8-sig")
+    assert list(source_tables[name].columns) == list(bundled.columns)
+
+
+def test_same_seed_same_tables():
+    first, second = synthetic.generate(500, seed=7), synthetic.generate(500, seed=7)
+    for name in snapshot.TABLES:
+        pd.testing.assert_frame_equal(first[name], second[name])
+
+
+def test_child_rows_reference_existing_orders(source_tables):
+    order_ids = set(source_tables["orders"]['order_id'])
+    for name in ["order_items", "payments", "reviews"]:
+        assert set(source_tables[name]['order_id']) <= order_ids
+    assert set(source_tables["orders"]['customer_id']) <= set(source_tables["customers"]['customer_id'])
+
+
+def test_csv_round_trip_builds_a_snapshot(pipe, source_tables):
+    assert pipe["headline_stats"]["total_orders"] == source_tables["orders"]['order_id'].nunique()
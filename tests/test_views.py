@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import views
+
+
+def keys(df, column):
+    return df.index.get_level_values(column) if column in df.index.names else df[column]
+
+
+def masked(df, **filters):
+    # The slow way: a boolean mask over whole columns for every filter.
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in filters.items():
+        if value is not None:
+            mask &= np.asarray(keys(df, column) == value)
+    return df[mask]
+
+
+def test_intersect_matches_numpy():
+    rng = np.random.default_rng(0)
+    for size_a, size_b in [(0, 10), (5, 1000), (1000, 5), (300, 300)]:
+        a = np.unique(rng.integers(0, 2000, size_a))
+        b = np.unique(rng.integers(0, 2000, size_b))
+        assert np.array_equal(views.intersect(a, b), np.intersect1d(a, b, assume_unique=True))
+
+
+@pytest.mark.parametrize("node, columns", [
+    ("lateness_cube", ['customer_state', 'product_category_name_english']),
+    ("cohort_matrix", ['customer_state', 'product_category_name_english']),
+    ("seller_leaderboard", ['seller_state', 'product_category_name_english']),
+])
+def test_select_matches_boolean_masks(pipe, node, columns):
+    df, row_index = pipe[node], pipe[node + "_rows"]
+    first, second = columns
+    pairs = [(None, None)] + [(a, None) for a in list(row_index[first])[:4]] + [(None, b) for b in list(row_index[second])[:4]]
+    pairs += [(a, b) for a in list(row_index[first])[:3] for b in list(row_index[second])[:3]] + [("XX", None)]
+    for a, b in pairs:
+        filters = {first: a, second: b}
+        assert views.select(df, row_index, **filters).equals(masked(df, **filters)), filters
+        rows = views.selected_rows(row_index, **filters)
+        assert views.values_in(df, row_index, second, rows) == sorted(keys(masked(df, **filters), second).dropna().unique().tolist())
+
+
+def test_bridge_selection_matches_category_join(pipe):
+    # A review belongs to every category of its order: the bridge rows equal a join on the order's categories.
+    reviews, row_index, order_categories = pipe["low_score_reviews"], pipe["low_score_review_rows"], pipe["order_categories"]
+    for category in list(row_index['product_category_name_english'])[:6]:
+        orders = order_categories.loc[order_categories['product_category_name_english'] == category, 'order_id']
+        expected = reviews[reviews['order_id'].isin(orders)]
+        assert views.select(reviews, row_index, product_category_name_english=category).equals(expected), category
+        for complaint in list(row_index['complaint_category'])[:3]:
+            actual = views.select(reviews, row_index, ['review_id'], limit=5, product_category_name_english=category, complaint_category=complaint)
+            assert actual.equals(expected.loc[expected['complaint_category'] == complaint, ['review_id']].iloc[:5])
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipeline
+import sql_pipeline
+import timeline
+from conftest import read_remote
+
+NODES = ["headline_stats", "approx_headline_stats", "monthly_revenue", "monthly_performance", "lateness_cube", "category_quality",
+         "low_score_reviews", "freight_ratio", "review_by_freight", "top_categories", "top_segments", "lead_type_proportions",
+         "delivery_summary", "cohort_matrix", "seller_leaderboard"]
+RANGES = [
+    ("2017-03-01", "2017-09-01"),  # month-aligned: monthly nodes come from the parent
+    ("2017-03-14", "2017-08-20 13:00"),
+    ("2017-01-01", "2017-02-01"),  # before the first won deal
+    ("2016-01-01", "2030-01-01"),
+    ("2018-01-01", "2018-01-01"),
+]
+
+
+def masked_tables(tables, start, end):
+    # The windowed tables the slow way: boolean masks over every table.
+    orders = tables["orders"]
+    orders = orders[(orders['order_purchase_timestamp'] >= start) & (orders['order_purchase_timestamp'] < end)]
+    masked = dict(tables, orders=orders)
+    for name, key in timeline.ORDER_KEYS.items():
+        masked[name] = tables[name][tables[name][key].isin(orders[key])]
+    for name, key in timeline.DIMENSION_KEYS.items():
+        masked[name] = tables[name][tables[name][key].isin(orders[key])]
+    deals = tables["deals"]
+    masked["deals"] = deals[(deals['won_date'] >= start) & (deals['won_date'] < end)]
+    return masked
+
+
+def same_value(expected, actual):
+    if isinstance(expected, dict):
+        return expected.keys() == actual.keys() and all(np.isclose(expected[k], actual[k], equal_nan=True) for k in expected)
+    if isinstance(expected, float):
+        return bool(np.isclose(expected, actual, equal_nan=True))
+    return sql_pipeline.same_result(expected, actual)
+
+
+def assert_window_matches_masks(pipe, start, end):
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    window = pipe.window(start, end)
+    masked = pipeline.Pipeline(masked_tables(pipe.tables, start, end), pipe.snapshot_id)
+    assert window.bounds["orders"].stop - window.bounds["orders"].start == len(masked["orders"])
+    for name in NODES:
+        assert same_value(masked[name], window[name]), name
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+def test_window_matches_boolean_masks(pipe, start, end):
+    assert_window_matches_masks(pipe, start, end)
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+def test_remote_window_matches_boolean_masks(remote_pipe, start, end):
+    assert_window_matches_masks(remote_pipe, start, end)
+
+
+def test_remote_and_snapshot_windows_agree(pipe, remote_pipe):
+    assert timeline.date_bounds(remote_pipe["time_index"]) == timeline.date_bounds(pipe["time_index"])
+    start, end = pd.Timestamp("2017-03-01"), pd.Timestamp("2017-06-01")
+    for name in ["headline_stats", "monthly_revenue", "category_quality", "top_categories"]:
+        assert same_value(pipe.window(start, end)[name], remote_pipe.window(start, end)[name]), name
+
+
+def test_unsorted_tables_are_refused(shuffled_dir):
+    with pytest.raises(ValueError, match="purchase order"):
+        pipeline.Pipeline(read_remote(shuffled_dir), "remote")["time_index"]
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+# Orders are sorted by purchase time; these tables follow the order each row belongs to (join column).
+ORDER_KEYS = {
+    "payments": "order_id",
+    "order_items": "order_id",
+    "reviews": "order_id",
+}
+# Dimension rows referenced by orders, stored in order of their first order. A customer id can in
+# principle sit on several orders, so a window gathers the rows its orders reference.
+DIMENSION_KEYS = {
+    "customers": "customer_id",
+}
+# Tables sorted on a timestamp of their own; the global date range applies to it directly.
+TIME_COLUMNS = {
+    "orders": "order_purchase_timestamp",
+    "deals": "won_date",
+}
+
+
+def order_ranks(orders, table, key):
+    # Position of each row's order in the sorted orders; rows without an order sort after all of them.
+    positions = pd.Series(np.arange(len(orders)), index=orders[key].to_numpy())
+    positions = positions[~positions.index.duplicated()]
+    return table[key].map(positions).fillna(len(orders)).to_numpy(dtype=np.int64)
+
+
+# Done once at ingest (snapshot build or remote load), so that every date range is one contiguous
+# row slice of each table. Missing timestamps sort last and fall outside every range.
+def sort_tables(tables):
+    tables = dict(tables)
+    for name, column in TIME_COLUMNS.items():
+        tables[name] = tables[name].sort_values(column, kind='stable', na_position='last').reset_index(drop=True)
+    for name, key in {**ORDER_KEYS, **DIMENSION_KEYS}.items():
+        ranks = order_ranks(tables["orders"], tables[name], key)
+        tables[name] = tables[name].take(np.argsort(ranks, kind='stable')).reset_index(drop=True)
+    return tables
+
+
+# Sorted search keys per table: timestamps (without the trailing NaT) for the time-sorted tables,
+# order ranks for the tables that follow orders. Dimensions get the row of each order's entry (-1: none).
+def build_time_index(tables):
+    index = {}
+    for name, column in TIME_COLUMNS.items():
+        times = tables[name][column].to_numpy()
+        index[name] = times[:len(times) - np.count_nonzero(np.isnat(times))]
+    for name, key in ORDER_KEYS.items():
+        index[name] = order_ranks(tables["orders"], tables[name], key)
+    # Binary search over unsorted keys gives silently wrong windows, so refuse tables not from sort_tables.
+    for name, keys in index.items():
+        if np.any(keys[1:] < keys[:-1]):
+            raise ValueError(f"{name} is not in purchase order; load it through timeline.sort_tables")
+    for name, key in DIMENSION_KEYS.items():
+        rows = pd.Series(np.arange(len(tables[name])), index=tables[name][key].to_numpy())
+        rows = rows[~rows.index.duplicated()]
+        index[name] = tables["orders"][key].map(rows).fillna(-1).to_numpy(dtype=np.int64)
+    return index
+
+
+def date_bounds(index):
+    times = index["orders"]
+    return pd.Timestamp(times[0]), pd.Timestamp(times[-1])
+
+
+def window_bounds(index, start, end):
+    # Rows of every table for purchases in [start, end): a slice found by binary search, or for
+    # dimensions the rows the sliced orders reference (still a slice when they are contiguous).
+    bounds = {}
+    for name in TIME_COLUMNS:
+        times = index[name]
+        bounds[name] = slice(*(np.searchsorted(times, pd.Timestamp(edge).to_datetime64().astype(times.dtype), side='left') for edge in (start, end)))
+    orders = bounds["orders"]
+    for name in ORDER_KEYS:
+        bounds[name] = slice(np.searchsorted(index[name], orders.start, side='left'), np.searchsorted(index[name], orders.stop, side='left'))
+    for name in DIMENSION_KEYS:
+        rows = np.unique(index[name][orders])
+        rows = rows[rows >= 0]
+        bounds[name] = slice(rows[0], rows[-1] + 1) if len(rows) and rows[-1] - rows[0] + 1 == len(rows) else rows
+    return bounds
+
+
+def window_tables(tables, bounds):
+    # iloc row slices are views, so a window costs no copy of the snapshot.
+    return {name: df.iloc[bounds[name]] if name in bounds else df for name, df in tables.items()}
+
+
+def shift_positions(positions, rows):
+    # Sorted row positions in a full table -> positions in its window slice.
+    return positions[np.searchsorted(positions, rows.start):np.searchsorted(positions, rows.stop)] - rows.start
+
+
+def is_month_aligned(start, end):
+    return all(edge == edge.to_period('M').to_timestamp() for edge in (start, end))
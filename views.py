@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+EMPTY = np.array([], dtype=np.intp)
+
+
+def _keys(df, column):
+    return df.index.get_level_values(column) if column in df.index.names else df[column]
+
+
+def positions_by(values, rows=None):
+    # value -> sorted row positions; `rows` maps each value to its row when they come from a bridge.
+    values = pd.Series(np.asarray(values, dtype=object))
+    rows = np.arange(len(values)) if rows is None else np.asarray(rows)
+    return {value: np.sort(rows[index]) for value, index in values.groupby(values).indices.items()}
+
+
+# Row positions per value of each filter column (or index level), built once per pipeline so a
+# widget filter selects rows of the shared frame instead of comparing whole columns on every rerun.
+def build_row_index(df, columns):
+    return {column: positions_by(_keys(df, column)) for column in columns}
+
+
+def intersect(a, b):
+    # Both sorted and unique. Binary-searches the shorter in the longer, so the work and the
+    # allocation scale with the smaller selection.
+    if len(a) > len(b):
+        a, b = b, a
+    at = np.searchsorted(b, a)
+    found = at < len(b)
+    found[found] = b[at[found]] == a[found]
+    return a[found]
+
+
+def selected_rows(row_index, **filters):
+    # Equality filters ANDed as sorted positions; a None value leaves the column unfiltered, and
+    # None overall means every row.
+    rows = None
+    for column, value in filters.items():
+        if value is not None:
+            positions = row_index[column].get(value, EMPTY)
+            rows = positions if rows is None else intersect(rows, positions)
+    return rows
+
+
+def select(df, row_index, columns=None, limit=None, **filters):
+    # Projects before gathering, so only the columns a chart reads are ever copied.
+    rows = selected_rows(row_index, **filters)
+    view = df if columns is None else df[columns]
+    if rows is None:
+        return view if limit is None else view.iloc[:limit]
+    return view.iloc[rows[:limit]]
+
+
+def values_in(df, row_index, column, rows=None):
+    # Sorted distinct values of a filter column, over every row or over the selected ones only.
+    if rows is None:
+        return list(row_index[column])
+    if column in df.index.names:
+        level = df.index.names.index(column)
+        codes = np.unique(df.index.codes[level][rows])
+        return sorted(df.index.levels[level][codes[codes >= 0]].tolist())
+    return sorted(df[column].iloc[rows].dropna().unique().tolist())